@@ -1,2 +1,4 @@
 timeout = 120
 graceful_timeout = 30
+# 파티 생성 진행 상황(SSE)을 받는 동안에도 확정 요청 등 다른 요청을 같은 프로세스에서 처리
+threads = 4
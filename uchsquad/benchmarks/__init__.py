@@ -0,0 +1,13 @@
+# benchmarks/__init__.py
+# 파티 최적화·점수 갱신 벤치마크
+#   python -m benchmarks            : 단계별 소요 시간/결과 품질 측정, JSON 기준값 저장·비교
+#   python -m benchmarks.engines    : 편차 줄이기 스왑 엔진 속도 비교 (reference 대비)
+#   python -m benchmarks.imports    : 웹 워커 모듈 콜드 import 시간/RSS 측정
+#   python -m benchmarks.fetch      : 점수 갱신 동시 요청 속도 비교 (로컬 스텁 서버 사용)
+#   python -m benchmarks.cache      : viewData 응답 캐시(유효 시간/304 재검증) 요청 수·시간 비교
+#   python -m benchmarks.pipeline   : 캐릭터 조회→점수 요청 일괄/스트리밍 비교 (가짜 조회 사용)
+#   python -m benchmarks.replay     : 기록한 응답(update_score.py --record)으로 파싱 확인·오프라인 처리량 측정
+#   python -m benchmarks.resilience : 서버 장애(503/지연/연결 불가) 시 재시도·회로 차단기 효과 비교
+#   python -m benchmarks.stub_server: dundam viewData API 스텁 서버 단독 실행
+# uchsquad 디렉터리에서 실행한다.
+from .roster import SCORE_DISTS, make_roster
@@ -0,0 +1,104 @@
+# python -m benchmarks : 로스터 크기별 파티 최적화 벤치마크 + JSON 기준값 저장/비교
+import argparse
+import json
+import os
+import platform
+import sys
+
+from scripts.party_maker_print import ENGINES
+
+from .optimizer import run_optimizer, time_party_score
+from .roster import SCORE_DISTS, make_roster
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+# 기준값 비교에서 회귀로 보는 소요 시간 배수
+SLOWDOWN_LIMIT = 1.5
+
+
+def _key(entry):
+    return (entry['size'], entry['engine'], entry['score_dist'])
+
+
+# baseline 대비 변화 출력. 회귀(느려짐/품질 저하)가 있으면 True
+def compare(results, baseline):
+    old = {_key(e): e for e in baseline['results']}
+    regressed = False
+    for e in results:
+        b = old.get(_key(e))
+        if b is None:
+            continue
+        ratio = e['total'] / b['total'] if b['total'] else float('inf')
+        q, bq = e['quality'], b['quality']
+        worse = (q['std_dev'] > bq['std_dev'] * (1 + 1e-9) or q['leftover'] > bq['leftover'])
+        slow = ratio > SLOWDOWN_LIMIT
+        regressed = regressed or worse or slow
+        print(
+            f"{e['size']:6d}명 {e['engine']:>9s} {e['score_dist']:>9s}  "
+            f"시간 x{ratio:5.2f}{' (느려짐)' if slow else ''}  "
+            f"std {bq['std_dev']:.3f} → {q['std_dev']:.3f}  "
+            f"leftover {bq['leftover']} → {q['leftover']}{'  (품질 저하)' if worse else ''}"
+        )
+    return regressed
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the party optimizer phases on synthetic rosters')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 2000], help='로스터 캐릭터 수')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=['delta'])
+    parser.add_argument('--score-dist', choices=SCORE_DISTS, default='lognormal')
+    parser.add_argument('--per-adventure', type=int, nargs=2, default=[4, 20], metavar=('MIN', 'MAX'),
+                        help='모험단당 캐릭터 수 범위')
+    parser.add_argument('--buffer-ratio', type=float, default=0.25)
+    parser.add_argument('--rounds', type=int, default=5, help='편차 줄이기 스왑 최대 반복 횟수')
+    parser.add_argument('--time-budget', type=float, default=None, help='assign_parties 시간 상한(초)')
+    parser.add_argument('--repeat', type=int, default=1, help='반복 측정 횟수 (최소값 사용)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='PATH', help='결과를 JSON 기준값으로 저장')
+    parser.add_argument('--compare', metavar='PATH', help='JSON 기준값과 비교 (회귀 시 종료 코드 1)')
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        records = make_roster(size, per_adventure=tuple(args.per_adventure),
+                              buffer_ratio=args.buffer_ratio, score_dist=args.score_dist, seed=args.seed)
+        for engine in args.engines:
+            r = run_optimizer(records, engine=engine, max_rounds=args.rounds,
+                              time_budget=args.time_budget, seed=args.seed, repeat=args.repeat)
+            r.update(size=size, engine=engine, score_dist=args.score_dist)
+            results.append(r)
+            q = r['quality']
+            phases = '  '.join(f"{k} {v * 1000:.1f}ms" for k, v in r['phases'].items())
+            print(f"{size:6d}명 {engine:>9s}  {r['total']:8.3f}s  파티 {q['parties']}  "
+                  f"leftover {q['leftover']}  range {q['score_range']:.2f}  std {q['std_dev']:.3f}")
+            print(f"{'':17s}{phases}")
+
+    score_us = time_party_score(seed=args.seed)
+    print(f"compute_party_score  {score_us:.2f}µs/회")
+
+    report = {
+        'meta': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'params': {
+            'per_adventure': args.per_adventure,
+            'buffer_ratio': args.buffer_ratio,
+            'rounds': args.rounds,
+            'time_budget': args.time_budget,
+            'seed': args.seed,
+        },
+        'results': results,
+        'compute_party_score_us': score_us,
+    }
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"기준값 저장: {args.save}")
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if compare(results, baseline):
+            sys.exit(1)
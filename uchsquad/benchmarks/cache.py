@@ -0,0 +1,72 @@
+# python -m benchmarks.cache : viewData 응답 캐시 효과 측정
+#   같은 캐릭터들을 로컬 스텁 서버로 여러 번 갱신하며 실제 요청 수(200/304)와 소요 시간을 비교한다.
+#   캐시 없음 → 캐시 첫 실행 → 유효 시간 안 재실행(요청 없음) → 유효 시간 지난 재실행(조건부 요청, 304)
+#   캐시를 써도 user_character 결과가 캐시 없이 갱신한 것과 같은지 확인한다.
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from scripts.update_score import ResponseCache, fetch_and_update
+
+from .fetch import make_empty_db, make_tuples
+from .stub_server import start_stub_server
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+
+def snapshot(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        'SELECT adventure, server, key, chara_name, job, fame, score, isbuffer '
+        'FROM user_character ORDER BY adventure, server, chara_name'
+    ).fetchall()
+    conn.close()
+    return rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure the viewData response cache against a local stub server')
+    parser.add_argument('--characters', type=int, default=24, help='갱신할 캐릭터 수')
+    parser.add_argument('--latency', type=float, default=0.2, help='스텁 서버 응답 지연(초)')
+    parser.add_argument('--workers', type=int, default=6, help='동시 API 요청 수')
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    tuples = make_tuples(args.characters)
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            plain_db = os.path.join(tmp, 'plain.sqlite')
+            cached_db = os.path.join(tmp, 'cached.sqlite')
+            make_empty_db(plain_db)
+            make_empty_db(cached_db)
+            cache = ResponseCache(os.path.join(tmp, 'cache'), ttl=3600)
+
+            runs = [('캐시 없음', plain_db, None, None),
+                    ('캐시 첫 실행', cached_db, cache, None),
+                    ('유효 시간 안', cached_db, cache, None),
+                    ('재검증(304)', cached_db, cache, 0)]
+            for name, db_path, response_cache, ttl in runs:
+                if ttl is not None:
+                    response_cache.ttl = ttl
+                before = dict(server.counts)
+                t0 = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ok, failed = fetch_and_update(tuples, workers=args.workers, rate=0, base_url=base_url,
+                                                  db_path=db_path, response_cache=response_cache)
+                elapsed = time.perf_counter() - t0
+                sent = {k: server.counts[k] - before[k] for k in before}
+                print(f"{name:10s} {elapsed:6.2f}s  성공 {ok} 실패 {failed}  "
+                      f"응답 200: {sent['ok']:3d}  304: {sent['not_modified']:3d}")
+            same = snapshot(plain_db) == snapshot(cached_db)
+    finally:
+        server.shutdown()
+    if not same:
+        print("캐시 사용 시 DB 결과가 다릅니다.")
+    sys.exit(0 if same else 1)
@@ -0,0 +1,52 @@
+# python -m benchmarks.engines : 편차 줄이기 스왑 엔진 속도 비교 (reference 대비)
+import sys
+import time
+import argparse
+
+from scripts.party_maker_print import SWAP_ENGINES, adapt_characters, assign_parties
+
+from .roster import SCORE_DISTS, make_roster
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+
+def run(records, engine, max_rounds):
+    start = time.perf_counter()
+    parties, leftover, scores, score_range, std_dev = assign_parties(
+        adapt_characters(records), engine=engine, max_rounds=max_rounds
+    )
+    elapsed = time.perf_counter() - start
+    layout = ([[m["name"] for m in p] for p in parties], [m["name"] for m in leftover])
+    return elapsed, layout, std_dev
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark stdev-reduction swap engines')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--engines', nargs='+', choices=sorted(SWAP_ENGINES),
+                        default=['delta', 'numpy'])
+    parser.add_argument('--rounds', type=int, default=20,
+                        help='스왑 최대 반복 횟수 (reference 는 큰 로스터에서 매우 느림)')
+    parser.add_argument('--score-dist', choices=SCORE_DISTS, default='lognormal')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    mismatch = False
+    for n in args.sizes:
+        records = make_roster(n, score_dist=args.score_dist, seed=args.seed)
+        t_ref, layout_ref, std_ref = run(records, 'reference', args.rounds)
+        print(f"{n:5d}명  reference {t_ref:8.3f}s  std {std_ref:.3f}")
+        for engine in args.engines:
+            t, layout, std = run(records, engine, args.rounds)
+            same = layout == layout_ref
+            print(
+                f"{'':7s}{engine:>9s} {t:8.3f}s  "
+                f"x{t_ref / t if t else float('inf'):7.1f}  "
+                f"std {std:.3f}  {'동일' if same else '다름'}"
+            )
+            # delta 는 기준 구현과 항상 같은 결과를 내야 한다
+            if engine == 'delta' and not same:
+                mismatch = True
+    if mismatch:
+        sys.exit(1)
@@ -0,0 +1,81 @@
+# python -m benchmarks.fetch : update_score.fetch_and_update 동시 요청 벤치마크
+#   로컬 스텁 서버(benchmarks.stub_server)에 응답 지연을 주고, 실제 DB 스키마로 만든 임시 DB 에
+#   workers 설정별로 갱신해 소요 시간을 비교한다. 설정마다 user_character 결과가 같은지도 확인한다.
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from scripts.update_score import DB_PATH, HOST_RATE_LIMIT, fetch_and_update
+
+from .stub_server import start_stub_server
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+
+# 실제 DB 와 같은 스키마의 빈 DB 생성
+def make_empty_db(path, schema_db=DB_PATH):
+    src = sqlite3.connect(schema_db)
+    ddl = [r[0] for r in src.execute(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%'"
+    )]
+    src.close()
+    conn = sqlite3.connect(path)
+    for sql in ddl:
+        conn.execute(sql)
+    conn.commit()
+    conn.close()
+
+
+def make_tuples(count):
+    servers = ['cain', 'diregie', 'siroco', 'prey']
+    return [(servers[k % len(servers)], f'{k:032x}') for k in range(count)]
+
+
+def run_fetch(tuples, base_url, workers, rate):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite')
+        make_empty_db(db_path)
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok, failed = fetch_and_update(tuples, workers=workers, rate=rate, base_url=base_url,
+                                          db_path=db_path)
+        elapsed = time.perf_counter() - t0
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            'SELECT adventure, server, key, chara_name, job, fame, score, isbuffer '
+            'FROM user_character ORDER BY idx'
+        ).fetchall()
+        conn.close()
+    return elapsed, ok, failed, rows
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark concurrent score fetching against a local stub server')
+    parser.add_argument('--characters', type=int, default=24, help='갱신할 캐릭터 수')
+    parser.add_argument('--latency', type=float, default=0.3, help='스텁 서버 응답 지연(초)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8], help='비교할 동시 요청 수')
+    parser.add_argument('--rate', type=float, default=HOST_RATE_LIMIT, help='호스트별 초당 요청 수 상한 (0: 제한 없음)')
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    tuples = make_tuples(args.characters)
+    baseline_rows = None
+    mismatch = False
+    try:
+        for workers in args.workers:
+            elapsed, ok, failed, rows = run_fetch(tuples, base_url, workers, args.rate)
+            if baseline_rows is None:
+                baseline_rows = rows
+            same = rows == baseline_rows
+            mismatch = mismatch or not same
+            print(f"workers {workers:3d}  {elapsed:7.2f}s  {len(tuples) / elapsed:6.1f}명/s  "
+                  f"성공 {ok} 실패 {failed}{'' if same else '  (DB 결과 다름)'}")
+    finally:
+        server.shutdown()
+    sys.exit(1 if mismatch else 0)
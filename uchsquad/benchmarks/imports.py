@@ -0,0 +1,82 @@
+# python -m benchmarks.imports : 콜드 스타트 import 시간과 워커 RSS 측정
+#   모듈마다 새 인터프리터를 띄워 import 에 걸린 시간과 최대 RSS 를 재고, 반복 중 최소값을 쓴다.
+#   --with pandas 처럼 주면 같은 측정을 해당 모듈을 먼저 import 한 상태로도 돌려 비교한다
+#   (예전 party_maker_print 는 pandas 를 최상위에서 불러왔다).
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+UCHSQUAD_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_MODULES = ['scripts.party_maker_print', 'blueprints.party', 'app']
+
+# 자식 프로세스에서 실행할 코드. 인터프리터 자체 기동 비용은 빼고 (선행 모듈 포함) import 구간만 잰다
+_PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+for name in sys.argv[2:]:
+    __import__(name)
+__import__(sys.argv[1])
+elapsed = time.perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == 'darwin':
+    rss //= 1024
+print(json.dumps({'seconds': elapsed, 'rss_kb': rss,
+                  'pandas': 'pandas' in sys.modules, 'numpy': 'numpy' in sys.modules}))
+"""
+
+
+def measure(module, preload=(), repeat=5):
+    best = None
+    for _ in range(repeat):
+        out = subprocess.run(
+            [sys.executable, '-c', _PROBE, module, *preload],
+            cwd=UCHSQUAD_DIR, capture_output=True, text=True, check=True,
+        ).stdout
+        r = json.loads(out.strip().splitlines()[-1])
+        if best is None:
+            best = r
+        else:
+            best['seconds'] = min(best['seconds'], r['seconds'])
+            best['rss_kb'] = min(best['rss_kb'], r['rss_kb'])
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure cold import time and RSS of the web worker modules')
+    parser.add_argument('--modules', nargs='+', default=DEFAULT_MODULES)
+    parser.add_argument('--with', dest='preload', nargs='+', default=[], metavar='MODULE',
+                        help='먼저 import 한 상태와 비교할 모듈 (예: pandas)')
+    parser.add_argument('--repeat', type=int, default=5, help='반복 측정 횟수 (최소값 사용)')
+    parser.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+    args = parser.parse_args()
+
+    results = []
+    for module in args.modules:
+        entry = {'module': module, 'lazy': measure(module, repeat=args.repeat)}
+        if args.preload:
+            try:
+                entry['preloaded'] = measure(module, args.preload, repeat=args.repeat)
+            except subprocess.CalledProcessError:
+                print(f"{' '.join(args.preload)} 를 불러올 수 없어 비교를 건너뜁니다.", file=sys.stderr)
+                args.preload = []
+        results.append(entry)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        sys.exit(0)
+
+    for e in results:
+        lazy = e['lazy']
+        line = (f"{e['module']:>28s}  {lazy['seconds'] * 1000:7.1f}ms  RSS {lazy['rss_kb'] / 1024:6.1f}MB"
+                f"  pandas={'Y' if lazy['pandas'] else 'N'} numpy={'Y' if lazy['numpy'] else 'N'}")
+        pre = e.get('preloaded')
+        if pre:
+            line += (f"  | +{','.join(args.preload)} {pre['seconds'] * 1000:7.1f}ms"
+                     f"  RSS {pre['rss_kb'] / 1024:6.1f}MB")
+        print(line)
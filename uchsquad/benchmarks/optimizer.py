@@ -0,0 +1,58 @@
+# 파티 최적화 단계별 소요 시간/결과 품질 측정
+import random
+import time
+
+from scripts.party_maker_print import (
+    MAX_SWAP_ROUNDS, Roster, adapt_characters, assign_parties, compute_party_score,
+)
+
+
+def run_optimizer(records, engine='delta', max_rounds=MAX_SWAP_ROUNDS, time_budget=None,
+                  seed=0, repeat=1):
+    """
+    assign_parties 를 repeat 번 실행해 단계별 최소 소요 시간과 결과 품질을 반환한다.
+    단계 이름은 assign_parties 의 stats['phases'] (main_buffers, dealers, sub_buffers,
+    leftover_swap, swap, stats) 에 Roster 생성(roster)을 더한 것.
+    """
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        roster = Roster.from_records(records)
+        t1 = time.perf_counter()
+        stats = {}
+        parties, leftover, scores, score_range, std_dev = assign_parties(
+            roster, engine=engine, max_rounds=max_rounds, time_budget=time_budget,
+            seed=seed, stats=stats
+        )
+        t2 = time.perf_counter()
+        phases = {'roster': t1 - t0, **stats.get('phases', {})}
+        if best is None or t2 - t0 < best['total']:
+            best = {
+                'total': t2 - t0,
+                'phases': phases,
+                'quality': {
+                    'parties': len(parties),
+                    'leftover': len(leftover),
+                    'score_range': score_range,
+                    'std_dev': std_dev,
+                },
+            }
+    return best
+
+
+def time_party_score(calls=100_000, seed=0):
+    """compute_party_score 1회 평균 소요 시간(마이크로초). 버퍼 1~2명 + 딜러로 된 4인 파티 기준."""
+    rng = random.Random(seed)
+    parties = []
+    for k in range(1000):
+        nbuf = 1 + (k % 2)
+        records = [
+            {'score': rng.randint(1_500_000, 5_700_000) if i < nbuf else rng.randint(40_000_000, 16_000_000_000),
+             'isbuffer': int(i < nbuf), 'adventure': f'모험단{i}', 'chara_name': f'캐릭{k}_{i}'}
+            for i in range(4)
+        ]
+        parties.append(adapt_characters(records))
+    start = time.perf_counter()
+    for k in range(calls):
+        compute_party_score(parties[k % len(parties)])
+    return (time.perf_counter() - start) / calls * 1e6
@@ -0,0 +1,81 @@
+# python -m benchmarks.pipeline : 캐릭터 조회 → 점수 요청 파이프라인 비교
+#   브라우저 대신 튜플을 일정 간격으로 내주는 가짜 조회(fake_discovery)와 로컬 스텁 서버로
+#   "조회를 모두 마친 뒤 요청" 과 "찾는 대로 요청(stream_discovered)" 의 소요 시간을 비교한다.
+#   두 방식의 user_character / character_key 결과가 같은지도 확인한다.
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+from scripts.update_score import HOST_RATE_LIMIT, fetch_and_update, stream_discovered
+
+from .fetch import make_empty_db, make_tuples
+from .stub_server import start_stub_server
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+
+# 캐릭터 카드 하나를 읽는 데 delay 초가 걸리는 가짜 조회 (stream_discovered 의 source 로 쓴다)
+def fake_discovery(tuples, delay):
+    def source(names):
+        for t in tuples:
+            time.sleep(delay)
+            yield t
+    return source
+
+
+def run_pipeline(tuples, base_url, delay, workers, rate, streaming):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite')
+        make_empty_db(db_path)
+        source = fake_discovery(tuples, delay)
+        scraped = set()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            stream = stream_discovered(['스텁모험단'], db_path=db_path, scraped=scraped, source=source)
+            if not streaming:
+                stream = list(stream)
+            ok, failed = fetch_and_update(stream, workers=workers, rate=rate, base_url=base_url,
+                                          db_path=db_path, cache_keys=scraped)
+        elapsed = time.perf_counter() - t0
+        conn = sqlite3.connect(db_path)
+        rows = conn.execute(
+            'SELECT adventure, server, key, chara_name, job, fame, score, isbuffer '
+            'FROM user_character ORDER BY idx'
+        ).fetchall()
+        keys = conn.execute('SELECT adventure, chara_name, server, key FROM character_key ORDER BY rowid').fetchall()
+        conn.close()
+    return elapsed, ok, failed, rows, keys
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare batch vs streaming discovery-to-fetch pipelines')
+    parser.add_argument('--characters', type=int, default=24, help='조회될 캐릭터 수')
+    parser.add_argument('--scrape-delay', type=float, default=0.1, help='캐릭터 하나를 찾는 데 걸리는 시간(초)')
+    parser.add_argument('--latency', type=float, default=0.3, help='스텁 서버 응답 지연(초)')
+    parser.add_argument('--workers', type=int, default=6, help='동시 API 요청 수')
+    parser.add_argument('--rate', type=float, default=HOST_RATE_LIMIT, help='호스트별 초당 요청 수 상한 (0: 제한 없음)')
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    tuples = make_tuples(args.characters)
+    scrape = args.characters * args.scrape_delay
+    print(f"캐릭터 {args.characters}명: 조회만 {scrape:.2f}s, 요청 지연 {args.latency}s × workers {args.workers}")
+    try:
+        results = {}
+        for name, streaming in (('batch', False), ('stream', True)):
+            elapsed, ok, failed, rows, keys = run_pipeline(tuples, base_url, args.scrape_delay,
+                                                           args.workers, args.rate, streaming)
+            results[name] = (rows, keys)
+            print(f"{name:7s} {elapsed:7.2f}s  성공 {ok} 실패 {failed}  character_key {len(keys)}행")
+    finally:
+        server.shutdown()
+    same = results['batch'] == results['stream']
+    if not same:
+        print("두 방식의 DB 결과가 다릅니다.")
+    sys.exit(0 if same else 1)
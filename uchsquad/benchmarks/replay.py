@@ -0,0 +1,126 @@
+# python -m benchmarks.replay --fixtures DIR : 기록한 응답으로 점수 갱신 전체를 오프라인 재생
+#   기록은 scripts/update_score.py --record DIR <모험단...> 로 만든다.
+#     <server>_<key>.json  : viewData 응답 원문
+#     search_<이름>.html   : 모험단 검색 페이지
+#   1) 파싱 확인: 기록된 viewData 를 parse_character(extract_score_info) 로 읽어 DIR/expected.json 과 비교
+#      (expected.json 이 없거나 --update-expected 면 현재 결과로 새로 쓴다)
+#   2) 처리량: 검색 페이지에서 캐릭터를 찾고(브라우저 없이 HTML 파싱) 스텁 서버에 지연·오류를 주어 갱신
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import unquote
+
+from scripts.scrap_char import parse_search_html, search_fixture_name
+from scripts.update_score import HOST_RATE_LIMIT, fetch_and_update, parse_character, stream_discovered
+
+from .fetch import make_empty_db
+from .stub_server import start_stub_server
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+EXPECTED_FILE = 'expected.json'
+
+
+def view_data_fixtures(fixtures):
+    """{'server_key': (server, key, 파일 경로)} - 서버 이름에는 '_' 가 없다."""
+    found = {}
+    for path in sorted(glob.glob(os.path.join(fixtures, '*_*.json'))):
+        name = os.path.basename(path)[:-len('.json')]
+        server, key = name.split('_', 1)
+        found[name] = (server, key, path)
+    return found
+
+
+def adventure_names(fixtures):
+    prefix, suffix = 'search_', '.html'
+    return [unquote(os.path.basename(p)[len(prefix):-len(suffix)])
+            for p in sorted(glob.glob(os.path.join(fixtures, prefix + '*' + suffix)))]
+
+
+# 기록된 검색 페이지로 캐릭터를 찾는 조회 (stream_discovered 의 source)
+def fixture_discovery(fixtures):
+    def source(names):
+        for name in names:
+            path = os.path.join(fixtures, search_fixture_name(name))
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as f:
+                    yield from parse_search_html(f.read())
+    return source
+
+
+def check_parsing(fixtures, update=False):
+    """기록된 viewData 의 파싱 결과를 expected.json 과 비교. 다른 항목 이름 목록 반환."""
+    parsed = {}
+    for name, (server, key, path) in view_data_fixtures(fixtures).items():
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        try:
+            parsed[name] = parse_character(data, server, key)
+        except (KeyError, TypeError, ValueError) as e:
+            parsed[name] = {'error': f'{type(e).__name__}: {e}'}
+
+    expected_path = os.path.join(fixtures, EXPECTED_FILE)
+    if update or not os.path.exists(expected_path):
+        with open(expected_path, 'w', encoding='utf-8') as f:
+            json.dump(parsed, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print(f"파싱 결과 {len(parsed)}건을 {expected_path} 에 기록")
+        return []
+
+    with open(expected_path, encoding='utf-8') as f:
+        expected = json.load(f)
+    diff = sorted(n for n in set(parsed) | set(expected) if parsed.get(n) != expected.get(n))
+    print(f"파싱 확인: {len(parsed)}건 중 {len(diff)}건 다름")
+    for n in diff[:20]:
+        print(f"  {n}: 기대 {expected.get(n)} / 현재 {parsed.get(n)}")
+    return diff
+
+
+def run_replay(fixtures, latency, error_rate, seed, workers, rate):
+    names = adventure_names(fixtures)
+    server, base_url = start_stub_server(latency=latency, fixtures=fixtures, error_rate=error_rate, seed=seed)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'replay.sqlite')
+            make_empty_db(db_path)
+            if names:
+                tuples = stream_discovered(names, force=True, db_path=db_path,
+                                           source=fixture_discovery(fixtures))
+            else:
+                # 검색 페이지 기록이 없으면 viewData 기록에 있는 캐릭터 전부
+                tuples = [(server_, key) for server_, key, _ in view_data_fixtures(fixtures).values()]
+            t0 = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                ok, failed = fetch_and_update(tuples, workers=workers, rate=rate, base_url=base_url,
+                                              db_path=db_path)
+            elapsed = time.perf_counter() - t0
+    finally:
+        server.shutdown()
+    return names, elapsed, ok, failed, dict(server.counts)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay recorded dundam responses offline')
+    parser.add_argument('--fixtures', required=True, help='기록 디렉터리')
+    parser.add_argument('--update-expected', action='store_true', help='현재 파싱 결과로 expected.json 을 다시 씀')
+    parser.add_argument('--latency', type=float, default=0.2, help='스텁 서버 응답 지연(초)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 으로 답할 요청 비율 (0~1)')
+    parser.add_argument('--seed', type=int, default=0, help='오류 발생 난수 시드')
+    parser.add_argument('--workers', type=int, default=6, help='동시 API 요청 수')
+    parser.add_argument('--rate', type=float, default=HOST_RATE_LIMIT, help='호스트별 초당 요청 수 상한 (0: 제한 없음)')
+    args = parser.parse_args()
+
+    diff = check_parsing(args.fixtures, args.update_expected)
+    names, elapsed, ok, failed, counts = run_replay(args.fixtures, args.latency, args.error_rate, args.seed,
+                                                    args.workers, args.rate)
+    total = ok + failed
+    print(f"재생: 모험단 {len(names)}개, 캐릭터 {total}명, {elapsed:.2f}s "
+          f"({total / elapsed if elapsed else 0:.1f}명/s)  성공 {ok} 실패 {failed}  "
+          f"스텁 응답 200: {counts['ok']} 503: {counts['error']}")
+    sys.exit(1 if diff else 0)
@@ -0,0 +1,87 @@
+# python -m benchmarks.resilience : 서버가 불안정할 때 점수 갱신 소요 시간·성공 수 비교
+#   로컬 스텁 서버로 정상 / 간헐적 503 / 전부 503 / 응답 지연(시간 초과) / 연결 불가 상황을 만들고,
+#   재시도·회로 차단기를 끈 설정(예전 동작)과 켠 설정(기본값)을 비교한다.
+import argparse
+import contextlib
+import io
+import os
+import socket
+import sys
+import tempfile
+import time
+
+from scripts import update_score
+from scripts.update_score import FETCH_RETRIES, CircuitBreaker, fetch_and_update
+
+from .fetch import make_empty_db, make_tuples
+from .stub_server import start_stub_server
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+# 시간 초과 상황에서 쓸 (연결, 응답) 제한 시간 - 스텁 지연보다 짧게
+SHORT_TIMEOUT = (1.0, 0.5)
+
+
+def free_port():
+    # 바로 닫아 두면 그 포트로의 연결은 거부된다
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run(tuples, base_url, workers, retries, breaker):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite')
+        make_empty_db(db_path)
+        failures = []
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            ok, failed = fetch_and_update(tuples, workers=workers, rate=0, base_url=base_url, db_path=db_path,
+                                          breaker=breaker, failures=failures, retries=retries)
+        elapsed = time.perf_counter() - t0
+    kinds = {}
+    for f in failures:
+        kinds[f['error']] = kinds.get(f['error'], 0) + 1
+    return elapsed, ok, failed, kinds
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare fetch behaviour under upstream failures')
+    parser.add_argument('--characters', type=int, default=30, help='갱신할 캐릭터 수')
+    parser.add_argument('--workers', type=int, default=6, help='동시 API 요청 수')
+    parser.add_argument('--latency', type=float, default=0.1, help='스텁 서버 응답 지연(초)')
+    parser.add_argument('--seed', type=int, default=1, help='오류 발생 난수 시드')
+    args = parser.parse_args()
+
+    tuples = make_tuples(args.characters)
+    scenarios = [
+        ('정상', dict(latency=args.latency)),
+        ('503 30%', dict(latency=args.latency, error_rate=0.3)),
+        ('503 100%', dict(latency=args.latency, error_rate=1.0)),
+        ('응답 지연', dict(latency=2.0)),
+        ('연결 불가', None),
+    ]
+    configs = [
+        ('재시도·차단 없음', 0, lambda: CircuitBreaker(failures=0)),
+        ('기본값', FETCH_RETRIES, CircuitBreaker),
+    ]
+    for name, stub in scenarios:
+        server = None
+        if stub is None:
+            base_url = f'http://127.0.0.1:{free_port()}'
+        else:
+            server, base_url = start_stub_server(seed=args.seed, **stub)
+        old_timeout = update_score.REQUEST_TIMEOUT
+        if name == '응답 지연':
+            update_score.REQUEST_TIMEOUT = SHORT_TIMEOUT
+        try:
+            for label, retries, make_breaker in configs:
+                elapsed, ok, failed, kinds = run(tuples, base_url, args.workers, retries, make_breaker())
+                detail = ', '.join(f'{k} {v}' for k, v in sorted(kinds.items()))
+                print(f"{name:8s} {label:10s} {elapsed:6.2f}s  성공 {ok:3d} 실패 {failed:3d}"
+                      f"{'  (' + detail + ')' if detail else ''}")
+        finally:
+            update_score.REQUEST_TIMEOUT = old_timeout
+            if server is not None:
+                server.shutdown()
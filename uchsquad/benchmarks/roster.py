@@ -0,0 +1,51 @@
+# 벤치마크용 합성 로스터 생성
+import random
+
+# 실제 DB 분포(점수 로그 평균/표준편차)를 참고한 점수 분포
+#   lognormal: 딜러 lognormal(22.1, 1.05) ≈ 중앙값 40억, 버퍼 lognormal(15.27, 0.28) ≈ 430만
+#   uniform:   딜러 4천만~160억, 버퍼 150만~570만 균등
+#   flat:      모든 딜러/버퍼가 거의 같은 점수 (편차 줄이기 최악의 동점 케이스)
+SCORE_DISTS = ('lognormal', 'uniform', 'flat')
+
+
+def _score(rng, dist, isbuf):
+    if dist == 'lognormal':
+        if isbuf:
+            return min(max(int(rng.lognormvariate(15.27, 0.28)), 1_000_000), 8_000_000)
+        return max(int(rng.lognormvariate(22.1, 1.05)), 10_000_000)
+    if dist == 'uniform':
+        return rng.randint(1_500_000, 5_700_000) if isbuf else rng.randint(40_000_000, 16_000_000_000)
+    if dist == 'flat':
+        return rng.randint(4_000_000, 4_010_000) if isbuf else rng.randint(5_000_000_000, 5_010_000_000)
+    raise ValueError(f"Unknown score distribution: {dist}")
+
+
+def make_roster(size=None, adventures=None, per_adventure=(4, 20), buffer_ratio=0.25,
+                score_dist='lognormal', seed=0):
+    """
+    DB 레코드 형식(adventure, chara_name, job, fame, score, isbuffer)의 합성 로스터.
+
+    size 를 주면 캐릭터 수가 size 가 될 때까지, adventures 를 주면 그 수만큼 모험단을 만든다.
+    모험단마다 per_adventure=(최소, 최대) 범위에서 캐릭터 수를 고르고,
+    각 캐릭터는 buffer_ratio 확률로 버퍼가 된다. 같은 인자와 seed 면 항상 같은 로스터.
+    """
+    if size is None and adventures is None:
+        raise ValueError("size 또는 adventures 중 하나는 지정해야 합니다")
+    rng = random.Random(seed)
+    records = []
+    adv = 0
+    while (size is None or len(records) < size) and (adventures is None or adv < adventures):
+        for c in range(rng.randint(*per_adventure)):
+            if size is not None and len(records) >= size:
+                break
+            isbuf = rng.random() < buffer_ratio
+            records.append({
+                "adventure": f"모험단{adv}",
+                "chara_name": f"캐릭{adv}_{c}",
+                "job": "",
+                "fame": 0,
+                "score": _score(rng, score_dist, isbuf),
+                "isbuffer": int(isbuf),
+            })
+        adv += 1
+    return records
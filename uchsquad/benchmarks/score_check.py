@@ -0,0 +1,103 @@
+# python -m benchmarks.score_check : 파티 점수 계산 구현들이 기존 compute_party_score 와 같은 값을 내는지 확인
+#   같은 비교를 tests/test_party_score.py 가 pytest 로 자동 실행한다 (이 스크립트는 대량 비교·구현별 속도 측정용)
+#   무작위 파티 구성(0~4명, 버퍼 0~4명, 동점·경계값 포함)으로 비교하고, 다르면 종료 코드 1
+import argparse
+import random
+import sys
+import time
+
+from scripts.party_maker_print import (
+    Member, _party_score, compute_party_score, party_score, score_parties, score_party_arrays,
+)
+
+if hasattr(sys.stdout, "reconfigure"):
+    sys.stdout.reconfigure(encoding="utf-8")
+
+
+# 기존 compute_party_score 구현 (비교 기준)
+def reference_party_score(members):
+    buffers = [m for m in members if m['is_buffer']]
+    dealers = [m for m in members if not m['is_buffer']]
+    main_buff = max(buffers, key=lambda x: x['score']) if buffers else None
+    sub_buff = max([b for b in buffers if b != main_buff], key=lambda x: x['score']) if len(buffers) > 1 else None
+
+    buff_factor = (main_buff['score'] / 3_000_000) if main_buff else 1.0
+    dealer_sum = sum(d['score'] // 10_000_000 for d in dealers)
+    sub_buff_factor = 1.0
+    if sub_buff:
+        sub_buff_factor = 1 + (sub_buff['score'] / 1_200_000) * 0.08
+    return buff_factor * dealer_sum * sub_buff_factor
+
+
+# 경계값(0, 1000만 배수 ±1, 큰 값)과 동점이 자주 나오도록 점수를 고른다
+def _score(rng, is_buffer, pool):
+    r = rng.random()
+    if r < 0.2 and pool:
+        return rng.choice(pool)
+    if r < 0.3:
+        return rng.choice([0, 1, 9_999_999, 10_000_000, 10_000_001, 3_000_000, 1_200_000])
+    if r < 0.4:
+        return rng.randint(1, 2**52)
+    score = rng.randint(1_000_000, 8_000_000) if is_buffer else rng.randint(10_000_000, 20_000_000_000)
+    pool.append(score)
+    return score
+
+
+def random_party(rng, k, pool):
+    members = []
+    for i in range(rng.randint(0, 4)):
+        is_buffer = rng.random() < 0.4
+        members.append({'chara_name': f'캐릭{k}_{i}', 'score': _score(rng, is_buffer, pool),
+                        'is_buffer': is_buffer})
+    return members
+
+
+# (점수, 버퍼 여부) 목록을 P×4 배열로 바꿔 score_party_arrays 로 계산
+def to_arrays(pairs, dtype):
+    import numpy as np
+    score = np.zeros((len(pairs), 4), dtype=dtype)
+    isbuf = np.zeros((len(pairs), 4), dtype=bool)
+    valid = np.zeros((len(pairs), 4), dtype=bool)
+    for p, c in enumerate(pairs):
+        for k, (sc, b) in enumerate(c):
+            score[p, k], isbuf[p, k], valid[p, k] = sc, b, True
+    return score_party_arrays(score, isbuf, valid).tolist()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check party score implementations against the original formula')
+    parser.add_argument('--cases', type=int, default=200_000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    pool = []
+    parties = [random_party(rng, k, pool) for k in range(args.cases)]
+    expected = [reference_party_score(p) for p in parties]
+    pairs = [[(m['score'], m['is_buffer']) for m in p] for p in parties]
+
+    checks = {
+        'compute_party_score': lambda: [compute_party_score(p) for p in parties],
+        'party_score': lambda: [party_score(p) for p in pairs],
+        '_party_score(Member)': lambda: [
+            _party_score([Member(i, i, m['is_buffer'], m['score']) for i, m in enumerate(p)]) for p in parties
+        ],
+        'score_parties': lambda: score_parties(pairs),
+        'score_party_arrays(int)': lambda: to_arrays(pairs, 'int64'),
+        'score_party_arrays(float)': lambda: to_arrays(pairs, 'float64'),
+    }
+
+    failed = False
+    for name, fn in checks.items():
+        start = time.perf_counter()
+        got = fn()
+        elapsed = time.perf_counter() - start
+        diff = [k for k, (a, b) in enumerate(zip(got, expected)) if a != b]
+        print(f"{name:>26s}  {elapsed * 1e6 / len(parties):6.2f}µs/파티  "
+              f"{'일치' if not diff else f'불일치 {len(diff)}건 (예: {parties[diff[0]]})'}")
+        failed = failed or bool(diff)
+    start = time.perf_counter()
+    [reference_party_score(p) for p in parties]
+    print(f"{'기존 구현':>26s}  {(time.perf_counter() - start) * 1e6 / len(parties):6.2f}µs/파티")
+    if failed:
+        sys.exit(1)
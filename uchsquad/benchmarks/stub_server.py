@@ -0,0 +1,157 @@
+# python -m benchmarks.stub_server : dundam viewData API 를 흉내 내는 로컬 HTTP 서버
+#   /dat/viewData.jsp?image=<key>&server=<server> 요청에
+#   fixtures 디렉터리의 기록된 JSON(<server>_<key>.json)을 돌려주고, 없으면 key 로 만든 가짜 응답을 준다.
+#   /search?name=<모험단> 요청에는 기록된 검색 페이지(search_<이름>.html)를 돌려준다 (없으면 404).
+#   기록은 update_score.py --record <fixtures> 로 만든다. error_rate 비율만큼 503 으로 답한다.
+#   update_score.py --base-url http://127.0.0.1:<port> 로 실제 서버 대신 사용한다.
+#   응답에 ETag 를 붙이고, If-None-Match 가 같으면 304 로 답한다 (응답 캐시 재검증 시험용).
+import argparse
+import hashlib
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, urlsplit
+
+JOBS = ['眞 웨펀마스터', '眞 소울브링어', '眞 런처', '眞 크루세이더', '眞 인챈트리스', '眞 엘레멘탈마스터']
+
+
+# (server, key) 로 항상 같은 값을 내는 가짜 viewData 응답
+def synthetic_view_data(server, key):
+    h = int(hashlib.sha256(f'{server}/{key}'.encode('utf-8')).hexdigest(), 16)
+    job = JOBS[h % len(JOBS)]
+    data = {
+        'adventure': f'스텁모험단{h % 7}',
+        'name': f'스텁_{key[:8]}',
+        'job': job,
+        'fame': str(50_000 + h % 20_000),
+    }
+    if job in ('眞 크루세이더', '眞 인챈트리스'):
+        data['buffCal'] = [{'buffScoreNon': f'{3_000_000 + h % 3_000_000:,}'}]
+    else:
+        data['damageList'] = {'vsRanking': [{'name': '총 합', 'dam': f'{(h >> 8) % 100_000_000_000:,}'}]}
+    return data
+
+
+def make_handler(latency=0.0, fixtures=None, error_rate=0.0, seed=None):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path not in ('/dat/viewData.jsp', '/search'):
+                self.send_error(404)
+                return
+            query = parse_qs(url.query)
+            if error_rate:
+                with rng_lock:
+                    fail = rng.random() < error_rate
+                if fail:
+                    if latency:
+                        time.sleep(latency)
+                    self.server.count('error')
+                    self.send_error(503)
+                    return
+            if url.path == '/search':
+                self.search(query.get('name', [''])[0])
+                return
+            key = query.get('image', [''])[0]
+            server = query.get('server', [''])[0]
+            if latency:
+                time.sleep(latency)
+
+            body = None
+            if fixtures:
+                path = os.path.join(fixtures, f'{server}_{key}.json')
+                if os.path.exists(path):
+                    with open(path, 'rb') as f:
+                        body = f.read()
+            if body is None:
+                body = json.dumps(synthetic_view_data(server, key), ensure_ascii=False).encode('utf-8')
+
+            etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+            if self.headers.get('If-None-Match') == etag:
+                self.server.count('not_modified')
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.end_headers()
+                return
+            self.server.count('ok')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def search(self, name):
+            path = os.path.join(fixtures, f"search_{quote(name, safe='')}.html") if fixtures else None
+            if path is None or not os.path.exists(path):
+                self.send_error(404)
+                return
+            if latency:
+                time.sleep(latency)
+            with open(path, 'rb') as f:
+                body = f.read()
+            self.server.count('ok')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # 동시 접속이 기본 backlog(5)를 넘으면 연결이 재시도 대기에 걸려 측정이 왜곡된다
+    request_queue_size = 128
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 응답 종류별 횟수 (벤치마크에서 실제로 보낸 요청 수 확인용)
+        self.counts = {'ok': 0, 'not_modified': 0, 'error': 0}
+        self._count_lock = threading.Lock()
+
+    def count(self, kind):
+        with self._count_lock:
+            self.counts[kind] += 1
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 시간 초과로 먼저 끊은 경우는 조용히 넘긴다
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+# 백그라운드 스레드에서 스텁 서버 시작. (서버, base_url) 반환 - 끝나면 server.shutdown()
+def start_stub_server(port=0, latency=0.0, fixtures=None, error_rate=0.0, seed=None):
+    server = StubServer(('127.0.0.1', port), make_handler(latency, fixtures, error_rate, seed))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve recorded or synthetic viewData.jsp responses locally')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='응답 지연(초)')
+    parser.add_argument('--fixtures', help='기록 디렉터리 (<server>_<key>.json, search_<이름>.html)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='503 으로 답할 요청 비율 (0~1)')
+    parser.add_argument('--seed', type=int, default=None, help='오류 발생 난수 시드')
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(args.port, args.latency, args.fixtures, args.error_rate, args.seed)
+    print(f'스텁 서버: {base_url}  (Ctrl+C 로 종료)')
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
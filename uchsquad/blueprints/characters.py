@@ -1,17 +1,22 @@
 from flask import Blueprint, render_template, request, redirect, url_for, current_app
 from flask import jsonify
-import subprocess
-import sys
 import os
-from datetime import datetime
 
+import jobs
 from db import get_db_connection
 
 characters_bp = Blueprint('characters', __name__, template_folder='../templates')
 
-# 전역 플래그
-is_updating  = False     # update_score 용
-is_placing = False       # auto_place 용
+
+def jobs_db_path():
+    return os.path.join(current_app.root_path, 'database', 'DB.sqlite')
+
+
+# 점수 갱신·자동배치는 jobs 큐에 넣고 바로 돌아온다 (실행 중 여부는 job 테이블로 판단)
+def submit_job(kind, adventure, args=()):
+    return jobs.submit(jobs_db_path(), kind, adventure, args,
+                       workers=current_app.config.get('JOB_WORKERS', 2),
+                       timeout=current_app.config.get('JOB_TIMEOUT', 600))
 
 @characters_bp.route('/', methods=['GET'])
 def show_characters():
@@ -26,6 +31,7 @@ def show_characters():
     selected_user = None
     characters    = []
     last_exec     = None               # ← 여기에 초기화
+    active_jobs   = []
     summary = {
         'temple': (0, 0, 0),
         'azure' : (0, 0, 0),
@@ -114,6 +120,9 @@ def show_characters():
         ).fetchone()
         if row2:
             last_exec = row2['date']
+
+        # 대기/실행 중인 점수 갱신·자동배치 작업 (페이지에서 끝날 때까지 상태를 조회)
+        active_jobs = jobs.active_jobs(jobs_db_path(), selected_user['adventure'])
     
     
         # 4) use_yn=1 캐릭터만 골라서 D/B 집계
@@ -145,6 +154,7 @@ def show_characters():
         selected_user=selected_user,
         characters=characters,
         last_exec=last_exec,          # now defined
+        active_jobs=active_jobs,
         summary=summary,
         alert=alert
     )
@@ -153,68 +163,21 @@ def show_characters():
 
 @characters_bp.route('/update_score', methods=['POST'])
 def update_score_for_user():
-    global is_updating
-
     user_idx  = request.form.get('user_idx', type=int)
     adventure = request.form.get('adventure')
     if not user_idx or not adventure:
         return redirect(url_for('characters.show_characters',
                                 alert='유저/모험단 정보를 확인해 주세요.'))
 
-    if is_updating:
-        return redirect(url_for('characters.show_characters',
-                                user_idx=user_idx,
-                                alert='이미 점수 갱신 중입니다.'))
-
-    is_updating = True
-    try:
-        # 1) 스크립트 실행 (venv 보장, 타임아웃)
-        script_path = os.path.join(current_app.root_path, 'scripts', 'update_score.py')
-        cp = subprocess.run(
-            [sys.executable, script_path, adventure],
-            check=True,
-            text=True,
-            timeout=90,
-        )
-        # capture_output=True 로 출력이 숨겨지는 문제를 방지하기 위해
-        # 기본 stdout/stderr 를 사용하여 콘솔에 로그를 표시한다.
-        current_app.logger.info(
-            "update_score.py finished with return code %s", cp.returncode
-        )
-
-        # 2) 실행 성공 시 last_execute 테이블에 기록
-        conn = get_db_connection()
-        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        conn.execute(
-            '''
-            INSERT INTO last_execute (command, user, date)
-            VALUES (?, ?, ?)
-            ON CONFLICT(command, user) DO UPDATE SET date=excluded.date
-            ''',
-            ('update_score.py', adventure, now)
-        )
-        conn.commit()
-        conn.close()
-
-    except subprocess.TimeoutExpired as e:
-        current_app.logger.error("update_score.py timeout: %ss", e.timeout)
-        return redirect(url_for('characters.show_characters',
-                                user_idx=user_idx,
-                                alert='점수 업데이트가 시간 초과되었습니다.'))
-    except subprocess.CalledProcessError as e:
-        current_app.logger.error(
-            "update_score.py failed: rc=%s stderr=%s", e.returncode, e.stderr[:2000]
-        )
-        return redirect(url_for('characters.show_characters',
-                                user_idx=user_idx,
-                                alert='점수 업데이트 중 오류가 발생했습니다.'))
-    finally:
-        is_updating = False
-
+    # 스크립트는 작업 스레드가 실행하고, 성공하면 last_execute 도 거기서 기록한다
+    args = ['--force-discovery'] if request.form.get('force_discovery') else []
+    job, created = submit_job('update_score', adventure, args)
+    current_app.logger.info("update_score job %s (%s) %s", job['idx'], adventure,
+                            'queued' if created else 'already active')
     return redirect(url_for('characters.show_characters',
                             user_idx=user_idx,
-                            alert='점수 업데이트 완료!'))
-                            
+                            alert=None if created else '이미 점수 갱신 중입니다.'))
+
 @characters_bp.route('/update_flags', methods=['POST'])
 def update_flags():
     # 1) 폼에서 모험단/user_idx 가져오기
@@ -270,33 +233,39 @@ def update_flags():
     
 @characters_bp.route('/auto_place', methods=['POST'])
 def auto_place():
-    global is_placing
     user_idx  = request.form.get('user_idx', type=int)
     adventure = request.form.get('adventure')
     if not user_idx or not adventure:
         return redirect(url_for('characters.show_characters',
                                 alert='유저를 선택해 주세요.'))
 
-    if is_placing:
-        return redirect(url_for('characters.show_characters',
-                                user_idx=user_idx,
-                                alert='자동배치가 이미 실행 중입니다.'))
-
-    is_placing = True
-    try:
-        script = os.path.join(current_app.root_path, 'scripts', 'auto_place.py')
-        subprocess.run(['python', script, adventure], check=True, encoding='utf-8')
-    except subprocess.CalledProcessError:
-        return redirect(url_for('characters.show_characters',
-                                user_idx=user_idx,
-                                alert='자동배치 중 오류가 발생했습니다.'))
-    finally:
-        is_placing = False
-
+    job, created = submit_job('auto_place', adventure)
     return redirect(url_for('characters.show_characters',
                             user_idx=user_idx,
-                            alert='자동배치 완료!'))
-                            
+                            alert=None if created else '자동배치가 이미 실행 중입니다.'))
+
+
+@characters_bp.route('/jobs', methods=['GET'])
+def list_jobs():
+    """모험단의 대기/실행 중 작업 목록 (JSON)."""
+    adventure = request.args.get('adventure')
+    if not adventure:
+        return jsonify({'error': 'adventure is required'}), 400
+    return jsonify(jobs.active_jobs(jobs_db_path(), adventure))
+
+
+@characters_bp.route('/jobs/<int:job_idx>', methods=['GET'])
+def job_status(job_idx):
+    """작업 상태/진행 상황 (JSON). 페이지가 완료될 때까지 주기적으로 조회한다."""
+    db_path = jobs_db_path()
+    job = jobs.get_job(db_path, job_idx)
+    if job is None:
+        return jsonify({'error': 'not found'}), 404
+    # 이 프로세스에 작업 스레드가 없으면 띄운다 (재시작 후 남은 대기 작업 처리)
+    if job['status'] == 'queued':
+        jobs.ensure_workers(db_path, current_app.config.get('JOB_WORKERS', 2),
+                            current_app.config.get('JOB_TIMEOUT', 600))
+    return jsonify(job)
 
 
 @characters_bp.route('/swap_order', methods=['POST'])
@@ -1,24 +1,254 @@
 import os
 import sys
+import hmac
 import subprocess
 import json
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import time
+import uuid
+import threading
+from flask import Blueprint, Response, jsonify, render_template, request, redirect, url_for, flash, current_app
 from db import get_db_connection
-from scripts.party_maker_print import compute_party_score
+from scripts.party_maker_print import LEFTOVER_REASONS, ROLES, generate_parties, party_score
 
 party_bp = Blueprint('party', __name__, url_prefix='/party')
 
-def run_party_generation(role):
+# 스트리밍 파티 생성 (실행 id → _StreamRun) 과 유형별 진행 중인 실행 id.
+# 프로세스 안에서만 공유되므로 gunicorn 은 스레드 워커(gunicorn.conf.py 의 threads)로 띄운다
+_STREAM_RUNS   = {}
+_STREAM_ACTIVE = {}
+_STREAM_LOCK   = threading.Lock()
+
+# 진행 상황이 없을 때 SSE 연결 유지를 위해 주석을 보내는 간격(초)
+STREAM_KEEPALIVE = 15
+# 끝난 실행의 결과를 다시 연결해 받을 수 있도록 남겨 두는 시간(초)
+STREAM_RESULT_TTL = 300
+
+
+class _StreamRun:
+    """
+    스트리밍 파티 생성 한 번. 마지막 이벤트만 보관하고, 구독자(SSE 연결)는 바뀔 때마다 그것을 받는다.
+    진행 상황은 '지금까지의 최선 배치' 이므로 중간 이벤트를 건너뛰어도 된다.
+    """
+
+    def __init__(self, role):
+        self.id          = uuid.uuid4().hex
+        self.role        = role
+        self.stop_event  = threading.Event()
+        self.cond        = threading.Condition()
+        self.seq         = 0
+        self.latest      = None
+        self.finished_at = None
+
+    def publish(self, event, data):
+        with self.cond:
+            self.seq += 1
+            self.latest = (event, data)
+            if event != 'progress':
+                self.finished_at = time.monotonic()
+            self.cond.notify_all()
+
+    def wait(self, seen, timeout):
+        """seen 이후의 새 이벤트를 기다려 (seq, (event, data)) 반환. 시간 안에 없으면 (seen, None)."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.seq != seen, timeout)
+            if self.seq == seen:
+                return seen, None
+            return self.seq, self.latest
+
+def regen_password_ok(password):
+    """파티 재생성 비밀번호(PARTY_REGEN_PASSWORD 설정)가 맞는지. 설정이 비어 있으면 항상 통과."""
+    expected = current_app.config.get('PARTY_REGEN_PASSWORD')
+    if not expected:
+        return True
+    return hmac.compare_digest((password or '').encode('utf-8'), expected.encode('utf-8'))
+
+
+def run_party_generation(role, isolated=None, incremental=False, use_cache=True):
+    """
+    파티를 생성하고 generate_parties 결과 dict 를 반환한다.
+    기본은 웹 프로세스 안에서 바로 실행하고,
+    isolated(기본값: PARTY_ISOLATED 설정)면 별도 파이썬 프로세스에서 실행한다.
+    incremental 이면 현재 파티 배치에서 출발해 변경분만 반영한다.
+    use_cache=False 면 같은 로스터의 이전 결과가 있어도 다시 최적화한다
+    (결과 캐시는 웹 프로세스 메모리에 있으므로 isolated 모드에서는 쓰이지 않는다).
+    """
+    engine      = current_app.config.get('PARTY_ENGINE', 'delta')
+    time_budget = current_app.config.get('PARTY_TIME_BUDGET')
+    if isolated is None:
+        isolated = current_app.config.get('PARTY_ISOLATED', False)
+
+    if not isolated:
+        conn = get_db_connection()
+        try:
+            return generate_parties(conn, role, engine=engine, time_budget=time_budget,
+                                    incremental=incremental, use_cache=use_cache)
+        finally:
+            conn.close()
+
     base_dir    = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
     script_path = os.path.join(base_dir, 'scripts', 'party_maker_print.py')
-    return subprocess.run(
-        [sys.executable, script_path, role],
+    cmd = [sys.executable, script_path, role, '--json', '--engine', engine]
+    if time_budget is not None:
+        cmd += ['--time-budget', str(time_budget)]
+    if incremental:
+        cmd.append('--incremental')
+    cp = subprocess.run(
+        cmd,
         check=True,
         stdout=subprocess.PIPE,
         stderr=subprocess.PIPE,
         text=True,
         encoding='utf-8'
     )
+    return json.loads(cp.stdout.strip().splitlines()[-1])
+
+
+def generation_messages(result):
+    """generate_parties 결과를 (category, 메시지) 목록으로 정리한다."""
+    cnt, st = result['counts'], result['stats']
+    cache = result.get('cache') or {}
+    cache_msg = ''
+    if cache.get('hit'):
+        cache_msg = (f" · 변경 없음, 이전 결과 사용 ({cache['saved_now']:.2f}초 절약, "
+                     f"캐시 적중률 {cache['hit_rate']:.0%}, 누적 {cache['saved']:.1f}초 절약)")
+    if st.get('stopped_early'):
+        cache_msg += f" · 진행 중 확정 (편차 {st['std_dev']:.3f})"
+    messages = []
+    if st.get('warm_start'):
+        messages.append((
+            "success",
+            f"변경분 반영 완료: 추가 {st['added']}명, 제외 {st['removed']}명, "
+            f"점수 변경 {st['rescored']}명 → {cnt['parties']}개 파티, "
+            f"미배정 {cnt['unassigned']}명 ({result['timings']['total']:.2f}초)"
+        ))
+    else:
+        messages.append((
+            "success",
+            f"버퍼 {cnt['buffers']}명, 딜러 {cnt['dealers']}명 (총 {cnt['total']}명) → "
+            f"{cnt['parties']}개 파티 생성 완료 ({result['timings']['total']:.2f}초){cache_msg}"
+        ))
+    # 미배정 캐릭터가 있으면 이유별로 안내
+    unplaced = st.get('unplaced') or []
+    if unplaced:
+        by_reason = {}
+        for u in unplaced:
+            by_reason.setdefault(u['reason'], []).append(f"{u['chara_name']}({u['adventure']})")
+        lines = [
+            f"- {LEFTOVER_REASONS.get(r, r)}: {', '.join(names)}"
+            for r, names in by_reason.items()
+        ]
+        messages.append(("info", "미배정 " + str(len(unplaced)) + "명\n" + "\n".join(lines)))
+    return messages
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _prune_stream_runs():
+    # 끝난 지 오래된 실행 정리 (_STREAM_LOCK 안에서 부른다)
+    cutoff = time.monotonic() - STREAM_RESULT_TTL
+    for run_id in [k for k, r in _STREAM_RUNS.items() if r.finished_at is not None and r.finished_at < cutoff]:
+        del _STREAM_RUNS[run_id]
+
+
+@party_bp.route('/stream', methods=['POST'])
+def start_stream_generation():
+    """
+    파티 생성을 백그라운드 스레드에서 시작하고 {'run': 실행 id} 를 돌려준다.
+    파티 테이블을 다시 쓰므로 재생성 폼과 같은 비밀번호(regen_password)를 확인한다.
+    진행 상황은 GET /party/stream/<실행 id> 로 받는다.
+    진행 상황을 받아야 하므로 PARTY_ISOLATED 설정과 관계없이 웹 프로세스 안에서 실행한다.
+    """
+    role        = request.form.get('role', 'temple')
+    incremental = request.form.get('mode') == 'incremental'
+    use_cache   = not request.form.get('no_cache')
+
+    if not regen_password_ok(request.form.get('regen_password')):
+        return jsonify({'message': '비밀번호가 잘못되었습니다.'}), 403
+    if role not in ROLES:
+        return jsonify({'message': f'알 수 없는 유형입니다: {role}'}), 400
+    run = _StreamRun(role)
+    with _STREAM_LOCK:
+        _prune_stream_runs()
+        running = role in _STREAM_ACTIVE
+        if not running:
+            _STREAM_ACTIVE[role] = run.id
+            _STREAM_RUNS[run.id] = run
+    if running:
+        return jsonify({'message': '이미 파티를 생성하는 중입니다.'}), 409
+
+    app = current_app._get_current_object()
+    engine      = app.config.get('PARTY_ENGINE', 'delta')
+    time_budget = app.config.get('PARTY_TIME_BUDGET')
+
+    def work():
+        try:
+            with app.app_context():
+                conn = get_db_connection()
+                try:
+                    result = generate_parties(
+                        conn, role, engine=engine, time_budget=time_budget,
+                        incremental=incremental, use_cache=use_cache,
+                        progress=lambda p: run.publish('progress', p), stop_event=run.stop_event
+                    )
+                finally:
+                    conn.close()
+            final = ('done', {'messages': generation_messages(result),
+                              'stopped_early': result['stats'].get('stopped_early', False)})
+        except Exception as e:
+            final = ('failed', {'message': str(e)})
+        finally:
+            with _STREAM_LOCK:
+                _STREAM_ACTIVE.pop(role, None)
+        run.publish(*final)
+
+    # 브라우저가 연결을 끊어도 생성은 끝까지 진행해 DB 에 저장한다
+    threading.Thread(target=work, name=f'party-stream-{role}', daemon=True).start()
+    return jsonify({'run': run.id}), 202
+
+
+@party_bp.route('/stream/<run_id>')
+def stream_generation(run_id):
+    """
+    이미 시작한 파티 생성의 진행 상황을 server-sent events 로 보낸다 (생성을 시작하지는 않는다).
+      progress: 지금까지의 최선 배치 (iteration, std_dev, score_min, score_max, score_range, elapsed)
+      done:     {'messages': [[category, 메시지], ...], 'stopped_early'} - DB 저장까지 끝난 뒤
+      failed:   {'message'}
+    /party/accept 로 확정을 요청하면 그 시점의 배치를 저장하고 done 을 보낸다.
+    연결이 끊겨 다시 붙으면 가장 최근 이벤트부터 이어서 받는다.
+    """
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    with _STREAM_LOCK:
+        run = _STREAM_RUNS.get(run_id)
+    if run is None:
+        return Response(_sse('failed', {'message': '진행 중인 파티 생성이 없습니다.'}),
+                        mimetype='text/event-stream', headers=headers)
+
+    def stream():
+        seen = 0
+        while True:
+            seen, item = run.wait(seen, STREAM_KEEPALIVE)
+            if item is None:
+                yield ': keep-alive\n\n'
+                continue
+            event, data = item
+            yield _sse(event, data)
+            if event != 'progress':
+                return
+
+    return Response(stream(), mimetype='text/event-stream', headers=headers)
+
+
+@party_bp.route('/accept', methods=['POST'])
+def accept_generation():
+    """진행 중인 파티 생성을 현재까지의 최선 배치로 확정합니다. 시작할 때 받은 실행 id 가 필요합니다."""
+    with _STREAM_LOCK:
+        run = _STREAM_RUNS.get(request.values.get('run', ''))
+    if run is None or run.finished_at is not None:
+        return ('진행 중인 파티 생성이 없습니다.', 404)
+    run.stop_event.set()
+    return ('', 204)
 
 @party_bp.route('/', methods=['GET', 'POST'])
 def list_and_generate():
@@ -95,31 +325,21 @@ def list_and_generate():
 
     if request.method == 'POST' and not request.form.get('complete_action'):
         # POST가 “재생성” 용도일 때만 파티 생성 스크립트 실행
+        # 전체 재생성과 변경분 반영 모두 파티 테이블을 다시 쓰므로 같은 비밀번호를 확인한다
+        if not regen_password_ok(request.form.get('regen_password')):
+            flash("비밀번호가 잘못되었습니다.", "error")
+            return redirect(url_for('party.list_and_generate', role=role))
         try:
-            run_party_generation(role)
-            conn = get_db_connection()
-            buf_cnt = conn.execute(
-                f"SELECT COUNT(*) FROM user_character "
-                f"WHERE use_yn=1 AND isbuffer=1 AND {role}=1"
-            ).fetchone()[0]
-            del_cnt = conn.execute(
-                f"SELECT COUNT(*) FROM user_character "
-                f"WHERE use_yn=1 AND isbuffer=0 AND {role}=1"
-            ).fetchone()[0]
-            party_cnt = conn.execute(
-                "SELECT COUNT(*) FROM party WHERE type = ?",
-                (role,)
-            ).fetchone()[0]
-            conn.close()
-
-            flash(
-                f"버퍼 {buf_cnt}명, 딜러 {del_cnt}명 (총 {buf_cnt + del_cnt}명) → "
-                f"{party_cnt}개 파티 생성 완료",
-                "success"
-            )
+            incremental = request.form.get('mode') == 'incremental'
+            use_cache   = not request.form.get('no_cache')
+            result = run_party_generation(role, incremental=incremental, use_cache=use_cache)
+            for category, msg in generation_messages(result):
+                flash(msg, category)
         except subprocess.CalledProcessError as e:
             err = e.stderr.strip() if e.stderr else str(e)
             flash(f"파티 재생성 중 오류 발생:\n{err}", "error")
+        except Exception as e:
+            flash(f"파티 재생성 중 오류 발생:\n{e}", "error")
 
         return redirect(url_for('party.list_and_generate', role=role))
 
@@ -438,20 +658,20 @@ def swap_members():
         conn.close()
         return ('', 404)  # 또는 에러 처리
     
-    members = []
+    # 파티 점수에 필요한 (점수, 버퍼 여부) 만 꺼낸다
+    pairs = []
     for raw in (rows['buffer'], rows['dealer1'], rows['dealer2'], rows['dealer3']):
         # raw가 None(빈 슬롯)이면 무시
         if raw is not None and raw != 'null' and raw != '':
             try:
                 m = json.loads(raw)
-                m['is_buffer'] = bool(m.get('isbuffer', 0))
-                members.append(m)
+                pairs.append((m['score'], bool(int(m.get('isbuffer', 0)))))
             except Exception as e:
                 # 혹시라도 이상한 데이터 들어오면 무시하고 계속 진행
                 print("멤버 로딩 중 오류:", e)
                 continue
-    # 여기서는 scripts/party_maker_print.py 의 compute_party_score 함수를 import 해서 사용
-    new_score = compute_party_score(members)
+    # scripts/party_maker_print.py 의 party_score (compute_party_score 와 같은 계산)
+    new_score = party_score(pairs)
     conn.execute(
         "UPDATE party SET result = ? WHERE id = ?",
         (new_score, party_id)
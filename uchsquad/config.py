@@ -13,3 +13,17 @@ class Config:
         os.path.join(basedir, 'database', 'DB.sqlite')
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # 파티 생성 설정 (scripts/party_maker_print.py)
+    # PARTY_ENGINE: 편차 줄이기 엔진, PARTY_TIME_BUDGET: 초 단위 시간 상한 (비우면 무제한)
+    # PARTY_ISOLATED=1 이면 예전처럼 별도 파이썬 프로세스에서 생성
+    PARTY_ENGINE = os.environ.get('PARTY_ENGINE', 'delta')
+    PARTY_TIME_BUDGET = float(os.environ['PARTY_TIME_BUDGET']) if os.environ.get('PARTY_TIME_BUDGET') else None
+    PARTY_ISOLATED = os.environ.get('PARTY_ISOLATED', '0') == '1'
+    # 파티 재생성(전체/변경분 반영) 비밀번호. 서버에서 확인한다 (비우면 확인하지 않음)
+    PARTY_REGEN_PASSWORD = os.environ.get('PARTY_REGEN_PASSWORD', '132456')
+
+    # 점수 갱신·자동배치 백그라운드 작업 (jobs.py)
+    # JOB_WORKERS: 프로세스마다 동시에 실행할 작업 수, JOB_TIMEOUT: 작업 하나의 시간 상한(초)
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', '2'))
+    JOB_TIMEOUT = float(os.environ.get('JOB_TIMEOUT', '600'))
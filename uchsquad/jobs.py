@@ -0,0 +1,269 @@
+# jobs.py
+# 점수 갱신·자동배치처럼 오래 걸리는 스크립트를 요청 처리와 분리해 백그라운드에서 실행한다.
+# - 작업은 DB 의 job 테이블에 쌓이므로 gunicorn 워커 프로세스 여러 개가 같은 큐를 본다.
+# - 각 프로세스는 처음 작업을 넣거나 상태를 조회할 때 작업 스레드를 띄운다.
+# - 같은 모험단의 작업은 한 번에 하나만 실행한다 (점수 갱신 중에 자동배치가 돌지 않도록).
+#   같은 종류의 작업이 이미 대기/실행 중이면 새로 넣지 않고 그 작업을 돌려준다.
+
+import datetime
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scripts')
+
+# 작업 종류 → 실행할 스크립트 (인자는 모험단 이름 + 작업별 추가 인자)
+JOB_SCRIPTS = {
+    'update_score': 'update_score.py',
+    'auto_place':   'auto_place.py',
+}
+
+POLL_INTERVAL     = 1.0    # 대기 작업 확인 주기(초)
+PROGRESS_INTERVAL = 0.5    # 진행 상황(마지막 출력 줄) 기록 주기(초)
+RECOVER_INTERVAL  = 60.0   # 멈춘 작업 정리 주기(초)
+
+_workers = []
+_workers_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def _now():
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def ensure_job_schema(conn):
+    conn.execute(
+        '''
+        CREATE TABLE IF NOT EXISTS job (
+            idx         INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind        TEXT NOT NULL,
+            adventure   TEXT NOT NULL,
+            args        TEXT,
+            status      TEXT NOT NULL DEFAULT 'queued',   -- queued / running / done / failed
+            progress    TEXT,
+            lines       INTEGER NOT NULL DEFAULT 0,
+            message     TEXT,
+            created_at  TEXT,
+            started_at  TEXT,
+            finished_at TEXT
+        )
+        '''
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_job_status ON job (status, adventure)")
+
+
+def job_dict(row):
+    return {k: row[k] for k in ('idx', 'kind', 'adventure', 'status', 'progress', 'lines', 'message',
+                                'created_at', 'started_at', 'finished_at')} if row else None
+
+
+def submit(db_path, kind, adventure, args=(), workers=2, timeout=600):
+    """
+    작업을 큐에 넣고 (job dict, 새로 넣었는지) 를 돌려준다.
+    같은 모험단·종류의 작업이 이미 대기/실행 중이면 그 작업을 돌려준다.
+    """
+    if kind not in JOB_SCRIPTS:
+        raise ValueError(f'unknown job kind: {kind}')
+    conn = _connect(db_path)
+    try:
+        ensure_job_schema(conn)
+        # BEGIN IMMEDIATE: 다른 워커 프로세스와 동시에 같은 작업을 넣지 않도록 쓰기 잠금을 먼저 잡는다
+        conn.execute('BEGIN IMMEDIATE')
+        row = conn.execute(
+            "SELECT * FROM job WHERE kind = ? AND adventure = ? AND status IN ('queued', 'running')"
+            " ORDER BY idx LIMIT 1",
+            (kind, adventure)
+        ).fetchone()
+        created = row is None
+        if created:
+            cur = conn.execute(
+                "INSERT INTO job (kind, adventure, args, created_at) VALUES (?, ?, ?, ?)",
+                (kind, adventure, json.dumps(list(args)), _now())
+            )
+            row = conn.execute("SELECT * FROM job WHERE idx = ?", (cur.lastrowid,)).fetchone()
+        conn.commit()
+    finally:
+        conn.close()
+    ensure_workers(db_path, workers, timeout)
+    _wakeup.set()
+    return job_dict(row), created
+
+
+def get_job(db_path, job_idx):
+    conn = _connect(db_path)
+    try:
+        ensure_job_schema(conn)
+        return job_dict(conn.execute("SELECT * FROM job WHERE idx = ?", (job_idx,)).fetchone())
+    finally:
+        conn.close()
+
+
+def active_jobs(db_path, adventure):
+    """모험단의 대기/실행 중 작업 목록 (오래된 순)."""
+    conn = _connect(db_path)
+    try:
+        ensure_job_schema(conn)
+        rows = conn.execute(
+            "SELECT * FROM job WHERE adventure = ? AND status IN ('queued', 'running') ORDER BY idx",
+            (adventure,)
+        ).fetchall()
+        return [job_dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+# 실행 중인 작업이 없는 모험단의 가장 오래된 대기 작업
+CLAIM_SQL = '''
+    SELECT * FROM job q
+     WHERE q.status = 'queued'
+       AND NOT EXISTS (SELECT 1 FROM job r WHERE r.status = 'running' AND r.adventure = q.adventure)
+     ORDER BY q.idx
+     LIMIT 1
+'''
+
+
+def _claim(conn):
+    """실행 중인 작업이 없는 모험단의 가장 오래된 대기 작업을 running 으로 바꿔 가져온다."""
+    # 대기 작업이 없으면 쓰기 잠금 없이 바로 끝낸다 (작업 스레드가 주기적으로 부르므로)
+    if conn.execute(CLAIM_SQL).fetchone() is None:
+        return None
+    conn.execute('BEGIN IMMEDIATE')
+    row = conn.execute(CLAIM_SQL).fetchone()
+    if row is not None:
+        conn.execute("UPDATE job SET status = 'running', started_at = ? WHERE idx = ?", (_now(), row['idx']))
+    conn.commit()
+    return row
+
+
+def _recover(conn, timeout):
+    # 프로세스가 죽어 running 으로 남은 작업은 제한 시간이 지나면 실패로 돌린다
+    cutoff = (datetime.datetime.now() - datetime.timedelta(seconds=timeout)).strftime('%Y-%m-%d %H:%M:%S')
+    stale = "status = 'running' AND started_at < ?"
+    if conn.execute(f"SELECT 1 FROM job WHERE {stale} LIMIT 1", (cutoff,)).fetchone() is None:
+        return
+    with conn:
+        conn.execute(
+            f"UPDATE job SET status = 'failed', message = '작업이 중단되었습니다.', finished_at = ? WHERE {stale}",
+            (_now(), cutoff)
+        )
+
+
+def _finish(conn, job_idx, status, message):
+    with conn:
+        conn.execute(
+            "UPDATE job SET status = ?, message = ?, finished_at = ? WHERE idx = ?",
+            (status, message, _now(), job_idx)
+        )
+
+
+def run_job(db_path, job, timeout):
+    """작업 스크립트를 실행하고 출력 줄을 진행 상황으로 기록한다. (status, message) 반환."""
+    cmd = [sys.executable, os.path.join(SCRIPTS_DIR, JOB_SCRIPTS[job['kind']]), job['adventure']]
+    cmd += json.loads(job['args'] or '[]')
+    conn = _connect(db_path)
+    # 출력을 줄 단위로 바로 받도록 버퍼링을 끈다
+    env = dict(os.environ, PYTHONUNBUFFERED='1')
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                            encoding='utf-8', errors='replace', env=env)
+    # 제한 시간이 지나면 프로세스를 끝낸다 (stdout 이 닫혀 아래 루프도 끝남)
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        proc.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+    lines, last, last_write = 0, '', 0.0
+    try:
+        for line in proc.stdout:
+            line = line.strip()
+            if not line:
+                continue
+            lines, last = lines + 1, line
+            if time.monotonic() - last_write >= PROGRESS_INTERVAL:
+                last_write = time.monotonic()
+                with conn:
+                    conn.execute("UPDATE job SET progress = ?, lines = ? WHERE idx = ?", (last, lines, job['idx']))
+        returncode = proc.wait()
+    finally:
+        timer.cancel()
+        with conn:
+            conn.execute("UPDATE job SET progress = ?, lines = ? WHERE idx = ?", (last, lines, job['idx']))
+        conn.close()
+
+    if timed_out.is_set():
+        return 'failed', f'시간 초과 ({timeout}초)'
+    if returncode != 0:
+        return 'failed', last or f'exit code {returncode}'
+    return 'done', None
+
+
+def _record_last_execute(conn, adventure):
+    with conn:
+        conn.execute(
+            '''
+            INSERT INTO last_execute (command, user, date)
+            VALUES (?, ?, ?)
+            ON CONFLICT(command, user) DO UPDATE SET date=excluded.date
+            ''',
+            ('update_score.py', adventure, _now())
+        )
+
+
+def _worker_loop(db_path, timeout):
+    next_recover = 0.0
+    while True:
+        _wakeup.clear()
+        try:
+            conn = _connect(db_path)
+            try:
+                if time.monotonic() >= next_recover:
+                    next_recover = time.monotonic() + RECOVER_INTERVAL
+                    ensure_job_schema(conn)
+                    _recover(conn, timeout)
+                job = _claim(conn)
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            print(f'job 큐 조회 실패: {e}', file=sys.stderr)
+            job = None
+
+        if job is None:
+            _wakeup.wait(POLL_INTERVAL)
+            continue
+
+        try:
+            status, message = run_job(db_path, job, timeout)
+        except Exception as e:
+            status, message = 'failed', f'{type(e).__name__}: {e}'
+        conn = _connect(db_path)
+        try:
+            if status == 'done' and job['kind'] == 'update_score':
+                _record_last_execute(conn, job['adventure'])
+            _finish(conn, job['idx'], status, message)
+        finally:
+            conn.close()
+        # 같은 모험단의 다음 작업이 기다리고 있을 수 있으니 바로 다시 확인
+        _wakeup.set()
+
+
+def ensure_workers(db_path, count=2, timeout=600):
+    """이 프로세스에 작업 스레드가 없으면 count 개 띄운다."""
+    with _workers_lock:
+        if _workers:
+            return
+        for n in range(max(1, count)):
+            t = threading.Thread(target=_worker_loop, args=(db_path, timeout), name=f'job-worker-{n}', daemon=True)
+            t.start()
+            _workers.append(t)
@@ -0,0 +1,203 @@
+#모험단 이름 → (서버, 캐릭터 key) 조회를 맡는 상주 브라우저 워커
+#!/usr/bin/env python3
+#   python discovery_worker.py [--host 127.0.0.1] [--port 8766] [--pages 3]
+# Chromium 하나와 페이지 몇 개를 띄워 둔 채로 로컬 TCP 소켓에서 요청을 받는다.
+# 프로토콜: 연결마다 JSON 한 줄 {"names": [...]} 을 보내면
+#           JSON 한 줄 {"tuples": [[server, key], ...]} (실패 시 {"error": "..."}) 로 답한다.
+#           {"names": [...], "stream": true} 면 모험단 하나가 끝날 때마다 {"tuples": [...]} 한 줄씩 보내고
+#           마지막에 {"done": true} 를 보낸다.
+# update_score.iter_discovered 가 이 워커를 먼저 찾고, 없으면 scrap_char.py 를 직접 실행한다.
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+
+# 워커 주소 (DISCOVERY_WORKER='' 로 두면 워커를 쓰지 않는다)
+DISCOVERY_ADDR   = os.environ.get('DISCOVERY_WORKER', '127.0.0.1:8766')
+PAGE_POOL_SIZE   = int(os.environ.get('DISCOVERY_PAGES', '3'))
+CONNECT_TIMEOUT  = 1.0     # 워커가 없을 때 빨리 one-shot 으로 넘어가도록 짧게
+LOOKUP_TIMEOUT   = 180.0   # 응답 대기 상한(초)
+
+
+def parse_addr(addr):
+    host, _, port = addr.rpartition(':')
+    return host or '127.0.0.1', int(port)
+
+
+def lookup(names, addr=DISCOVERY_ADDR, timeout=LOOKUP_TIMEOUT):
+    """
+    상주 워커에 모험단 이름 목록을 보내 (server, key) 튜플 목록을 받는다.
+    워커에 연결할 수 없거나 응답이 잘못되면 OSError/ValueError 를 낸다.
+    """
+    if not addr:
+        raise ConnectionRefusedError('discovery worker disabled')
+    with socket.create_connection(parse_addr(addr), timeout=CONNECT_TIMEOUT) as sock:
+        sock.settimeout(timeout)
+        sock.sendall(json.dumps({'names': list(names)}, ensure_ascii=False).encode('utf-8') + b'\n')
+        with sock.makefile('r', encoding='utf-8') as f:
+            reply = json.loads(f.readline() or 'null')
+    if not isinstance(reply, dict) or 'tuples' not in reply:
+        raise ValueError(reply.get('error') if isinstance(reply, dict) else 'empty reply')
+    return [tuple(t) for t in reply['tuples']]
+
+
+def iter_lookup(names, addr=DISCOVERY_ADDR, timeout=LOOKUP_TIMEOUT):
+    """
+    lookup 과 같지만 모험단 하나의 조회가 끝날 때마다 그 튜플을 바로 내준다 (stream 모드).
+    연결할 수 없거나, 응답이 잘못되거나, done 전에 연결이 끊기면 OSError/ValueError 를 낸다.
+    """
+    if not addr:
+        raise ConnectionRefusedError('discovery worker disabled')
+    with socket.create_connection(parse_addr(addr), timeout=CONNECT_TIMEOUT) as sock:
+        sock.settimeout(timeout)
+        request = {'names': list(names), 'stream': True}
+        sock.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b'\n')
+        with sock.makefile('r', encoding='utf-8') as f:
+            for line in f:
+                reply = json.loads(line)
+                if not isinstance(reply, dict):
+                    raise ValueError('bad reply')
+                if reply.get('done'):
+                    return
+                if 'tuples' not in reply:
+                    raise ValueError(reply.get('error', 'bad reply'))
+                for t in reply['tuples']:
+                    yield tuple(t)
+    raise ValueError('connection closed before done')
+
+
+class DiscoveryWorker:
+    """브라우저 하나와 페이지 풀을 유지하며 검색 페이지에서 캐릭터 key 를 읽는다."""
+
+    def __init__(self, pool_size=PAGE_POOL_SIZE):
+        self.pool_size = max(1, pool_size)
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self.pages = None
+        self._restart_lock = asyncio.Lock()
+
+    async def start(self):
+        from playwright.async_api import async_playwright
+        self.playwright = await async_playwright().start()
+        await self._launch()
+
+    async def _launch(self):
+        from scrap_char import BLOCKED_RESOURCES, USER_AGENT
+
+        async def block(route):
+            await route.abort()
+
+        self.browser = await self.playwright.chromium.launch(headless=True)
+        self.context = await self.browser.new_context(user_agent=USER_AGENT)
+        # 차단 규칙은 컨텍스트에 한 번만 걸면 풀의 모든 페이지에 적용된다
+        await self.context.route(BLOCKED_RESOURCES, block)
+        self.pages = asyncio.Queue()
+        for _ in range(self.pool_size):
+            self.pages.put_nowait(await self.context.new_page())
+
+    # 브라우저가 죽었으면 새로 띄운다 (동시에 여러 요청이 감지해도 한 번만)
+    async def _ensure_browser(self):
+        async with self._restart_lock:
+            if self.browser is not None and self.browser.is_connected():
+                return
+            print('브라우저 재시작', file=sys.stderr, flush=True)
+            await self._launch()
+
+    async def stop(self):
+        if self.browser is not None:
+            await self.browser.close()
+        if self.playwright is not None:
+            await self.playwright.stop()
+
+    async def discover(self, user_name):
+        """scrap_char.scrape_detail_urls 와 같은 방식으로 한 모험단의 튜플 목록을 돌려준다."""
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+        from scrap_char import (AVATAR_SELECTOR, GOTO_TIMEOUT, RECORD_DIR, SCON_SELECTOR, SELECTOR_TIMEOUT,
+                                parse_avatar_src, record_search_html, search_url)
+
+        await self._ensure_browser()
+        pages = self.pages
+        page = await pages.get()
+        try:
+            await page.goto(search_url(user_name), wait_until='domcontentloaded', timeout=GOTO_TIMEOUT)
+            await page.wait_for_selector(SCON_SELECTOR, timeout=SELECTOR_TIMEOUT)
+            if RECORD_DIR:
+                record_search_html(user_name, await page.content())
+            tuples = []
+            for scon in await page.query_selector_all(SCON_SELECTOR):
+                img_el = await scon.query_selector(AVATAR_SELECTOR)
+                tup = parse_avatar_src(await img_el.get_attribute('src') if img_el else None)
+                if tup:
+                    tuples.append(tup)
+            return tuples
+        except PlaywrightTimeoutError:
+            return []
+        except Exception:
+            # 페이지가 망가졌을 수 있으니 새 페이지로 바꿔 풀에 돌려준다
+            await page.close()
+            page = None
+            if self.browser.is_connected():
+                pages.put_nowait(await self.context.new_page())
+            raise
+        finally:
+            if page is not None:
+                pages.put_nowait(page)
+
+    async def lookup(self, names):
+        # 이름마다 풀의 페이지를 하나씩 써서 동시에 조회하고, 결과는 요청 순서대로 합친다
+        results = await asyncio.gather(*(self.discover(n) for n in names))
+        return [t for tuples in results for t in tuples]
+
+    async def stream(self, names, writer):
+        # 끝나는 순서대로 모험단별 결과를 한 줄씩 보낸다
+        for done in asyncio.as_completed([self.discover(n) for n in names]):
+            tuples = await done
+            writer.write(json.dumps({'tuples': tuples}, ensure_ascii=False).encode('utf-8') + b'\n')
+            await writer.drain()
+
+    async def handle(self, reader, writer):
+        try:
+            request = json.loads(await reader.readline() or b'null')
+            names = request.get('names') if isinstance(request, dict) else None
+            if not isinstance(names, list):
+                reply = {'error': 'expected {"names": [...]}'}
+            elif request.get('stream'):
+                await self.stream(names, writer)
+                reply = {'done': True}
+            else:
+                reply = {'tuples': await self.lookup(names)}
+        except Exception as e:
+            reply = {'error': f'{type(e).__name__}: {e}'}
+        writer.write(json.dumps(reply, ensure_ascii=False).encode('utf-8') + b'\n')
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(host, port, pool_size=PAGE_POOL_SIZE):
+    worker = DiscoveryWorker(pool_size)
+    await worker.start()
+    server = await asyncio.start_server(worker.handle, host, port)
+    print(f'discovery worker: {host}:{port} (페이지 {worker.pool_size}개)', flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await worker.stop()
+
+
+if __name__ == '__main__':
+    default_host, default_port = parse_addr(DISCOVERY_ADDR or '127.0.0.1:8766')
+    parser = argparse.ArgumentParser(description='Keep a warm Chromium for character discovery lookups')
+    parser.add_argument('--host', default=default_host)
+    parser.add_argument('--port', type=int, default=default_port)
+    parser.add_argument('--pages', type=int, default=PAGE_POOL_SIZE, help='동시에 쓸 페이지 수')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.pages))
+    except KeyboardInterrupt:
+        pass
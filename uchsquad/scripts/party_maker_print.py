@@ -1,46 +1,54 @@
 #!/usr/bin/env python3
 import sys
 import sqlite3
-import pandas as pd
 import os
 import argparse
 import json
 import math
-from collections import Counter
-from typing import List, Optional, Tuple
+import time
+import random
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from typing import Callable, List, Optional, Tuple, Union
 from statistics import stdev
 
 if hasattr(sys.stdout, "reconfigure"):
     sys.stdout.reconfigure(encoding="utf-8")
 
+# 파티 유형 (user_character 의 플래그 컬럼)
+ROLES = ('temple', 'azure', 'venus', 'tmp')
+
+
 # DB에서 캐릭터 불러오기
 def load_characters(db_path, role=None):
     if not os.path.exists(db_path):
         raise FileNotFoundError(f"Database file not found: {db_path}")
     conn = sqlite3.connect(db_path)
+    try:
+        return read_characters(conn, role)
+    finally:
+        conn.close()
 
-    buf_query = '''
-        SELECT adventure, chara_name, job, fame, score, isbuffer, temple, azure, venus, tmp
-        FROM user_character
-        WHERE use_yn = 1
-          AND isbuffer = 1
-    '''
-    if role in ('temple', 'azure', 'venus', 'tmp'):
-        buf_query += f" AND {role} = 1"
-    buf_df = pd.read_sql_query(buf_query, conn)
 
-    del_query = '''
+# 열린 연결에서 버퍼/딜러 레코드(dict) 목록 조회 - 한 번 조회해 isbuffer 로 나눈다
+def read_characters(conn, role=None):
+    query = '''
         SELECT adventure, chara_name, job, fame, score, isbuffer, temple, azure, venus, tmp
         FROM user_character
         WHERE use_yn = 1
-          AND isbuffer = 0
+          AND isbuffer IN (0, 1)
     '''
-    if role in ('temple', 'azure', 'venus', 'tmp'):
-        del_query += f" AND {role} = 1"
-    del_df = pd.read_sql_query(del_query, conn)
+    if role in ROLES:
+        query += f" AND {role} = 1"
+    cur = conn.execute(query)
+    cols = [d[0] for d in cur.description]
 
-    conn.close()
-    return buf_df, del_df
+    buffers, dealers = [], []
+    for row in cur:
+        rec = dict(zip(cols, row))
+        (buffers if rec['isbuffer'] == 1 else dealers).append(rec)
+    return buffers, dealers
 
 # DB 포맷(dict)을 create_parties_alternative용 포맷으로 변환
 def adapt_characters(records):
@@ -56,285 +64,1587 @@ def adapt_characters(records):
     return [adapt_one(r) for r in records]
 
 # 파티 점수 계산
+#   메인 버퍼(최고 점수 버퍼) 점수 / 300만 × 딜러별 (점수 // 1000만) 합
+#   × (1 + 서브 버퍼(두 번째 버퍼) 점수 / 120만 × 8%)
 def compute_party_score(members):
-    buffers = [m for m in members if m['is_buffer']]
-    dealers = [m for m in members if not m['is_buffer']]
-    main_buff = max(buffers, key=lambda x: x['score']) if buffers else None
-    sub_buff = max([b for b in buffers if b != main_buff], key=lambda x: x['score']) if len(buffers) > 1 else None
-
-    buff_factor = (main_buff['score'] / 3_000_000) if main_buff else 1.0
-    dealer_sum = sum(d['score'] // 10_000_000 for d in dealers)
-    sub_buff_factor = 1.0
-    if sub_buff:
-        sub_buff_factor = 1 + (sub_buff['score'] / 1_200_000) * 0.08
+    return party_score((m['score'], m['is_buffer']) for m in members)
+
+
+# 파티 점수 - 단일 파티 (members: (점수, 버퍼 여부) 목록)
+def party_score(pairs):
+    buff_factor, dealer_sum, sub_buff_factor = party_score_parts(pairs)
     return buff_factor * dealer_sum * sub_buff_factor
 
 
-# 파티 배정 함수
-def assign_parties(
-    characters: List[dict]
-) -> Optional[Tuple[List[List[dict]], List[dict], List[float], float, float]]:
-    # 1) 키 정규화
-    for c in characters:
-        if "account" in c and "adventure" not in c:
-            c["adventure"] = c["account"]
-        if "name" in c and "chara_name" not in c:
-            c["chara_name"] = c["name"]
+# 파티 점수 구성요소 (버프 계수, 딜러 합, 서브버퍼 계수). 한 번 훑으며 버퍼 상위 2명과 딜러 합을 구한다
+def party_score_parts(pairs):
+    main = sub = None
+    dealer_sum = 0
+    for score, is_buffer in pairs:
+        if is_buffer:
+            if main is None or score > main:
+                main, sub = score, main
+            elif sub is None or score > sub:
+                sub = score
+        else:
+            dealer_sum += score // 10_000_000
+    buff_factor = (main / 3_000_000) if main is not None else 1.0
+    sub_buff_factor = 1 + (sub / 1_200_000) * 0.08 if sub is not None else 1.0
+    return buff_factor, dealer_sum, sub_buff_factor
+
+
+# 파티 점수 - 여러 파티 일괄 계산 (compositions: 파티마다 (점수, 버퍼 여부) 목록)
+def score_parties(compositions):
+    return [party_score(c) for c in compositions]
+
+
+# 파티 점수 - 배열 일괄 계산 (score/isbuf/valid: P×슬롯 배열, valid 는 멤버가 있는 칸)
+def score_party_arrays(score, isbuf, valid):
+    """
+    party_score 와 같은 연산 순서로 계산하므로 결과가 비트 단위로 같다
+    (점수가 2^53 미만이면 float 배열이어도 같다). 이미 배열로 들고 있는
+    numpy 엔진처럼 파티가 많을 때 쓴다. 길이 P 의 float 배열을 반환한다.
+    """
+    import numpy as np
+
+    buf = valid & isbuf
+    dealer_sum = np.where(valid & ~isbuf, score // 10_000_000, 0).sum(axis=1)
+    nbuf = buf.sum(axis=1)
+    # 버퍼 점수 내림차순 상위 2개 (버퍼가 아닌 칸은 -inf 로 맨 뒤로)
+    ranked = -np.sort(-np.where(buf, score, -np.inf), axis=1)
+    main = ranked[:, 0]
+    sub = ranked[:, 1] if ranked.shape[1] > 1 else main
+    with np.errstate(invalid='ignore'):
+        buff_factor = np.where(nbuf >= 1, main / 3_000_000, 1.0)
+        sub_buff_factor = np.where(nbuf >= 2, 1 + (sub / 1_200_000) * 0.08, 1.0)
+    return buff_factor * dealer_sum * sub_buff_factor
+
+
+# 최적화용 캐릭터 (모험단은 정수 ID, 이름·직업 등 표시용 정보는 Roster 에 따로 보관)
+class Member:
+    __slots__ = ('idx', 'adventure', 'is_buffer', 'score', 'main_buffer')
+
+    def __init__(self, idx, adventure, is_buffer, score):
+        self.idx = idx                # Roster 안에서의 위치
+        self.adventure = adventure    # 모험단 ID (Roster.adventure_names 인덱스)
+        self.is_buffer = is_buffer
+        self.score = score
+        self.main_buffer = False      # assign_parties 에서 메인 버퍼로 지정됐는지
+
+    def __repr__(self):
+        return f"Member({self.idx}, adv={self.adventure}, buf={self.is_buffer}, score={self.score})"
+
+
+# 최적화용 로스터
+class Roster:
+    """
+    캐릭터 정보를 열(column) 단위 리스트로 보관한다.
+    최적화 엔진은 members(Member) 만 다루고, DB 에 저장할 dict 는
+    record(idx) 로 결과를 쓸 때만 다시 만든다.
+    """
+    __slots__ = ('members', 'adventure_names', 'names', 'jobs', 'fames')
+
+    def __init__(self):
+        self.members = []
+        self.adventure_names = []
+        self.names = []
+        self.jobs = []
+        self.fames = []
+
+    # DB 레코드(adventure/chara_name/isbuffer) 또는 adapt_characters 포맷(account/name/is_buffer) 에서 생성
+    @classmethod
+    def from_records(cls, records):
+        roster = cls()
+        adv_ids = {}
+        for r in records:
+            adv = r.get("adventure", r.get("account", ""))
+            adv_id = adv_ids.get(adv)
+            if adv_id is None:
+                adv_id = adv_ids[adv] = len(roster.adventure_names)
+                roster.adventure_names.append(adv)
+            is_buffer = bool(r.get("isbuffer", r.get("is_buffer", False)))
+            roster.members.append(Member(len(roster.members), adv_id, is_buffer, r["score"]))
+            roster.names.append(r.get("chara_name", r.get("name", "")))
+            roster.jobs.append(r.get("job", ""))
+            roster.fames.append(r.get("fame", 0))
+        return roster
+
+    def __len__(self):
+        return len(self.members)
+
+    # idx 캐릭터를 DB 저장용 dict 로 복원
+    def record(self, idx):
+        m = self.members[idx]
+        return {
+            "adventure": self.adventure_names[m.adventure],
+            "chara_name": self.names[idx],
+            "job": self.jobs[idx],
+            "fame": self.fames[idx],
+            "score": m.score,
+            "isbuffer": int(m.is_buffer),
+        }
+
+
+# 편차 줄이기 스왑 최대 반복 횟수
+MAX_SWAP_ROUNDS = 5000
+
+# 증분 분산 비교에서 부동소수 오차로 판단이 애매한 구간 (P*제곱합 대비 상대값)
+DELTA_REL_TOL = 1e-9
+
+
+# '5s', '500ms', '2m', '5' 형식의 시간을 초 단위로 변환
+def parse_duration(text):
+    text = str(text).strip().lower()
+    for suffix, scale in (('ms', 0.001), ('s', 1.0), ('m', 60.0)):
+        if text.endswith(suffix):
+            return float(text[:-len(suffix)]) * scale
+    return float(text)
+
+
+# deadline(time.monotonic 기준)이 지났거나 중단 요청(stop_event)이 왔는지
+def _expired(deadline, stop_event=None):
+    if stop_event is not None and stop_event.is_set():
+        return True
+    return deadline is not None and time.monotonic() >= deadline
+
+
+# 진행 상황 콜백 최소 호출 간격(초). 스왑이 빨라도 이보다 자주 알리지 않는다
+PROGRESS_INTERVAL = 0.25
+
+
+# 엔진이 부르는 progress(반복 횟수, 파티 점수 목록) 를 호출자 콜백 progress(dict) 로 바꾼다
+def _progress_hook(progress, engine, start):
+    """
+    호출자 콜백은 {'engine', 'iteration', 'std_dev', 'score_min', 'score_max',
+    'score_range', 'elapsed'} dict 를 받는다 (elapsed 는 start 부터 초).
+    PROGRESS_INTERVAL 안에 다시 불리면 건너뛰고, force=True 면 항상 알린다.
+    """
+    if progress is None:
+        return None
+    last = [None]
+
+    def hook(iteration, scores, force=False):
+        now = time.monotonic()
+        if not force and last[0] is not None and now - last[0] < PROGRESS_INTERVAL:
+            return
+        last[0] = now
+        lo, hi = min(scores), max(scores)
+        progress({
+            'engine': engine,
+            'iteration': iteration,
+            'std_dev': stdev(scores) if len(scores) > 1 else 0.0,
+            'score_min': lo,
+            'score_max': hi,
+            'score_range': hi - lo,
+            'elapsed': now - start,
+        })
+    return hook
+
+
+# 파티 쌍 (i, j) 사이 스왑을 고려할지: active(파티 인덱스 집합)가 주어지면 한쪽 이상이 active 여야 하고,
+# active 가 max_active 개에 이르면 양쪽 모두 active 여야 한다 (스왑한 파티는 active 에 더해진다)
+def _swap_allowed(active, max_active, i, j):
+    if active is None or (i in active and j in active):
+        return True
+    return (i in active or j in active) and (max_active is None or len(active) < max_active)
+
+
+# 편차 줄이기 스왑 - 기준 구현
+def _reduce_stdev_reference(parties, max_rounds=MAX_SWAP_ROUNDS, deadline=None, stop_event=None,
+                            progress=None, active=None, max_active=None):
+    """
+    후보 스왑마다 파티 점수와 stdev 를 처음부터 다시 계산하는 기존 방식.
+    가장 편차를 많이 줄이는 스왑 하나를 적용하고, 개선이 없거나
+    deadline 이 지나면 멈춘다. active/max_active 가 주어지면 _swap_allowed 를
+    만족하는 파티 쌍만 고려하고, 스왑을 적용한 두 파티를 active 에 더한다.
+    """
+    P = len(parties)
+    for rnd in range(max_rounds):
+        scores = [_party_score(p['members']) for p in parties]
+        if progress is not None and rnd:
+            progress(rnd, scores)
+        curr_std = stdev(scores) if len(scores) > 1 else 0.0
+        best_swap = None
+        for i in range(P):
+            if _expired(deadline, stop_event):
+                return
+            for j in range(i+1, P):
+                if not _swap_allowed(active, max_active, i, j):
+                    continue
+                for m1 in parties[i]['members']:
+                    for m2 in parties[j]['members']:
+                        adv_i = {m.adventure for m in parties[i]['members'] if m is not m1}
+                        adv_j = {m.adventure for m in parties[j]['members'] if m is not m2}
+                        buf_i = (sum(m.is_buffer for m in parties[i]['members'])
+                                 - m1.is_buffer + m2.is_buffer)
+                        buf_j = (sum(m.is_buffer for m in parties[j]['members'])
+                                 - m2.is_buffer + m1.is_buffer)
+                        # 제약: 모험단 중복 없고, 버퍼 1~2명 유지
+                        if (m2.adventure in adv_i or m1.adventure in adv_j or
+                            buf_i < 1 or buf_i > 2 or buf_j < 1 or buf_j > 2):
+                            continue
+                        new_i = [m2 if m is m1 else m for m in parties[i]['members']]
+                        new_j = [m1 if m is m2 else m for m in parties[j]['members']]
+                        s_i = _party_score(new_i)
+                        s_j = _party_score(new_j)
+                        cand = scores.copy()
+                        cand[i], cand[j] = s_i, s_j
+                        new_std = stdev(cand) if len(cand) > 1 else 0.0
+                        if new_std < curr_std:
+                            curr_std, best_swap = new_std, (i, j, m1, m2)
+        if not best_swap:
+            break
+        i, j, m1, m2 = best_swap
+        parties[i]['members'].remove(m1); parties[i]['members'].append(m2)
+        parties[j]['members'].remove(m2); parties[j]['members'].append(m1)
+        parties[i]['adventures'] = {m.adventure for m in parties[i]['members']}
+        parties[j]['adventures'] = {m.adventure for m in parties[j]['members']}
+        if active is not None:
+            active.update((i, j))
+
+
+# Member 목록의 파티 점수 구성요소 (party_score_parts 와 같은 계산)
+def _score_parts(members):
+    return party_score_parts((m.score, m.is_buffer) for m in members)
+
+
+# Member 목록의 파티 점수 (compute_party_score 와 같은 값)
+def _party_score(members):
+    return party_score((m.score, m.is_buffer) for m in members)
+
+
+# 편차 줄이기 스왑 - 증분 계산
+def _reduce_stdev_delta(parties, max_rounds=MAX_SWAP_ROUNDS, deadline=None, stop_event=None,
+                        progress=None, active=None, max_active=None):
+    """
+    _reduce_stdev_reference 와 같은 스왑을 고르는 증분 버전.
+
+    점수 합/제곱합, 파티별 모험단 카운트·버퍼 수·점수 구성요소를 유지해
+    후보 스왑 하나를 O(1)로 평가한다. 분산은 P*제곱합 - 합^2 의 변화량으로
+    비교하고, 부동소수 오차 범위 안에서 판단이 애매한 경우에만
+    statistics.stdev 로 다시 비교해 기준 구현과 동일한 결과를 보장한다.
+    deadline 이 지나거나 stop_event 가 설정되면 진행 중인 반복을 버리고 멈춘다.
+    progress(반복 횟수, 파티 점수 목록) 는 스왑을 하나 적용할 때마다 불린다.
+    active/max_active 는 기준 구현과 같다.
+    """
+    P = len(parties)
+    if P < 2:
+        return
+
+    members = [p['members'] for p in parties]
+    scores = [_party_score(ms) for ms in members]
+    parts = [_score_parts(ms) for ms in members]
+    buf_counts = [sum(m.is_buffer for m in ms) for ms in members]
+    adv_counts = [Counter(m.adventure for m in ms) for ms in members]
+
+    for rnd in range(max_rounds):
+        if progress is not None and rnd:
+            progress(rnd, scores)
+        total = sum(scores)
+        total_sq = sum(s * s for s in scores)
+        tol = DELTA_REL_TOL * P * total_sq
+        two_total = 2 * total
+
+        # 현재 상태(key=0)보다 확실히 작아야 채택. best_std 는 필요할 때만 계산
+        best_key = 0.0
+        best_std = stdev(scores)
+        best_swap = None
+        best_scores = None
+
+        for i in range(P):
+            if _expired(deadline, stop_event):
+                return
+            mi, si, bi, ai = members[i], scores[i], buf_counts[i], adv_counts[i]
+            bf_i, ds_i, sf_i = parts[i]
+            for j in range(i+1, P):
+                if not _swap_allowed(active, max_active, i, j):
+                    continue
+                mj, sj, bj, aj = members[j], scores[j], buf_counts[j], adv_counts[j]
+                bf_j, ds_j, sf_j = parts[j]
+                for m1 in mi:
+                    a1, b1 = m1.adventure, m1.is_buffer
+                    for m2 in mj:
+                        a2, b2 = m2.adventure, m2.is_buffer
+                        # 제약: 모험단 중복 없고, 버퍼 1~2명 유지
+                        if (ai[a2] - (a1 == a2) > 0 or aj[a1] - (a1 == a2) > 0):
+                            continue
+                        d = b2 - b1
+                        if bi + d < 1 or bi + d > 2 or bj - d < 1 or bj - d > 2:
+                            continue
+
+                        if not b1 and not b2:
+                            # 딜러끼리: 딜러 합만 바뀌므로 계수를 재사용
+                            q1 = m1.score // 10_000_000
+                            q2 = m2.score // 10_000_000
+                            if q1 == q2:
+                                continue
+                            s_i = bf_i * (ds_i - q1 + q2) * sf_i
+                            s_j = bf_j * (ds_j - q2 + q1) * sf_j
+                        else:
+                            s_i = _party_score([m2 if m is m1 else m for m in mi])
+                            s_j = _party_score([m1 if m is m2 else m for m in mj])
+
+                        # 점수 구성이 그대로면 편차도 그대로 → 개선 아님
+                        if (s_i == si and s_j == sj) or (s_i == sj and s_j == si):
+                            continue
+
+                        d_sum = s_i + s_j - si - sj
+                        d_sq = s_i * s_i + s_j * s_j - si * si - sj * sj
+                        key = P * d_sq - d_sum * (two_total + d_sum)
+
+                        if key > best_key + tol:
+                            continue
+                        if key < best_key - tol:
+                            best_key, best_std = key, None
+                        else:
+                            # 애매한 경우: 기준 구현과 같은 방식으로 정확히 비교
+                            cand = scores.copy()
+                            cand[i], cand[j] = s_i, s_j
+                            new_std = stdev(cand)
+                            if best_std is None:
+                                prev = scores.copy()
+                                bi_, bj_, bsi, bsj = best_scores
+                                prev[bi_], prev[bj_] = bsi, bsj
+                                best_std = stdev(prev)
+                            if not new_std < best_std:
+                                continue
+                            best_key, best_std = key, new_std
+                        best_swap = (i, j, m1, m2)
+                        best_scores = (i, j, s_i, s_j)
+
+        if not best_swap:
+            break
+        i, j, m1, m2 = best_swap
+        parties[i]['members'].remove(m1); parties[i]['members'].append(m2)
+        parties[j]['members'].remove(m2); parties[j]['members'].append(m1)
+        parties[i]['adventures'] = {m.adventure for m in parties[i]['members']}
+        parties[j]['adventures'] = {m.adventure for m in parties[j]['members']}
+        if active is not None:
+            active.update((i, j))
+        for k in (i, j):
+            scores[k] = _party_score(members[k])
+            parts[k] = _score_parts(members[k])
+            buf_counts[k] = sum(m.is_buffer for m in members[k])
+            adv_counts[k] = Counter(m.adventure for m in members[k])
+
+
+# 한 번에 평가할 후보 스왑 배열 원소 수 상한 (메모리 사용량 제한)
+NUMPY_BLOCK_ELEMENTS = 1 << 20
+
+
+# 파티 목록을 P×4 고정 배열(점수, 버퍼 여부, 모험단 ID, 유효 슬롯)로 변환
+def _party_arrays(np, members):
+    P = len(members)
+    score = np.zeros((P, 4))
+    isbuf = np.zeros((P, 4), dtype=bool)
+    adv = np.full((P, 4), -1, dtype=np.int64)
+    valid = np.zeros((P, 4), dtype=bool)
+    for p, ms in enumerate(members):
+        for k, m in enumerate(ms):
+            score[p, k] = m.score
+            isbuf[p, k] = bool(m.is_buffer)
+            adv[p, k] = m.adventure
+            valid[p, k] = True
+    return score, isbuf, adv, valid
+
+
+# rows 파티의 슬롯 s 를 cols 파티의 슬롯 t 멤버로 바꿨을 때의 점수와 가능 여부
+def _replacement_scores(np, arrays, rows, cols):
+    """
+    반환값은 (len(rows), 4, len(cols), 4) 배열 두 개:
+    new[p, s, q, t] = 파티 p 에서 슬롯 s 를 빼고 (q, t) 멤버를 넣었을 때의 점수,
+    ok[p, s, q, t]  = 그 교체가 모험단 중복/버퍼 1~2명 제약을 만족하는지.
+    점수는 compute_party_score 와 같은 연산 순서로 계산한다.
+    """
+    score, isbuf, adv, valid = arrays
+    s, b, v = score[rows], isbuf[rows], valid[rows]
+
+    # 슬롯 하나를 뺀 나머지 구성: 딜러 합, 버퍼 수, 버퍼 점수 상위 2개
+    q = np.where(v & ~b, s // 10_000_000, 0)
+    rest_dealer = q.sum(axis=1)[:, None] - q
+    buf = v & b
+    rest_nbuf = buf.sum(axis=1)[:, None] - buf
+    bscore = np.where(buf, s, -np.inf)
+    others = np.where(np.eye(4, dtype=bool)[None], -np.inf, bscore[:, None, :])
+    others.sort(axis=2)
+    top1 = others[:, :, -1][:, :, None, None]
+    top2 = others[:, :, -2][:, :, None, None]
+
+    # 들어오는 멤버
+    xs = score[cols][None, None]
+    xb = isbuf[cols][None, None]
+    xq = np.where(xb, 0, xs // 10_000_000)
+
+    nbuf = rest_nbuf[:, :, None, None] + xb
+    main = np.where(xb, np.maximum(top1, xs), top1)
+    sub = np.where(xb, np.maximum(np.minimum(top1, xs), top2), top2)
+    dealer_sum = rest_dealer[:, :, None, None] + xq
+    buff_factor = np.where(nbuf >= 1, main / 3_000_000, 1.0)
+    sub_buff_factor = np.where(nbuf >= 2, 1 + (sub / 1_200_000) * 0.08, 1.0)
+    new = buff_factor * dealer_sum * sub_buff_factor
+
+    # 모험단 중복: 나가는 슬롯을 제외한 나머지에 같은 모험단이 있으면 불가
+    same = (adv[rows][:, :, None, None] == adv[cols][None, None]) & v[:, :, None, None]
+    conflict = same.sum(axis=1)[:, None] - same > 0
+    ok = (~conflict & (nbuf >= 1) & (nbuf <= 2)
+          & v[:, :, None, None] & valid[cols][None, None])
+    return new, ok
+
+
+# 편차 줄이기 스왑 - NumPy 일괄 평가
+def _reduce_stdev_numpy(parties, max_rounds=MAX_SWAP_ROUNDS, deadline=None, stop_event=None,
+                        progress=None, active=None, max_active=None):
+    """
+    파티를 P×4 배열로 두고, 한 반복마다 모든 (i, j, m1, m2) 후보 스왑의
+    새 파티 점수·제약 만족 여부·분산 변화량을 배열 연산 한 번으로 계산한다.
+    최소값이 같은 후보는 기준 구현과 같은 (i, j, m1, m2) 순서로 고르지만,
+    분산 비교가 부동소수 기반이라 거의 같은 후보 사이에서는
+    기준 구현(_reduce_stdev_reference)과 다른 스왑을 고를 수 있다.
+    active/max_active 는 기준 구현과 같다.
+    """
+    import numpy as np
+
+    P = len(parties)
+    if P < 2:
+        return
+
+    members = [p['members'] for p in parties]
+    every = np.arange(P)
+    block = max(1, NUMPY_BLOCK_ELEMENTS // (16 * P))
+
+    for rnd in range(max_rounds):
+        arrays = _party_arrays(np, members)
+        scores = score_party_arrays(arrays[0], arrays[1], arrays[3])
+        if progress is not None and rnd:
+            progress(rnd, scores.tolist())
+        total = scores.sum()
+        tol = DELTA_REL_TOL * P * float((scores * scores).sum())
+        # _swap_allowed 를 파티 쌍 마스크로
+        in_active = np.zeros(P, dtype=bool)
+        if active is None:
+            in_active[:] = True
+        else:
+            in_active[list(active)] = True
+        both = active is None or (max_active is not None and len(active) >= max_active)
+
+        best_key, best_swap = -tol, None
+        for lo in range(0, P - 1, block):
+            if _expired(deadline, stop_event):
+                return
+            rows = every[lo:lo + block]
+            new_i, ok_i = _replacement_scores(np, arrays, rows, every)
+            new_j, ok_j = _replacement_scores(np, arrays, every, rows)
+            new_j = new_j.transpose(2, 3, 0, 1)
+            ok_j = ok_j.transpose(2, 3, 0, 1)
+
+            s_i = scores[rows][:, None, None, None]
+            s_j = scores[None, None, :, None]
+            d_sum = new_i + new_j - s_i - s_j
+            d_sq = new_i * new_i + new_j * new_j - s_i * s_i - s_j * s_j
+            key = P * d_sq - d_sum * (2 * total + d_sum)
+            upper = every[None, None, :, None] > rows[:, None, None, None]
+            if both:
+                upper &= in_active[rows][:, None, None, None] & in_active[None, None, :, None]
+            else:
+                upper &= in_active[rows][:, None, None, None] | in_active[None, None, :, None]
+            key = np.where(ok_i & ok_j & upper, key, np.inf)
+
+            # (i, a, j, b) → (i, j, a, b): 기준 구현의 탐색 순서로 동점 처리
+            key = key.transpose(0, 2, 1, 3)
+            flat = int(np.argmin(key))
+            if key.flat[flat] < best_key:
+                i, j, a, b = np.unravel_index(flat, key.shape)
+                best_key = key.flat[flat]
+                best_swap = (int(rows[i]), int(j), int(a), int(b))
+
+        if not best_swap:
+            break
+        i, j, a, b = best_swap
+        m1, m2 = members[i][a], members[j][b]
+        parties[i]['members'].remove(m1); parties[i]['members'].append(m2)
+        parties[j]['members'].remove(m2); parties[j]['members'].append(m1)
+        parties[i]['adventures'] = {m.adventure for m in parties[i]['members']}
+        parties[j]['adventures'] = {m.adventure for m in parties[j]['members']}
+        if active is not None:
+            active.update((i, j))
+
+
+# 시뮬레이티드 어닐링 설정
+ANNEAL_DEFAULT_BUDGET = 5.0   # time_budget 미지정 시 시간 예산(초)
+ANNEAL_T_START = 0.05         # 시작 온도 (시작 시점 분산 대비)
+ANNEAL_T_END = 1e-6           # 마지막 온도 (시작 온도 대비)
+ANNEAL_CHECK_EVERY = 256      # 시간/온도 갱신 주기 (시도 횟수)
+
+
+# 편차 줄이기 스왑 - 시간 예산 시뮬레이티드 어닐링
+def _reduce_stdev_anneal(parties, max_rounds=MAX_SWAP_ROUNDS, deadline=None, seed=None, stop_event=None,
+                         progress=None):
+    """
+    delta 엔진으로 지역 최적해까지 내려간 뒤, 남은 시간 동안 같은 제약의
+    무작위 1:1 스왑으로 시뮬레이티드 어닐링을 돌리고 가장 좋았던 배치를 남긴다.
+    시작점이 greedy 결과이므로 편차는 greedy 보다 나빠지지 않고,
+    deadline 이 지나면 바로 멈춘다. 같은 seed 면 같은 순서로 탐색한다.
+    progress 는 delta 단계에서는 스왑마다, 어닐링 단계에서는 최선 배치가 갱신될 때마다 불린다.
+    """
+    if deadline is None:
+        deadline = time.monotonic() + ANNEAL_DEFAULT_BUDGET
+    _reduce_stdev_delta(parties, max_rounds=max_rounds, deadline=deadline, stop_event=stop_event,
+                        progress=progress)
+
+    P = len(parties)
+    start = time.monotonic()
+    if P < 2 or _expired(deadline, stop_event):
+        return
+    span = deadline - start
+    rng = random.Random(seed)
+
+    members = [p['members'] for p in parties]
+    scores = [_party_score(ms) for ms in members]
+    buf_counts = [sum(m.is_buffer for m in ms) for ms in members]
+    adv_counts = [Counter(m.adventure for m in ms) for ms in members]
+
+    norm = P * (P - 1)
+    best_std = stdev(scores)
+    best_var = best_std * best_std
+    best = [list(ms) for ms in members]
+    t0 = max(best_var, 1.0) * ANNEAL_T_START
+    temp = t0
+
+    tries = 0
+    while True:
+        if tries % ANNEAL_CHECK_EVERY == 0:
+            now = time.monotonic()
+            if now >= deadline or (stop_event is not None and stop_event.is_set()):
+                break
+            temp = t0 * ANNEAL_T_END ** ((now - start) / span)
+            # 누적 오차 방지를 위해 합/제곱합을 주기적으로 다시 계산
+            total = sum(scores)
+            total_sq = sum(s * s for s in scores)
+        tries += 1
+
+        i = rng.randrange(P)
+        j = rng.randrange(P - 1)
+        if j >= i:
+            j += 1
+        mi, mj = members[i], members[j]
+        k1, k2 = rng.randrange(len(mi)), rng.randrange(len(mj))
+        m1, m2 = mi[k1], mj[k2]
+        a1, a2 = m1.adventure, m2.adventure
+        if adv_counts[i][a2] - (a1 == a2) > 0 or adv_counts[j][a1] - (a1 == a2) > 0:
+            continue
+        d = m2.is_buffer - m1.is_buffer
+        if not (1 <= buf_counts[i] + d <= 2 and 1 <= buf_counts[j] - d <= 2):
+            continue
+
+        new_i = mi[:k1] + [m2] + mi[k1+1:]
+        new_j = mj[:k2] + [m1] + mj[k2+1:]
+        s_i, s_j = _party_score(new_i), _party_score(new_j)
+        d_sum = s_i + s_j - scores[i] - scores[j]
+        d_sq = s_i * s_i + s_j * s_j - scores[i] ** 2 - scores[j] ** 2
+        d_var = (P * d_sq - d_sum * (2 * total + d_sum)) / norm
+        if d_var > 0 and rng.random() >= math.exp(-d_var / temp):
+            continue
+
+        # 스왑 적용
+        mi[k1], mj[k2] = m2, m1
+        scores[i], scores[j] = s_i, s_j
+        buf_counts[i] += d
+        buf_counts[j] -= d
+        adv_counts[i][a1] -= 1; adv_counts[i][a2] += 1
+        adv_counts[j][a2] -= 1; adv_counts[j][a1] += 1
+        total += d_sum
+        total_sq += d_sq
+
+        if d_var < 0 and (P * total_sq - total * total) / norm < best_var:
+            curr_std = stdev(scores)
+            if curr_std < best_std:
+                best_std, best_var = curr_std, curr_std * curr_std
+                best = [list(ms) for ms in members]
+                if progress is not None:
+                    progress(tries, scores)
 
+    for p, ms in zip(parties, best):
+        p['members'][:] = ms
+        p['adventures'] = {m.adventure for m in ms}
+
+
+# 병렬 멀티스타트 설정
+PARALLEL_PERTURB_SWAPS = 2    # 시작점 교란 스왑 수 (파티 수 배수)
+
+# 워커 프로세스 전역 상태 (_parallel_init 에서 한 번만 채움)
+_WORKER_STATE = {}
+
+
+# 파티 배치에 무작위 1:1 스왑을 적용해 시작점을 교란 (제약은 그대로 유지)
+def _perturb(parties, rng, swaps):
+    P = len(parties)
+    if P < 2:
+        return
+    for _ in range(swaps * 10):
+        if swaps <= 0:
+            break
+        i, j = rng.sample(range(P), 2)
+        mi, mj = parties[i]['members'], parties[j]['members']
+        k1, k2 = rng.randrange(len(mi)), rng.randrange(len(mj))
+        m1, m2 = mi[k1], mj[k2]
+        rest_i = {m.adventure for m in mi if m is not m1}
+        rest_j = {m.adventure for m in mj if m is not m2}
+        d = m2.is_buffer - m1.is_buffer
+        buf_i = sum(m.is_buffer for m in mi) + d
+        buf_j = sum(m.is_buffer for m in mj) - d
+        if (m2.adventure in rest_i or m1.adventure in rest_j
+                or not 1 <= buf_i <= 2 or not 1 <= buf_j <= 2):
+            continue
+        mi[k1], mj[k2] = m2, m1
+        parties[i]['adventures'] = {m.adventure for m in mi}
+        parties[j]['adventures'] = {m.adventure for m in mj}
+        swaps -= 1
+
+
+# 워커 초기화: 로스터와 시작 배치를 압축된 형태로 한 번만 받는다
+def _parallel_init(roster, layout, deadline_wall, stop_event):
+    """
+    roster: 캐릭터별 (모험단 ID, 버퍼 여부, 점수) 튜플
+    layout: 파티별 로스터 인덱스 튜플 (시작 배치)
+    deadline_wall: time.time() 기준 마감 시각 (None 이면 무제한)
+    """
+    _WORKER_STATE.update(
+        roster=roster, layout=layout,
+        deadline_wall=deadline_wall, stop_event=stop_event,
+    )
+
+
+# 워커 작업: seed 로 시작 배치를 교란한 뒤 delta 엔진으로 지역 최적화
+def _parallel_search(seed, max_rounds):
+    state = _WORKER_STATE
+    chars = [Member(k, adv, isbuf, score) for k, (adv, isbuf, score) in enumerate(state['roster'])]
+    parties = [
+        {'members': [chars[k] for k in ks], 'adventures': {chars[k].adventure for k in ks}}
+        for ks in state['layout']
+    ]
+    deadline = None
+    if state['deadline_wall'] is not None:
+        deadline = time.monotonic() + (state['deadline_wall'] - time.time())
+
+    # seed 0 은 교란 없이 greedy 그대로 출발
+    if seed:
+        _perturb(parties, random.Random(seed), PARALLEL_PERTURB_SWAPS * len(parties))
+    _reduce_stdev_delta(parties, max_rounds=max_rounds, deadline=deadline,
+                        stop_event=state['stop_event'])
+
+    scores = [_party_score(p['members']) for p in parties]
+    std = stdev(scores) if len(scores) > 1 else 0.0
+    return std, [[m.idx for m in p['members']] for p in parties]
+
+
+# 편차 줄이기 스왑 - 프로세스 풀 병렬 멀티스타트
+def _reduce_stdev_parallel(parties, max_rounds=MAX_SWAP_ROUNDS, deadline=None, seed=None,
+                           workers=None, starts=None, target_std=None, stop_event=None, progress=None):
+    """
+    시작 배치를 서로 다른 seed 로 교란한 독립 탐색 starts 개를
+    ProcessPoolExecutor 로 돌려 stdev 가 가장 작은 결과를 남긴다.
+    캐릭터 데이터는 워커 초기화 때 (모험단 ID, 버퍼 여부, 점수) 튜플로 한 번만 넘기고,
+    작업마다는 seed 만 보낸다. 시작 배치가 이미 target_std 이하면 탐색하지 않는다.
+    target_std 이하 결과가 나오거나 deadline 이 지나면 남은 작업을 취소하고
+    실행 중인 탐색에도 중단을 알린다 (stop_event 가 설정돼도 같다).
+    progress(끝난 탐색 수, 최선 배치의 파티 점수 목록) 는 최선 결과가 갱신될 때마다 불린다.
+    """
+    # 프로세스 풀은 이 엔진에서만 쓰므로 웹 워커 기동 시 불러오지 않도록 여기서 import
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+    P = len(parties)
+    if P < 2:
+        return
+    workers = workers or os.cpu_count() or 1
+    starts = starts or workers * 2
+    base_seed = seed or 0
+
+    chars = [m for p in parties for m in p['members']]
+    index = {id(m): k for k, m in enumerate(chars)}
+    roster = tuple((m.adventure, m.is_buffer, m.score) for m in chars)
+    layout = tuple(tuple(index[id(m)] for m in p['members']) for p in parties)
+    deadline_wall = time.time() + (deadline - time.monotonic()) if deadline is not None else None
+
+    # 시간 안에 끝난 탐색이 없어도 시작 배치보다 나빠지지 않도록 기준으로 둔다
+    start_scores = [_party_score(p['members']) for p in parties]
+    best_std, best_layout = stdev(start_scores), None
+    # 시작 배치가 이미 목표 이하면 프로세스 풀을 띄우지 않고 그대로 둔다
+    if target_std is not None and best_std <= target_std:
+        return
+
+    cancel = multiprocessing.Event()
+    finished = 0
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_parallel_init,
+        initargs=(roster, layout, deadline_wall, cancel),
+    ) as pool:
+        pending = {
+            pool.submit(_parallel_search, base_seed + k, max_rounds)
+            for k in range(starts)
+        }
+        while pending:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            if stop_event is not None:
+                # 외부 중단 요청을 놓치지 않도록 주기적으로 깨어난다
+                timeout = PROGRESS_INTERVAL if timeout is None else min(timeout, PROGRESS_INTERVAL)
+            done, pending = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.cancelled() or fut.exception() is not None:
+                    continue
+                finished += 1
+                std, result = fut.result()
+                if std < best_std:
+                    best_std, best_layout = std, result
+                    if progress is not None:
+                        progress(finished, [_party_score([chars[k] for k in ks]) for ks in result])
+            reached = target_std is not None and best_std <= target_std
+            if reached or _expired(deadline, stop_event):
+                # 대기 중인 작업은 취소, 실행 중인 탐색은 현재 결과를 반환하고 끝냄
+                cancel.set()
+                for fut in pending:
+                    fut.cancel()
+        pool.shutdown(wait=True, cancel_futures=True)
+        for fut in pending:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                std, result = fut.result()
+                if std < best_std:
+                    best_std, best_layout = std, result
+
+    if best_layout is None:
+        return
+    for p, ks in zip(parties, best_layout):
+        p['members'][:] = [chars[k] for k in ks]
+        p['adventures'] = {m.adventure for m in p['members']}
+
+
+# 편차 줄이기 스왑 엔진
+SWAP_ENGINES = {
+    'reference': _reduce_stdev_reference,
+    'delta':     _reduce_stdev_delta,
+    'numpy':     _reduce_stdev_numpy,
+    'anneal':    _reduce_stdev_anneal,
+    'parallel':  _reduce_stdev_parallel,
+}
+
+# seed 를 받는 (무작위 탐색) 엔진
+RANDOMIZED_ENGINES = {'anneal', 'parallel'}
+
+
+# assign_parties 에서 고를 수 있는 전체 엔진 (exact 는 스왑 대신 정확해 탐색)
+ENGINES = sorted(SWAP_ENGINES) + ['exact']
+
+
+# 정확해(분기 한정) 설정
+EXACT_MAX_CHARACTERS = 40     # 이보다 큰 로스터는 exact 엔진에서 delta 로 대신 처리
+EXACT_NODE_LIMIT = 2_000_000  # 탐색 노드 상한
+EXACT_CHECK_EVERY = 1024      # 시간 확인 주기 (노드 수)
+
+
+# 각 값이 [lo, hi] 구간 안에 있을 때 가능한 최소 편차제곱합 (= min_m Σ dist(m, 구간)^2)
+def _interval_ss_lower_bound(bounds):
+    points = sorted({v for lo, hi in bounds for v in (lo, hi)})
+    best = None
+    for a, b in zip(points, points[1:] + [points[-1]]):
+        # m ∈ [a, b] 에서 m 보다 위에 있는 구간(lo ≥ b)과 아래 구간(hi ≤ a)만 거리에 기여
+        above = [lo for lo, hi in bounds if lo >= b]
+        below = [hi for lo, hi in bounds if hi <= a]
+        n = len(above) + len(below)
+        if n == 0:
+            return 0.0
+        m = min(max((sum(above) + sum(below)) / n, a), b)
+        ss = sum((lo - m) ** 2 for lo in above) + sum((m - hi) ** 2 for hi in below)
+        best = ss if best is None else min(best, ss)
+    return best or 0.0
+
+
+# 값 x_k ∈ [lo, hi] 이고 Σ w_k x_k ≥ target 일 때 가능한 최소 편차제곱합의 하한 (라그랑주 쌍대)
+def _relaxed_ss_lower_bound(bounds, weights, target, cutoff=math.inf, iterations=50):
+    """
+    g(λ) = λ·target + min_m Σ_k min_{x∈[lo,hi]} ((x - m)^2 - λ w_k x) 는 λ ≥ 0 이면 항상 하한이고
+    λ 에 대해 오목하므로 삼분 탐색으로 키운다. λ = 0 이면 _interval_ss_lower_bound 와 같다.
+    cutoff 이상임이 확인되면 더 키우지 않고 그 값을 돌려준다.
+    """
+    def g(lam):
+        a = [lam * w / 2 for w in weights]
+        # x_k = clip(m + a_k, lo, hi) 가 바뀌는 m 의 경계로 나눈 구간마다 m 에 대한 2차식을 최소화
+        points = sorted({v for (lo, hi), ak in zip(bounds, a) for v in (lo - ak, hi - ak)})
+        edges = [-math.inf] + points + [math.inf]
+        best = math.inf
+        for s, e in zip(edges, edges[1:]):
+            probe = e - 1 if s == -math.inf else (s + 1 if e == math.inf else (s + e) / 2)
+            A = B = 0.0
+            for (lo, hi), ak in zip(bounds, a):
+                if probe <= lo - ak:
+                    A, B = A + 1, B - 2 * lo
+                elif probe >= hi - ak:
+                    A, B = A + 1, B - 2 * hi
+                else:
+                    B -= 2 * ak
+            m = -B / (2 * A) if A else (s if B > 0 else e)
+            m = min(max(m, s), e)
+            if math.isinf(m):
+                continue
+            value = 0.0
+            for (lo, hi), ak in zip(bounds, a):
+                x = min(max(m + ak, lo), hi)
+                value += (x - m) ** 2 - 2 * ak * x
+            best = min(best, value)
+        return lam * target + best
+
+    found = max(g(0.0), 0.0)
+    # 하한 구간 끝에서 이미 제약을 만족하면 λ 를 키워도 나아지지 않는다
+    if found >= cutoff or sum(w * lo for (lo, _), w in zip(bounds, weights)) >= target:
+        return found
+    # λ 가 이 값을 넘으면 모든 x 가 상한에 붙으므로 더 볼 필요가 없다
+    span = max(hi for _, hi in bounds) - min(lo for lo, _ in bounds)
+    lo_lam, hi_lam = 0.0, 2 * (span + 1) / min(weights)
+    for _ in range(iterations):
+        m1 = lo_lam + (hi_lam - lo_lam) / 3
+        m2 = hi_lam - (hi_lam - lo_lam) / 3
+        g1, g2 = g(m1), g(m2)
+        found = max(found, g1, g2)
+        if found >= cutoff:
+            break
+        if g1 < g2:
+            lo_lam = m1
+        else:
+            hi_lam = m2
+    return found
+
+
+# 작은 로스터용 정확해
+def solve_exact(roster, node_limit=EXACT_NODE_LIMIT, deadline=None):
+    """
+    assign_parties 와 같은 제약(파티당 모험단 중복 없음, 버퍼 1~2명, 최대 4명)으로
+    파티 점수 stdev 를 최소화하는 배치를 분기 한정으로 찾는다.
+
+    - 파티 수는 assign_parties 와 같고, 휴리스틱(delta) 결과보다 적게 배치하지 않는다.
+    - 버퍼(점수 내림차순) → 딜러(점수 내림차순) 순서로 파티에 넣거나 남기며,
+      빈 파티는 항상 첫 번째 빈 파티만 열어 파티 순서 대칭을 없앤다.
+    - 버퍼를 모두 넣은 뒤에는 딜러가 들어올수록 점수가 커지므로, 파티별 점수 구간
+      [현재 점수, 남은 딜러 상위 합을 더한 점수] 로 부분해의 stdev 하한을 구해 가지친다.
+
+    node_limit/deadline 에 걸리면 지금까지의 최선해와 함께, 펼치지 못한 부분 트리마다 구한 하한
+    (frontier_bound: 파티별 점수 구간 + 남은 딜러를 거의 다 배치해야 한다는 합 제약의 완화 문제)
+    중 가장 작은 값을 lower_bound 로 돌려준다. 탐색 중인 조상 노드의 하한은 쓰지 않는다.
+    반환: parties, leftover (Member 목록), scores, score_range, std_dev,
+          optimal, lower_bound, gap, nodes, heuristic_std
+    """
+    # 휴리스틱 결과를 초기 상한으로 사용
+    time_budget = max(0.0, deadline - time.monotonic()) if deadline is not None else None
+    h_parties, h_leftover, _, _, h_std = assign_parties(roster, engine='delta', time_budget=time_budget)
+    best = {
+        'parties': [list(p) for p in h_parties],
+        'std': h_std,
+    }
+    characters = roster.members
+    result = {'nodes': 0, 'heuristic_std': h_std}
+
+    P = len(h_parties)
     total = len(characters)
-    buffers = [c for c in characters if c['is_buffer']]
-    dealers = [c for c in characters if not c['is_buffer']]
+    need = total - len(h_leftover)
+    budget = total - need
+    bufs = sorted((c for c in characters if c.is_buffer), key=lambda c: c.score, reverse=True)
+    dlrs = sorted((c for c in characters if not c.is_buffer), key=lambda c: c.score, reverse=True)
+    order = bufs + dlrs
+    nb = len(bufs)
+    # 남은 딜러 상위 k명 합 계산용 누적합 (딜러는 점수 내림차순이므로 앞쪽이 최대)
+    q = [0] * nb + [d.score // 10_000_000 for d in dlrs]
+    prefix = [0]
+    for v in q:
+        prefix.append(prefix[-1] + v)
 
-    # ----- 각 모험단별 전체 캐릭터 수 계산 -----
-    adv_counts = Counter(c['adventure'] for c in characters)
+    members = [[] for _ in range(P)]
+    advs = [set() for _ in range(P)]
+    nbuf = [0] * P
+    # 딜러 단계의 파티 점수 구성요소 (버퍼가 모두 배치된 뒤에는 딜러 합만 바뀐다)
+    bf, ds, sf = [1.0] * P, [0] * P, [1.0] * P
+    open_bounds = []
+    aborted = False
 
-    # 2) 파티 수 결정 (buffer×1+, dealer×3, total×4 기준 floor)
-    P = min(len(buffers), total // 4)
-    if P == 0:
-        # 파티 없음 → 모두 leftover
-        return [], characters[:], [], 0.0, 0.0
+    def node_bound(pos):
+        # 버퍼 배치 중에는 점수가 단조롭지 않아 하한을 두지 않는다
+        if pos < nb or P < 2:
+            return 0.0
+        bounds = []
+        for k in range(P):
+            top = min(4 - len(members[k]), len(q) - pos)
+            bounds.append((bf[k] * ds[k] * sf[k],
+                           bf[k] * (ds[k] + prefix[pos + top] - prefix[pos]) * sf[k]))
+        # 모든 구간이 한 점에서 겹치면 하한 0
+        if max(lo for lo, _ in bounds) <= min(hi for _, hi in bounds):
+            return 0.0
+        return math.sqrt(_interval_ss_lower_bound(bounds) / (P - 1))
 
-    # 3) 파티 초기화
-    parties = [{'members': [], 'adventures': set()} for _ in range(P)]
-    leftover = []
+    def frontier_bound(pos, opened, left_budget):
+        """현재 상태에서 pos 번째 캐릭터부터 펼칠 부분 트리 전체의 stdev 하한 (불가능하면 inf)."""
+        if pos < nb:
+            if nb - pos < P - opened:
+                return math.inf
+        elif opened < P:
+            return math.inf
+        if len(order) - pos - left_budget > sum(4 - len(ms) for ms in members):
+            return math.inf
+        if P < 2:
+            return 0.0
+        # 남은 딜러(점수 내림차순) 중 최대 left_budget 명만 빠질 수 있다
+        d0 = max(pos, nb)
+        must_place = prefix[-1] - prefix[min(d0 + left_budget, len(q))]
+        top_buf = bufs[pos].score if pos < nb else 0
+        bounds, weights, target = [], [], must_place
+        for k in range(P):
+            ds_cur = sum(m.score // 10_000_000 for m in members[k] if not m.is_buffer)
+            slots = 4 - len(members[k])
+            if nbuf[k] == 0:
+                # 메인 버퍼는 남은 버퍼 중 하나, 서브 버퍼는 그보다 높지 않다
+                slots -= 1
+                lo_c = bufs[-1].score / 3_000_000
+                hi_c = top_buf / 3_000_000 * (1 + (top_buf / 1_200_000) * 0.08)
+            else:
+                bf_k, _, sf_k = _score_parts(members[k])
+                lo_c = hi_c = bf_k * sf_k
+                if nbuf[k] == 1 and pos < nb:
+                    hi_c = bf_k * (1 + (top_buf / 1_200_000) * 0.08)
+            ds_max = ds_cur + prefix[min(d0 + max(slots, 0), len(q))] - prefix[d0]
+            bounds.append((lo_c * ds_cur, hi_c * ds_max))
+            weights.append(1 / lo_c if lo_c > 0 else 0.0)
+            target += ds_cur
+        if min(weights) <= 0:
+            ss = _interval_ss_lower_bound(bounds)
+        else:
+            # 파티 점수 = c_k·딜러합 (c_k ≥ lo_c) 이므로 Σ 점수/lo_c ≥ 배치될 딜러합
+            if sum(w * hi for (_, hi), w in zip(bounds, weights)) < target * (1 - 1e-9):
+                return math.inf
+            cutoff = min(open_bounds + [best['std']]) ** 2 * (P - 1)
+            ss = _relaxed_ss_lower_bound(bounds, weights, target, cutoff)
+        return math.sqrt(ss / (P - 1))
 
-    # 4) 버퍼 1명씩 Round-Robin 배치 (모험단 인원수 우선 + score 순)
-    buffs_sorted = sorted(
-        buffers,
-        key=lambda c: (adv_counts[c['adventure']], c['score']),
-        reverse=True
+    def search(pos, opened, left_budget):
+        nonlocal aborted
+        result['nodes'] += 1
+        if result['nodes'] % EXACT_CHECK_EVERY == 0 and (
+                result['nodes'] >= node_limit or _expired(deadline)):
+            aborted = True
+        if aborted:
+            open_bounds.append(frontier_bound(pos, opened, left_budget))
+            return
+        bound = node_bound(pos)
+        if bound >= best['std']:
+            return
+
+        if pos == len(order):
+            scores = [_party_score(ms) for ms in members]
+            std = stdev(scores) if P > 1 else 0.0
+            if std < best['std']:
+                best['std'] = std
+                best['parties'] = [list(ms) for ms in members]
+            return
+
+        if pos < nb:
+            # 아직 열리지 않은 파티마다 버퍼가 최소 1명은 남아 있어야 한다
+            if nb - pos < P - opened:
+                return
+        else:
+            if opened < P:
+                return
+            if pos == nb:
+                for k in range(P):
+                    bf[k], ds[k], sf[k] = _score_parts(members[k])
+            # 남은 빈 자리로 최소 배치 인원을 채울 수 없으면 불가
+            if len(order) - pos - left_budget > sum(4 - len(ms) for ms in members):
+                return
+
+        c = order[pos]
+        # 버퍼는 이미 열린 파티 또는 첫 번째 빈 파티, 딜러는 열린 파티에만
+        if c.is_buffer:
+            cands = [
+                k for k in range(min(opened + 1, P))
+                if len(members[k]) < 4 and c.adventure not in advs[k] and nbuf[k] < 2
+            ]
+        else:
+            cands = [
+                k for k in range(P)
+                if len(members[k]) < 4 and c.adventure not in advs[k]
+            ]
+            # 약한 파티부터 시도하면 좋은 해를 빨리 찾는다
+            cands.sort(key=lambda k: bf[k] * ds[k] * sf[k])
+        add = 0 if c.is_buffer else q[pos]
+        for i, k in enumerate(cands):
+            members[k].append(c)
+            advs[k].add(c.adventure)
+            nbuf[k] += c.is_buffer
+            ds[k] += add
+            search(pos + 1, max(opened, k + 1), left_budget)
+            ds[k] -= add
+            nbuf[k] -= c.is_buffer
+            advs[k].discard(c.adventure)
+            members[k].pop()
+            if aborted:
+                # 중단되면 아직 펼치지 않은 형제 부분 트리의 하한만 남긴다
+                for k2 in cands[i + 1:]:
+                    members[k2].append(c)
+                    nbuf[k2] += c.is_buffer
+                    open_bounds.append(frontier_bound(pos + 1, max(opened, k2 + 1), left_budget))
+                    nbuf[k2] -= c.is_buffer
+                    members[k2].pop()
+                if left_budget > 0:
+                    open_bounds.append(frontier_bound(pos + 1, opened, left_budget - 1))
+                return
+        if left_budget > 0:
+            search(pos + 1, opened, left_budget - 1)
+
+    if P > 0:
+        search(0, 0, budget)
+
+    placed = {id(m) for ms in best['parties'] for m in ms}
+    scores = [_party_score(ms) for ms in best['parties']]
+    lower = min(open_bounds + [best['std']]) if aborted else best['std']
+    result.update(
+        parties=best['parties'],
+        leftover=[c for c in characters if id(c) not in placed],
+        scores=scores,
+        score_range=(max(scores) - min(scores)) if scores else 0.0,
+        std_dev=best['std'],
+        optimal=not aborted,
+        lower_bound=lower,
+        gap=best['std'] - lower,
     )
-    # mark main buffers
-    for buf in buffs_sorted:
-        buf['_is_main_buffer'] = False
-    for i, buf in enumerate(buffs_sorted[:P]):
-        buf['_is_main_buffer'] = True
-        parties[i]['members'].append(buf)
-        parties[i]['adventures'].add(buf['adventure'])
-    leftover_bufs = buffs_sorted[P:]
+    return result
+
+
+# 단계별 소요 시간 누적 (phases 가 None 이면 기록하지 않음). 다음 구간 시작 시각을 반환
+def _lap(phases, name, start):
+    now = time.perf_counter()
+    if phases is not None:
+        phases[name] = phases.get(name, 0.0) + (now - start)
+    return now
+
+
+# 남은 캐릭터를 배치하지 못한 이유
+LEFTOVER_REASONS = {
+    'no_open_slot':       '빈 자리가 있는 파티가 없음',
+    'adventure_conflict': '빈 자리가 있는 파티마다 같은 모험단 캐릭터가 있음',
+    'buffer_limit':       '빈 자리가 있는 파티마다 버퍼가 이미 2명',
+    'no_swap_chain':      '다른 파티 멤버를 옮겨도 자리를 만들 수 없음',
+}
 
-    # mark sub-buffers
-    for buf in leftover_bufs:
-        buf['_is_main_buffer'] = False
+
+# 파티 배정 6.5) 단계: 남은 캐릭터를 빈 자리에 넣는 증가 경로(augmenting path) 탐색
+def _place_leftovers(parties, leftovers, reasons=None):
+    """
+    남은 캐릭터 c 마다 "c 를 파티 q 에 넣고 q 의 멤버 y 를 내보내고,
+    y 를 다른 파티에 넣고 ..." 를 이어 가다 빈 자리가 있는 파티에서 끝나는 경로를
+    BFS 로 찾는다 (최대 유량의 증가 경로와 같은 방식). 모험단 중복 없음,
+    파티당 버퍼 1~2명 제약을 지키고, 메인 버퍼는 옮기지 않는다.
+
+    이동하는 캐릭터는 (모험단, 버퍼 여부) 가 같으면 어느 파티에 들어갈 수 있는지가
+    같으므로 이 쌍을 BFS 상태로 쓴다. 따라서 한 번 탐색은
+    O(모험단 수 × 파티 수 × 4) 이고, 같은 경로 안에서 한 파티는 한 번만 거친다.
+    실패한 상태는 배치가 바뀔 때까지 다시 탐색하지 않는다.
+
+    배치하지 못한 캐릭터 목록을 반환하고, reasons(dict) 에 idx → LEFTOVER_REASONS 키를 채운다.
+    """
+    nbuf = [sum(m.is_buffer for m in p['members']) for p in parties]
+    P = len(parties)
+
+    # key(모험단, 버퍼 여부) 캐릭터를 파티 k 에 바로 넣을 수 있는지
+    def fits(k, adv, isbuf):
+        p = parties[k]
+        return (len(p['members']) < 4 and adv not in p['adventures']
+                and (not isbuf or nbuf[k] < 2))
+
+    def find_path(c):
+        start = (c.adventure, c.is_buffer)
+        # came[key] = (이전 key, 파티, 내보낸 멤버) ; 경로의 파티 집합
+        came = {start: None}
+        used = {start: frozenset()}
+        queue = [start]
+        for key in queue:
+            adv, isbuf = key
+            on_path = used[key]
+            for k in range(P):
+                if k not in on_path and fits(k, adv, isbuf):
+                    return key, k, came
+            for k in range(P):
+                if k in on_path:
+                    continue
+                p = parties[k]
+                for y in p['members']:
+                    if y.main_buffer:
+                        continue
+                    nxt = (y.adventure, y.is_buffer)
+                    if nxt in came:
+                        continue
+                    # y 를 빼고 key 캐릭터를 넣었을 때 모험단 중복/버퍼 수 확인
+                    if adv in p['adventures'] and adv != y.adventure:
+                        continue
+                    if isbuf and nbuf[k] - y.is_buffer + 1 > 2:
+                        continue
+                    came[nxt] = (key, k, y)
+                    used[nxt] = on_path | {k}
+                    queue.append(nxt)
+        return None
+
+    def move_in(k, m):
+        parties[k]['members'].append(m)
+        parties[k]['adventures'].add(m.adventure)
+        nbuf[k] += m.is_buffer
+
+    def move_out(k, m):
+        parties[k]['members'].remove(m)
+        parties[k]['adventures'].discard(m.adventure)
+        nbuf[k] -= m.is_buffer
+
+    def reason(c):
+        open_parties = [k for k in range(P) if len(parties[k]['members']) < 4]
+        if not open_parties:
+            return 'no_open_slot'
+        free_adv = [k for k in open_parties if c.adventure not in parties[k]['adventures']]
+        if not free_adv:
+            return 'adventure_conflict'
+        if c.is_buffer and all(nbuf[k] >= 2 for k in free_adv):
+            return 'buffer_limit'
+        return 'no_swap_chain'
+
+    unplaced = []
+    failed = set()
+    open_slots = sum(4 - len(p['members']) for p in parties)
+    for c in leftovers:
+        key = (c.adventure, c.is_buffer)
+        found = None if key in failed or open_slots == 0 else find_path(c)
+        if found is None:
+            failed.add(key)
+            unplaced.append(c)
+            continue
+        # 경로 끝(빈 자리)부터 거꾸로 적용: 마지막 이동 캐릭터를 빈 자리에 넣고,
+        # 각 파티에서 내보낸 멤버 자리에 앞 단계 캐릭터를 넣는다
+        last, k, came = found
+        hops = []
+        while came[last] is not None:
+            prev, q, y = came[last]
+            hops.append((q, y))
+            last = prev
+        traveller = c
+        for q, y in reversed(hops):
+            move_out(q, y)
+            move_in(q, traveller)
+            traveller = y
+        move_in(k, traveller)
+        open_slots -= 1
+        # 배치가 바뀌었으므로 실패 기록 초기화
+        failed.clear()
+
+    if reasons is not None:
+        for c in unplaced:
+            reasons[c.idx] = reason(c)
+    return unplaced
+
+
+# 파티 배정 5) ~ 6.5) 단계: 딜러와 남은 버퍼를 빈 자리에 배치하고 못 넣은 캐릭터를 반환
+def _fill_parties(parties, dealers, leftover_bufs, adv_counts, phases=None, reasons=None):
+    t = time.perf_counter()
+    leftover = []
 
     # 5) 딜러 배치 (모험단 인원수 우선 + score 순)
-    # ensure dealers marked as non-main buffers
-    for d in dealers:
-        d['_is_main_buffer'] = False
     dlrs_sorted = sorted(
         dealers,
-        key=lambda c: (adv_counts[c['adventure']], c['score']),
+        key=lambda c: (adv_counts[c.adventure], c.score),
         reverse=True
     )
+    # 이 단계에서는 딜러만 들어오므로 파티별 (버프 계수, 딜러 합, 서브버퍼 계수) 를
+    # 한 번 구해 두고 딜러 합만 갱신한다 (후보마다 멤버 리스트를 새로 만들지 않음)
+    parts = [list(_score_parts(p['members'])) for p in parties]
     for dlr in dlrs_sorted:
-        cands = [p for p in parties
+        q = dlr.score // 10_000_000
+        cands = [k for k, p in enumerate(parties)
                  if len(p['members']) < 4
-                    and dlr['adventure'] not in p['adventures']]
+                    and dlr.adventure not in p['adventures']]
         if not cands:
             leftover.append(dlr)
             continue
         best = min(
             cands,
-            key=lambda p: (
-                len(p['members']),
-                compute_party_score(p['members'] + [dlr])
+            key=lambda k: (
+                len(parties[k]['members']),
+                parts[k][0] * (parts[k][1] + q) * parts[k][2]
             )
         )
-        best['members'].append(dlr)
-        best['adventures'].add(dlr['adventure'])
+        parties[best]['members'].append(dlr)
+        parties[best]['adventures'].add(dlr.adventure)
+        parts[best][1] += q
+
+    t = _lap(phases, 'dealers', t)
 
     # 6) 남은 슬롯에 버퍼 추가 (파티당 최대 2명)
     for p in parties:
         if len(p['members']) < 4:
             for buf in list(leftover_bufs):
-                if (buf['adventure'] not in p['adventures'] and
-                    sum(m['is_buffer'] for m in p['members']) < 2):
+                if (buf.adventure not in p['adventures'] and
+                    sum(m.is_buffer for m in p['members']) < 2):
                     p['members'].append(buf)
-                    p['adventures'].add(buf['adventure'])
+                    p['adventures'].add(buf.adventure)
                     leftover_bufs.remove(buf)
                     break
     # combine leftovers
     all_leftovers = leftover + leftover_bufs
     leftover = []
 
-    # helper for swap eligibility
-    def can_swap(c, m):
-        # main-buffer swaps only with main-buffer
-        if c['is_buffer'] and c.get('_is_main_buffer', False):
-            return m['is_buffer'] and m.get('_is_main_buffer', False)
-        # dealer can swap with dealer or sub-buffer
-        if not c['is_buffer']:
-            return (not m['is_buffer']) or (m['is_buffer'] and not m.get('_is_main_buffer', False))
-        # sub-buffer swaps only with dealer
-        if c['is_buffer'] and not c.get('_is_main_buffer', False):
-            return not m['is_buffer']
-        return False
-
-    # 6.5) 남은 캐릭터를 빈 슬롯에 빈틈 없도록 swap 시도
-    for c in list(all_leftovers):
-        placed = False
-        for p in parties:
-            if len(p['members']) >= 4:
-                continue
-            # 1) 직접 삽입 시도
-            if (c['adventure'] not in p['adventures'] and
-                (not c['is_buffer'] or sum(m['is_buffer'] for m in p['members']) < 2)):
-                p['members'].append(c)
-                p['adventures'].add(c['adventure'])
-                all_leftovers.remove(c)
-                placed = True
-                break
-            # 2) swap 시도
-            for q in parties:
-                if q is p:
-                    continue
-                # c가 q에 들어갈 수 있어야 함
-                if c['adventure'] in q['adventures']:
-                    continue
-                # q로부터 m 선택
-                for m in list(q['members']):
-                    # m은 p에 들어갈 수 있어야 함
-                    if m['adventure'] in p['adventures']:
-                        continue
-                    # 타입 제약
-                    if not can_swap(c, m):
-                        continue
-                    # 버퍼 수 제약
-                    buf_p = sum(mm['is_buffer'] for mm in p['members']) + m['is_buffer']
-                    buf_q = sum(mm['is_buffer'] for mm in q['members']) - m['is_buffer'] + c['is_buffer']
-                    if buf_p < 1 or buf_p > 2 or buf_q < 1 or buf_q > 2:
-                        continue
-                    # swap 수행
-                    q['members'].remove(m)
-                    q['adventures'].remove(m['adventure'])
-                    p['members'].append(m)
-                    p['adventures'].add(m['adventure'])
-                    q['members'].append(c)
-                    q['adventures'].add(c['adventure'])
-                    all_leftovers.remove(c)
-                    placed = True
-                    break
-                if placed:
-                    break
-            if placed:
-                break
-        if not placed:
-            leftover.append(c)
+    t = _lap(phases, 'sub_buffers', t)
+
+    # 6.5) 남은 캐릭터를 빈 슬롯에 배치 (필요하면 다른 파티 멤버를 연쇄로 옮김)
+    leftover = _place_leftovers(parties, all_leftovers, reasons)
+    _lap(phases, 'leftover_swap', t)
+    return leftover
 
-    # 7) 편차 줄이기 스왑 (최대 5000회)
-    for _ in range(5000):
-        scores = [compute_party_score(p['members']) for p in parties]
-        curr_std = stdev(scores) if len(scores) > 1 else 0.0
-        best_swap = None
-        for i in range(P):
-            for j in range(i+1, P):
-                for m1 in parties[i]['members']:
-                    for m2 in parties[j]['members']:
-                        adv_i = {m['adventure'] for m in parties[i]['members'] if m is not m1}
-                        adv_j = {m['adventure'] for m in parties[j]['members'] if m is not m2}
-                        buf_i = (sum(m['is_buffer'] for m in parties[i]['members'])
-                                 - m1['is_buffer'] + m2['is_buffer'])
-                        buf_j = (sum(m['is_buffer'] for m in parties[j]['members'])
-                                 - m2['is_buffer'] + m1['is_buffer'])
-                        # 제약: 모험단 중복 없고, 버퍼 1~2명 유지
-                        if (m2['adventure'] in adv_i or m1['adventure'] in adv_j or
-                            buf_i < 1 or buf_i > 2 or buf_j < 1 or buf_j > 2):
-                            continue
-                        new_i = [m2 if m is m1 else m for m in parties[i]['members']]
-                        new_j = [m1 if m is m2 else m for m in parties[j]['members']]
-                        s_i = compute_party_score(new_i)
-                        s_j = compute_party_score(new_j)
-                        cand = scores.copy()
-                        cand[i], cand[j] = s_i, s_j
-                        new_std = stdev(cand) if len(cand) > 1 else 0.0
-                        if new_std < curr_std:
-                            curr_std, best_swap = new_std, (i, j, m1, m2)
-        if not best_swap:
-            break
-        i, j, m1, m2 = best_swap
-        parties[i]['members'].remove(m1); parties[i]['members'].append(m2)
-        parties[j]['members'].remove(m2); parties[j]['members'].append(m1)
-        parties[i]['adventures'] = {m['adventure'] for m in parties[i]['members']}
-        parties[j]['adventures'] = {m['adventure'] for m in parties[j]['members']}
+
+# 파티 배정 7) ~ 8) 단계: 편차 줄이기 스왑 후 (파티, leftover, 점수, 범위, 편차) 반환
+def _finish_parties(parties, leftover, engine, max_rounds, deadline, seed=None, engine_options=None,
+                    phases=None, progress=None, stop_event=None, active=None, max_active=None):
+    t = time.perf_counter()
+    # 7) 편차 줄이기 스왑 (최대 max_rounds 회, deadline 또는 stop_event 까지)
+    options = {'max_rounds': max_rounds, 'deadline': deadline, 'stop_event': stop_event}
+    if engine in RANDOMIZED_ENGINES:
+        options['seed'] = seed
+    # 스왑 대상 파티 제한 (증분 재최적화, _swap_allowed 참고)
+    if active is not None:
+        options['active'] = active
+        options['max_active'] = max_active
+    # 엔진별 추가 설정 (예: parallel 의 workers/starts/target_std)
+    options.update(engine_options or {})
+    hook = _progress_hook(progress, engine, time.monotonic())
+    if hook is not None and parties:
+        # 스왑 전 greedy 배치도 바로 쓸 수 있는 결과이므로 먼저 알린다
+        hook(0, [_party_score(p['members']) for p in parties], force=True)
+        options['progress'] = hook
+    SWAP_ENGINES[engine](parties, **options)
+    t = _lap(phases, 'swap', t)
 
     # 8) 최종 통계 계산 및 반환
-    final_scores = [compute_party_score(p['members']) for p in parties]
+    final_scores = score_parties([[(m.score, m.is_buffer) for m in p['members']] for p in parties])
     score_range = max(final_scores) - min(final_scores)
     std_dev = stdev(final_scores) if len(final_scores) > 1 else 0.0
     party_lists = [p['members'] for p in parties]
+    _lap(phases, 'stats', t)
 
     return party_lists, leftover, final_scores, score_range, std_dev
 
 
+# 파티 배정 함수
+def assign_parties(
+    characters: Union[Roster, List[dict]],
+    engine: str = 'delta',
+    max_rounds: int = MAX_SWAP_ROUNDS,
+    time_budget: Optional[float] = None,
+    seed: Optional[int] = None,
+    engine_options: Optional[dict] = None,
+    stats: Optional[dict] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Optional[Tuple[List[List[dict]], List[dict], List[float], float, float]]:
+    """
+    characters 가 Roster 면 결과 파티/leftover 를 Member 로,
+    dict 목록(adapt_characters 포맷)이면 넘겨받은 dict 그대로 돌려준다.
+    넘겨받은 dict 는 수정하지 않는다.
+
+    progress 를 주면 편차 줄이기 중 지금까지의 최선 배치 통계를 dict 로 넘겨 받는다
+    (_progress_hook 참고). stop_event 가 설정되면 그 시점의 배치로 바로 마무리한다.
+    exact 엔진은 둘 다 쓰지 않는다.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if not isinstance(characters, Roster):
+        parties, leftover, scores, score_range, std_dev = assign_parties(
+            Roster.from_records(characters), engine=engine, max_rounds=max_rounds,
+            time_budget=time_budget, seed=seed, engine_options=engine_options, stats=stats,
+            progress=progress, stop_event=stop_event
+        )
+        return ([[characters[m.idx] for m in p] for p in parties],
+                [characters[m.idx] for m in leftover], scores, score_range, std_dev)
+    roster = characters
+    # time_budget(초)는 호출 시점부터 편차 줄이기 스왑까지 포함한 전체 시간 상한
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+
+    # exact: 작은 로스터는 분기 한정 정확해, 큰 로스터는 delta 로 대신 처리
+    if engine == 'exact':
+        if len(characters) > EXACT_MAX_CHARACTERS:
+            if stats is not None:
+                stats['exact_skipped'] = True
+            return assign_parties(characters, engine='delta', max_rounds=max_rounds,
+                                  time_budget=time_budget, stats=stats,
+                                  progress=progress, stop_event=stop_event)
+        result = solve_exact(roster, deadline=deadline, **(engine_options or {}))
+        if stats is not None:
+            stats.update({k: result[k] for k in
+                          ('optimal', 'lower_bound', 'gap', 'nodes', 'heuristic_std')})
+        return (result['parties'], result['leftover'], result['scores'],
+                result['score_range'], result['std_dev'])
+
+    # 단계별 소요 시간(초)은 stats['phases'], 배치하지 못한 이유는 stats['unplaced_reasons'] 에 기록
+    phases = stats.setdefault('phases', {}) if stats is not None else None
+    t = time.perf_counter()
+
+    # 1) Member 목록 (모험단은 정수 ID)
+    characters = roster.members
+    for c in characters:
+        c.main_buffer = False
+
+    total = len(characters)
+    buffers = [c for c in characters if c.is_buffer]
+    dealers = [c for c in characters if not c.is_buffer]
+
+    # ----- 각 모험단별 전체 캐릭터 수 계산 -----
+    adv_counts = Counter(c.adventure for c in characters)
+
+    # 2) 파티 수 결정 (buffer×1+, dealer×3, total×4 기준 floor)
+    P = min(len(buffers), total // 4)
+    if P == 0:
+        # 파티 없음 → 모두 leftover
+        return [], characters[:], [], 0.0, 0.0
+
+    # 3) 파티 초기화
+    parties = [{'members': [], 'adventures': set()} for _ in range(P)]
+
+    # 4) 버퍼 1명씩 Round-Robin 배치 (모험단 인원수 우선 + score 순)
+    buffs_sorted = sorted(
+        buffers,
+        key=lambda c: (adv_counts[c.adventure], c.score),
+        reverse=True
+    )
+    # mark main buffers
+    for i, buf in enumerate(buffs_sorted[:P]):
+        buf.main_buffer = True
+        parties[i]['members'].append(buf)
+        parties[i]['adventures'].add(buf.adventure)
+    leftover_bufs = buffs_sorted[P:]
+    _lap(phases, 'main_buffers', t)
+
+    # 5) ~ 6.5) 딜러·남은 버퍼 배치
+    reasons = stats.setdefault('unplaced_reasons', {}) if stats is not None else None
+    leftover = _fill_parties(parties, dealers, leftover_bufs, adv_counts, phases, reasons)
+
+    # 7) ~ 8) 편차 줄이기 스왑 후 통계
+    return _finish_parties(parties, leftover, engine, max_rounds, deadline, seed, engine_options, phases,
+                           progress, stop_event)
+
+
+# 증분 재최적화에서 편차 줄이기 스왑 반복 상한 (기존 배치를 크게 흔들지 않도록)
+INCREMENTAL_SWAP_ROUNDS = 20
+# 증분 재최적화에서 변경분이 닿은 파티 외에 스왑으로 바뀔 수 있는 파티 수 상한
+INCREMENTAL_SWAP_PARTNERS = 4
+
+
+# 기존 배치에서 출발하는 증분 파티 배정
+def reassign_parties(
+    roster: Roster,
+    layout: List[List[dict]],
+    engine: str = 'delta',
+    max_rounds: int = INCREMENTAL_SWAP_ROUNDS,
+    time_budget: Optional[float] = None,
+    seed: Optional[int] = None,
+    engine_options: Optional[dict] = None,
+    stats: Optional[dict] = None,
+    progress: Optional[Callable[[dict], None]] = None,
+    stop_event: Optional[threading.Event] = None,
+) -> Tuple[List[List[Member]], List[Member], List[float], float, float]:
+    """
+    layout(기존 party 행마다 {'adventure', 'chara_name', 'score'} 목록)을 시작 배치로 삼아
+    로스터 변경분만 반영한다.
+
+    - 로스터에서 빠진 캐릭터는 파티에서 제거하고, 새 캐릭터·기존 미배정 캐릭터는 빈 자리에 넣는다.
+    - 버퍼가 없어진 파티는 해체해 멤버를 다시 배치하고,
+      파티 수가 assign_parties 기준보다 적으면 남은 버퍼로 새 파티를 연다.
+    - 이후 편차 줄이기 스왑을 max_rounds 회까지만 돌리되, 변경분이 닿은 파티
+      (멤버가 빠지거나 들어왔거나 점수가 바뀐 파티, 새로 연 파티)나 이미 스왑한 파티가
+      한쪽에 끼는 스왑만 고른다. 그 밖의 파티는 INCREMENTAL_SWAP_PARTNERS 개까지만 끌어들이므로
+      바뀌는 파티 수는 닿은 파티 수 + INCREMENTAL_SWAP_PARTNERS 를 넘지 않는다.
+      변경분이 없으면 배치를 그대로 둔다.
+
+    layout 이 비어 있으면 assign_parties 로 처음부터 배정한다. exact 엔진은 처음부터
+    푸는 방식이고 anneal/parallel 은 배치 전체를 다시 섞으므로, 기존 배치가 있을 때는
+    delta 로 대신 처리한다.
+    stats 에는 warm_start 여부와 kept(기존 파티 유지)/added(기존 파티 밖, 미배정 포함)/
+    removed(로스터에서 빠짐)/rescored(점수 변경) 인원, dissolved(해체)/touched(변경분이 닿은)
+    파티 수를 채운다.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if not layout:
+        if stats is not None:
+            stats['warm_start'] = False
+        return assign_parties(roster, engine=engine, time_budget=time_budget, seed=seed,
+                              engine_options=engine_options, stats=stats,
+                              progress=progress, stop_event=stop_event)
+    if engine == 'exact' or engine in RANDOMIZED_ENGINES:
+        engine, engine_options = 'delta', None
+    deadline = time.monotonic() + time_budget if time_budget is not None else None
+    phases = stats.setdefault('phases', {}) if stats is not None else None
+    t = time.perf_counter()
+
+    characters = roster.members
+    index = {(roster.adventure_names[m.adventure], roster.names[m.idx]): m for m in characters}
+    for c in characters:
+        c.main_buffer = False
+
+    # 1) 기존 파티 복원 (빠진 캐릭터 제거, 제약을 깨는 멤버는 다시 배치 대상으로)
+    placed = set()
+    parties = []
+    loose = []
+    removed = rescored = dissolved = 0
+    # origin: 파티별 복원 직후 멤버 idx 집합 (변경분이 이미 닿은 파티는 None)
+    origin = []
+    for rows in layout:
+        party = {'members': [], 'adventures': set()}
+        changed = False
+        for row in rows:
+            m = index.get((row['adventure'], row['chara_name']))
+            if m is None or m.idx in placed:
+                removed += 1
+                changed = True
+                continue
+            placed.add(m.idx)
+            if m.score != row['score']:
+                rescored += 1
+                changed = True
+            nbuf = sum(mm.is_buffer for mm in party['members'])
+            if (m.adventure in party['adventures'] or len(party['members']) >= 4
+                    or (m.is_buffer and nbuf >= 2)):
+                loose.append(m)
+                changed = True
+                continue
+            party['members'].append(m)
+            party['adventures'].add(m.adventure)
+        if not any(m.is_buffer for m in party['members']):
+            dissolved += 1
+            loose.extend(party['members'])
+            continue
+        parties.append(party)
+        origin.append(None if changed else {m.idx for m in party['members']})
+    kept = sum(len(p['members']) for p in parties)
+    added = sum(1 for m in characters if m.idx not in placed)
+
+    # 2) 다시 배치할 캐릭터: 새 캐릭터 + 기존 미배정 + 해체/제약 위반 멤버
+    adv_counts = Counter(c.adventure for c in characters)
+    in_party = {m.idx for p in parties for m in p['members']}
+    rest = [m for m in characters if m.idx not in in_party]
+    rest_bufs = sorted(
+        (c for c in rest if c.is_buffer),
+        key=lambda c: (adv_counts[c.adventure], c.score),
+        reverse=True
+    )
+    rest_dlrs = [c for c in rest if not c.is_buffer]
+
+    # 3) 파티 수가 부족하면 남은 버퍼로 새 파티를 연다
+    P = min(sum(c.is_buffer for c in characters), len(characters) // 4)
+    while len(parties) < P and rest_bufs:
+        buf = rest_bufs.pop(0)
+        parties.append({'members': [buf], 'adventures': {buf.adventure}})
+
+    # 파티별 최고 점수 버퍼를 메인 버퍼로 지정
+    for p in parties:
+        bufs = [m for m in p['members'] if m.is_buffer]
+        max(bufs, key=lambda m: m.score).main_buffer = True
+
+    # 4) 빈 자리 채우기 (assign_parties 5) ~ 6.5) 와 같은 규칙)
+    _lap(phases, 'restore', t)
+    reasons = stats.setdefault('unplaced_reasons', {}) if stats is not None else None
+    leftover = _fill_parties(parties, rest_dlrs, rest_bufs, adv_counts, phases, reasons)
+
+    # 새로 연 파티와 빈 자리 채우기에서 멤버가 바뀐 파티도 변경분이 닿은 파티
+    origin += [None] * (len(parties) - len(origin))
+    touched = {k for k, p in enumerate(parties)
+               if origin[k] is None or {m.idx for m in p['members']} != origin[k]}
+
+    if stats is not None:
+        stats.update(warm_start=True, kept=kept, added=added, removed=removed,
+                     rescored=rescored, dissolved=dissolved, touched=len(touched))
+
+    # 5) 변경분이 닿은 파티 위주의 짧은 편차 줄이기 스왑
+    return _finish_parties(parties, leftover, engine, max_rounds, deadline, seed, engine_options, phases,
+                           progress, stop_event, active=touched,
+                           max_active=len(touched) + INCREMENTAL_SWAP_PARTNERS)
+
 
 # 파티 결과를 DB 포맷으로 변환
-def wrap_create_parties_alternative(buffers, dealers):
-    charlist = adapt_characters(buffers) + adapt_characters(dealers)
-    # assign_parties는 (List[List[dict]], leftover, scores, score_range, std_dev) 반환
-    parties, leftover, scores, score_range, std_dev = assign_parties(charlist)
+def wrap_create_parties_alternative(buffers, dealers, engine='delta', time_budget=None, seed=None,
+                                    engine_options=None, stats=None, layout=None, progress=None,
+                                    stop_event=None):
+    roster = Roster.from_records(list(buffers) + list(dealers))
+    # assign_parties는 (List[List[Member]], leftover, scores, score_range, std_dev) 반환
+    # layout(기존 파티 배치)이 있으면 그 배치에서 출발해 변경분만 반영
+    if layout is not None:
+        parties, leftover, scores, score_range, std_dev = reassign_parties(
+            roster, layout, engine=engine, time_budget=time_budget, seed=seed,
+            engine_options=engine_options, stats=stats, progress=progress, stop_event=stop_event
+        )
+    else:
+        parties, leftover, scores, score_range, std_dev = assign_parties(
+            roster, engine=engine, time_budget=time_budget, seed=seed,
+            engine_options=engine_options, stats=stats, progress=progress, stop_event=stop_event
+        )
+    if stats is not None:
+        stats.update(score_range=score_range, std_dev=std_dev)
+        # 미배정 이유를 캐릭터 이름으로 풀어서 기록
+        reasons = stats.pop('unplaced_reasons', {})
+        stats['unplaced'] = [
+            {'adventure': roster.adventure_names[m.adventure], 'chara_name': roster.names[m.idx],
+             'reason': reasons.get(m.idx, 'no_open_slot')}
+            for m in leftover
+        ]
     result_parties = []
 
-    # ★ 변경: 변수명을 party → member_list 로 변경하고,
-    #          party["members"] 대신 member_list 자체를 사용합니다.
-    for member_list, score in zip(parties, scores):  # ← 변경됨
-        # party["members"] → member_list
-        members = sorted(member_list, key=lambda x: x["score"], reverse=True)  # ← 변경됨
+    # 결과를 저장할 때만 DB 포맷 dict 로 복원
+    for member_list, score in zip(parties, scores):
+        members = sorted(member_list, key=lambda x: x.score, reverse=True)
 
-        # 기존 로직 그대로
-        main_buf = next((m for m in members if m["is_buffer"]), None)
+        main_buf = next((m for m in members if m.is_buffer), None)
         others   = [m for m in members if m is not main_buf]
         dealer_list = others[:3]
 
-        def recover(m):
-            return {
-                "adventure": m["account"],
-                "chara_name": m["name"],
-                "job": m["job"],
-                "fame": m["fame"],
-                "score": m["score"],
-                "isbuffer": int(m["is_buffer"])
-            }
-
         result_parties.append({
-            "buffers":     [recover(main_buf)] if main_buf else [],
-            "dealers":     [recover(m) for m in dealer_list],
+            "buffers":     [roster.record(main_buf.idx)] if main_buf else [],
+            "dealers":     [roster.record(m.idx) for m in dealer_list],
             "party_score": score
         })
 
-    unassigned = [
-        {
-            "adventure": m["account"],
-            "chara_name": m["name"],
-            "job":        m["job"],
-            "fame":       m["fame"],
-            "score":      m["score"],
-            "isbuffer":   int(m["is_buffer"])
-        }
-        for m in leftover
-    ]
+    unassigned = [roster.record(m.idx) for m in leftover]
     skipped = []
     return result_parties, unassigned, skipped
 
 
-if __name__ == '__main__':
-    parser = argparse.ArgumentParser(description='Generate parties and insert into DB')
-    parser.add_argument('role', nargs='?', choices=['temple','azure','venus','tmp'], default=None)
-    args = parser.parse_args()
-
-    base = os.path.dirname(os.path.abspath(__file__)) + '/..'
-    db_path = os.path.join(base, 'database', 'DB.sqlite')
+# party 테이블의 현재 배치 조회 (증분 재최적화 시작점)
+def read_layout(conn, tval):
+    """
+    반환값: (layout, completed)
+      layout:    파티(id 순)마다 {'adventure', 'chara_name', 'score'} 목록
+      completed: 완료 처리된 파티의 (모험단, 캐릭터명) frozenset 목록
+    """
+    rows = conn.execute(
+        "SELECT buffer, dealer1, dealer2, dealer3, COALESCE(is_completed, 0) "
+        "FROM party WHERE type = ? ORDER BY id ASC",
+        (tval,)
+    ).fetchall()
+    layout, completed = [], []
+    for r in rows:
+        members = []
+        for raw in r[:4]:
+            if raw:
+                c = json.loads(raw)
+                members.append({'adventure': c['adventure'], 'chara_name': c['chara_name'], 'score': c['score']})
+        layout.append(members)
+        if int(r[4]):
+            completed.append(frozenset((m['adventure'], m['chara_name']) for m in members))
+    return layout, completed
 
-    buf_df, del_df = load_characters(db_path, args.role)
-    buffers = buf_df.to_dict('records')
-    dealers = del_df.to_dict('records')
-    parties, unassigned, skipped = wrap_create_parties_alternative(buffers, dealers)
 
-    conn = sqlite3.connect(db_path)
+# 생성된 파티/미배정 캐릭터를 party, abandonment 테이블에 저장 (기존 type 데이터는 교체)
+# completed 를 주면 파티별 is_completed 값도 함께 저장
+def write_parties(conn, tval, parties, unassigned, completed=None):
     cur = conn.cursor()
-    tval = args.role or 'all'
     cur.execute("DELETE FROM party WHERE type = ?", (tval,))
     cur.execute("DELETE FROM abandonment WHERE type = ?", (tval,))
-    for p in parties:
+    for i, p in enumerate(parties):
         buf = p['buffers'][0] if p['buffers'] else None
         buf_j = json.dumps({k: buf[k] for k in ('adventure','chara_name','job','fame','score')} | {'isbuffer': buf['isbuffer']}, ensure_ascii=False) if buf else ''
         dj = [json.dumps({k: d[k] for k in ('adventure','chara_name','job','fame','score')} | {'isbuffer': d['isbuffer']}, ensure_ascii=False) for d in p['dealers'][:3]]
@@ -343,10 +1653,204 @@ if __name__ == '__main__':
             "INSERT INTO party(type, buffer, dealer1, dealer2, dealer3, result) VALUES(?,?,?,?,?,?)",
             (tval, buf_j, dj[0], dj[1], dj[2], p['party_score'])
         )
+        if completed is not None and completed[i]:
+            cur.execute("UPDATE party SET is_completed = 1 WHERE id = ?", (cur.lastrowid,))
     for c in unassigned:
         cur.execute(
             "INSERT INTO abandonment(type, character) VALUES(?,?)",
             (tval, json.dumps(c, ensure_ascii=False))
         )
     conn.commit()
-    conn.close()
+
+
+# 파티 생성 결과 캐시 (같은 로스터·설정으로 다시 생성하면 최적화를 건너뜀)
+RESULT_CACHE_SIZE = 16        # 보관할 결과 수 (LRU)
+
+_RESULT_CACHE = OrderedDict()  # fingerprint → (parties, unassigned, stats, 최적화 소요 시간)
+_CACHE_STATS = {'hits': 0, 'misses': 0, 'saved': 0.0}
+_CACHE_LOCK = threading.Lock()
+
+
+# 로스터 + 최적화 설정의 지문. 저장되는 캐릭터 정보(직업/명성 포함)가 하나라도 바뀌면 달라진다
+def roster_fingerprint(tval, buffers, dealers, settings):
+    h = hashlib.sha256()
+    h.update(json.dumps([tval, settings], sort_keys=True, default=str).encode('utf-8'))
+    for r in buffers + dealers:
+        row = [r['adventure'], r['chara_name'], r['job'], r['fame'], r['score'], r['isbuffer']]
+        h.update(json.dumps(row, ensure_ascii=False, default=str).encode('utf-8'))
+    return h.hexdigest()
+
+
+# 캐시 통계 (hits, misses, hit_rate, saved: 누적 절약 시간(초))
+def cache_info():
+    with _CACHE_LOCK:
+        info = dict(_CACHE_STATS, size=len(_RESULT_CACHE))
+    lookups = info['hits'] + info['misses']
+    info['hit_rate'] = info['hits'] / lookups if lookups else 0.0
+    return info
+
+
+def clear_cache():
+    with _CACHE_LOCK:
+        _RESULT_CACHE.clear()
+        _CACHE_STATS.update(hits=0, misses=0, saved=0.0)
+
+
+# 파티 생성 서비스 (웹 앱에서 직접 호출)
+def generate_parties(conn, role=None, engine='delta', time_budget=None, seed=None, engine_options=None,
+                     incremental=False, use_cache=True, progress=None, stop_event=None):
+    """
+    role(temple/azure/venus/tmp, None 이면 전체) 파티를 생성해
+    party/abandonment 테이블에 저장한다. conn 은 호출한 쪽에서 열고 닫는다.
+    incremental 이면 현재 party 테이블 배치에서 출발해 변경분만 반영하고
+    (reassign_parties), 구성이 그대로인 파티는 완료 상태를 유지한다.
+
+    로스터와 설정이 이전 생성과 같으면 캐시된 배치를 그대로 저장한다
+    (use_cache=False 로 무시, 증분 모드는 현재 배치에 따라 결과가 달라 캐시하지 않음).
+
+    progress/stop_event 는 assign_parties 에 그대로 넘긴다. stop_event 로 일찍 확정한 결과는
+    stats['stopped_early'] 로 표시하고, 끝까지 최적화한 결과가 아니므로 캐시하지 않는다.
+
+    반환값: {'role', 'engine',
+             'counts':  {'buffers', 'dealers', 'total', 'parties', 'unassigned'},
+             'timings': {'load', 'optimize', 'write', 'total'} (초),
+             'stats':   {'score_range', 'std_dev', ...엔진별 통계},
+             'cache':   {'hit', 'saved_now', 'hits', 'misses', 'hit_rate', 'saved', 'size'}}
+    """
+    if role is not None and role not in ROLES:
+        raise ValueError(f"Unknown role: {role}")
+    tval = role or 'all'
+
+    t0 = time.perf_counter()
+    buffers, dealers = read_characters(conn, role)
+    t1 = time.perf_counter()
+
+    layout, completed = read_layout(conn, tval) if incremental else (None, [])
+    key = None
+    if use_cache and not incremental:
+        settings = {'engine': engine, 'time_budget': time_budget, 'seed': seed,
+                    'engine_options': engine_options or {}}
+        key = roster_fingerprint(tval, buffers, dealers, settings)
+
+    cached = None
+    if key is not None:
+        with _CACHE_LOCK:
+            cached = _RESULT_CACHE.get(key)
+            if cached is not None:
+                _RESULT_CACHE.move_to_end(key)
+                _CACHE_STATS['hits'] += 1
+                _CACHE_STATS['saved'] += cached[3]
+            else:
+                _CACHE_STATS['misses'] += 1
+
+    if cached is not None:
+        parties, unassigned, cached_stats, _ = cached
+        stats = dict(cached_stats)
+        t2 = time.perf_counter()
+    else:
+        stats = {}
+        parties, unassigned, skipped = wrap_create_parties_alternative(
+            buffers, dealers, engine=engine, time_budget=time_budget, seed=seed,
+            engine_options=engine_options, stats=stats, layout=layout,
+            progress=progress, stop_event=stop_event
+        )
+        t2 = time.perf_counter()
+        stats['stopped_early'] = stop_event is not None and stop_event.is_set()
+        if key is not None and not stats['stopped_early']:
+            with _CACHE_LOCK:
+                _RESULT_CACHE[key] = (parties, unassigned, dict(stats), t2 - t1)
+                while len(_RESULT_CACHE) > RESULT_CACHE_SIZE:
+                    _RESULT_CACHE.popitem(last=False)
+
+    done_flags = None
+    if completed:
+        done_flags = [
+            frozenset((m['adventure'], m['chara_name']) for m in p['buffers'] + p['dealers']) in completed
+            for p in parties
+        ]
+    write_parties(conn, tval, parties, unassigned, done_flags)
+    t3 = time.perf_counter()
+
+    return {
+        'role': tval,
+        'engine': engine,
+        'counts': {
+            'buffers': len(buffers),
+            'dealers': len(dealers),
+            'total': len(buffers) + len(dealers),
+            'parties': len(parties),
+            'unassigned': len(unassigned),
+        },
+        'timings': {
+            'load': t1 - t0,
+            'optimize': t2 - t1,
+            'write': t3 - t2,
+            'total': t3 - t0,
+        },
+        'stats': stats,
+        'cache': dict(cache_info(), hit=cached is not None,
+                      saved_now=cached[3] if cached is not None else 0.0),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate parties and insert into DB')
+    parser.add_argument('role', nargs='?', choices=ROLES, default=None)
+    parser.add_argument('--engine', choices=ENGINES, default='delta',
+                        help='편차 줄이기 스왑 엔진 (reference: 기존 전체 재계산 방식, '
+                             f'exact: {EXACT_MAX_CHARACTERS}명 이하 로스터 정확해)')
+    parser.add_argument('--time-budget', type=parse_duration, default=None,
+                        help='파티 배정 전체 시간 상한 (예: 5s, 500ms). anneal 은 이 시간을 모두 사용')
+    parser.add_argument('--seed', type=int, default=0, help='anneal/parallel 엔진 난수 시드')
+    parser.add_argument('--workers', type=int, default=None, help='parallel 엔진 프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--starts', type=int, default=None, help='parallel 엔진 멀티스타트 횟수 (기본: workers×2)')
+    parser.add_argument('--target-std', type=float, default=None,
+                        help='parallel 엔진: 이 표준편차 이하 결과가 나오면 남은 탐색 중단')
+    parser.add_argument('--node-limit', type=int, default=EXACT_NODE_LIMIT,
+                        help='exact 엔진 탐색 노드 상한')
+    parser.add_argument('--incremental', action='store_true',
+                        help='현재 party 테이블 배치에서 출발해 변경분만 반영 (짧은 스왑만 수행)')
+    parser.add_argument('--json', action='store_true', help='결과(인원 수, 소요 시간, 통계)를 JSON 으로 출력')
+    parser.add_argument('--progress', action='store_true', help='편차 줄이기 진행 상황을 stderr 로 출력')
+    args = parser.parse_args()
+
+    engine_options = {}
+    if args.engine == 'parallel':
+        engine_options = {'workers': args.workers, 'starts': args.starts, 'target_std': args.target_std}
+    elif args.engine == 'exact':
+        engine_options = {'node_limit': args.node_limit}
+
+    base = os.path.dirname(os.path.abspath(__file__)) + '/..'
+    db_path = os.path.join(base, 'database', 'DB.sqlite')
+    if not os.path.exists(db_path):
+        raise FileNotFoundError(f"Database file not found: {db_path}")
+
+    def print_progress(p):
+        print(f"진행: 반복 {p['iteration']}, std {p['std_dev']:.3f}, "
+              f"점수 {p['score_min']:.2f} ~ {p['score_max']:.2f} ({p['elapsed']:.2f}초)", file=sys.stderr)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        result = generate_parties(
+            conn, args.role, engine=args.engine, time_budget=args.time_budget, seed=args.seed,
+            engine_options=engine_options, incremental=args.incremental,
+            progress=print_progress if args.progress else None
+        )
+    finally:
+        conn.close()
+
+    stats = result['stats']
+    if args.json:
+        print(json.dumps(result, ensure_ascii=False))
+    elif 'optimal' in stats:
+        status = '최적해 증명' if stats['optimal'] else f"하한 {stats['lower_bound']:.3f}, gap {stats['gap']:.3f}"
+        print(f"exact: std {stats['std_dev']:.3f} (휴리스틱 {stats['heuristic_std']:.3f}), "
+              f"{status}, 노드 {stats['nodes']}")
+    elif stats.get('exact_skipped'):
+        print(f"exact: {EXACT_MAX_CHARACTERS}명 초과 로스터라 delta 엔진으로 대신 배정")
+    if not args.json and stats.get('warm_start'):
+        print(f"incremental: 유지 {stats['kept']}명, 추가(미배정 포함) {stats['added']}명, 제외 {stats['removed']}명, "
+              f"점수 변경 {stats['rescored']}명, 해체 파티 {stats['dissolved']}개 → std {stats['std_dev']:.3f}")
+    if not args.json:
+        for u in stats.get('unplaced', []):
+            print(f"미배정: {u['chara_name']} ({u['adventure']}) - {LEFTOVER_REASONS.get(u['reason'], u['reason'])}")
@@ -0,0 +1,243 @@
+#길드 전체(user_adventure 의 모든 모험단) 점수 일괄 갱신
+#!/usr/bin/env python3
+#   python refresh_all.py [--resume] [--rate 5] [--workers 6] [--force-discovery]
+# 모험단마다 update_score.py 를 따로 실행하는 대신 한 프로세스에서 차례로 갱신한다.
+# - API 요청 스레드(스레드별 세션)와 초당 요청 수 제한을 모든 모험단이 함께 쓴다.
+# - character_key 캐시가 없는 모험단이 있으면 discovery_worker.py 를 한 번 띄워 브라우저 하나로 조회한다.
+# - 모험단 하나가 끝날 때마다 체크포인트 파일에 기록하므로, 중단되면 --resume 으로 남은 모험단만 이어서 한다.
+#   한 명도 갱신하지 못한 모험단은 끝난 것으로 치지 않고, 체크포인트를 남겨 --resume 때 다시 시도한다.
+# - 모험단마다 last_execute('update_score.py') 에 갱신 시각과 결과 요약을 남긴다.
+# - 회로 차단기도 함께 써서, 서버가 죽으면 남은 모험단은 요청 없이 바로 실패 처리한다.
+# - 실패한 캐릭터가 있으면 목록을 JSON 으로 남긴다 (기본 database/refresh_all.failed.json, update_score.py --retry-failed 로 재시도).
+import argparse
+import datetime
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from update_score import (BASE_URL, DB_PATH, FETCH_WORKERS, HOST_RATE_LIMIT, PYTHON_EXEC,
+                              CircuitBreaker, HostRateLimiter, cached_tuples, stream_discovered, default_response_cache,
+                              ensure_character_key_schema, fetch_and_update, write_failed_summary)
+    from discovery_worker import DISCOVERY_ADDR, CONNECT_TIMEOUT, parse_addr
+except ImportError:  # uchsquad 디렉터리에서 scripts.refresh_all 로 불러올 때
+    from scripts.update_score import (BASE_URL, DB_PATH, FETCH_WORKERS, HOST_RATE_LIMIT, PYTHON_EXEC,
+                                      CircuitBreaker, HostRateLimiter, cached_tuples, stream_discovered, default_response_cache,
+                                      ensure_character_key_schema, fetch_and_update, write_failed_summary)
+    from scripts.discovery_worker import DISCOVERY_ADDR, CONNECT_TIMEOUT, parse_addr
+
+BASE_DIR        = os.path.dirname(os.path.abspath(__file__))
+WORKER_SCRIPT   = os.path.join(BASE_DIR, 'discovery_worker.py')
+CHECKPOINT_PATH = os.environ.get('REFRESH_CHECKPOINT',
+                                 os.path.join(BASE_DIR, '..', 'database', 'refresh_all.checkpoint.json'))
+# 실패한 캐릭터 목록 기본 저장 위치 (--failed-out 으로 바꾼다)
+FAILED_PATH     = os.environ.get('REFRESH_FAILED',
+                                 os.path.join(BASE_DIR, '..', 'database', 'refresh_all.failed.json'))
+# 전체 작업의 초당 요청 수 상한 (모든 모험단 합계)
+REFRESH_RATE    = float(os.environ.get('REFRESH_ALL_RATE', str(HOST_RATE_LIMIT)))
+WORKER_STARTUP  = 30.0   # discovery_worker 가 브라우저를 띄우고 포트를 열 때까지 기다리는 시간(초)
+
+
+def load_adventures(db_path=DB_PATH):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute(
+        'SELECT adventure FROM user_adventure WHERE adventure IS NOT NULL ORDER BY idx'
+    ).fetchall()
+    conn.close()
+    # 같은 모험단이 여러 유저에 등록돼 있어도 한 번만
+    return list(dict.fromkeys(r[0] for r in rows))
+
+
+def load_checkpoint(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_checkpoint(path, checkpoint):
+    # 쓰는 도중 중단돼도 이전 체크포인트가 깨지지 않도록 임시 파일에 쓰고 바꾼다
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+# last_execute 에 결과 요약 컬럼이 없으면 추가
+def ensure_last_execute_schema(conn):
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(last_execute)")}
+    if 'summary' not in cols:
+        conn.execute("ALTER TABLE last_execute ADD COLUMN summary TEXT")
+
+
+def record_last_execute(conn, adventure, ok, failed, now=None):
+    """
+    모험단 결과를 last_execute 에 남긴다. 한 명이라도 갱신됐으면 갱신 시각(date)도 바꾸고,
+    모두 실패했으면 기존 갱신 시각은 두고 요약만 바꾼다.
+    """
+    now_str = (now or datetime.datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+    summary = f'일괄 갱신 {now_str}: 성공 {ok}, 실패 {failed}'
+    with conn:
+        ensure_last_execute_schema(conn)
+        if ok:
+            conn.execute(
+                '''
+                INSERT INTO last_execute (command, user, date, summary)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(command, user) DO UPDATE SET date = excluded.date, summary = excluded.summary
+                ''',
+                ('update_score.py', adventure, now_str, summary)
+            )
+        else:
+            conn.execute(
+                'UPDATE last_execute SET summary = ? WHERE command = ? AND user = ?',
+                (summary, 'update_score.py', adventure)
+            )
+
+
+def worker_running(addr=DISCOVERY_ADDR):
+    if not addr:
+        return False
+    try:
+        with socket.create_connection(parse_addr(addr), timeout=CONNECT_TIMEOUT):
+            return True
+    except OSError:
+        return False
+
+
+def start_discovery_worker(addr=DISCOVERY_ADDR, timeout=WORKER_STARTUP):
+    """
+    discovery_worker.py 를 띄우고 포트가 열릴 때까지 기다린다. 이미 떠 있거나 주소가 비어 있으면 None.
+    띄우지 못하면(Playwright 없음 등) None 을 돌려주고, 조회는 scrap_char.py 로 넘어간다.
+    """
+    if not addr or worker_running(addr):
+        return None
+    host, port = parse_addr(addr)
+    proc = subprocess.Popen([PYTHON_EXEC, WORKER_SCRIPT, '--host', host, '--port', str(port)])
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            print(f"discovery worker 시작 실패 (exit code {proc.returncode})", file=sys.stderr)
+            return None
+        if worker_running(addr):
+            return proc
+        time.sleep(0.5)
+    print("discovery worker 시작 시간 초과", file=sys.stderr)
+    proc.terminate()
+    proc.wait()
+    return None
+
+
+def refresh_all(adventures, checkpoint_path=CHECKPOINT_PATH, resume=False, workers=FETCH_WORKERS,
+                rate=REFRESH_RATE, base_url=BASE_URL, force=False, db_path=DB_PATH, failed_out=None):
+    """
+    adventures 를 차례로 갱신한다. 반환값: {모험단: {'ok': n, 'failed': n}} (이어서 한 경우 이전 결과 포함)
+    모두 실패한 모험단이 있으면 체크포인트를 지우지 않는다.
+    실패한 캐릭터가 있으면 목록을 update_score.py --retry-failed 형식의 JSON 으로 failed_out(기본 FAILED_PATH)에 저장한다.
+    실패 목록은 모험단별로 체크포인트에도 남기고, 그 모험단을 다시 갱신하면 새 결과로 바꾼다.
+    """
+    checkpoint = load_checkpoint(checkpoint_path) if resume else None
+    if checkpoint is None:
+        checkpoint = {'started_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'done': {}}
+    done = checkpoint['done']
+    failed_by_adventure = checkpoint.setdefault('failed', {})
+    pending = [a for a in adventures if a not in done]
+    results = dict(done)
+    print(f"일괄 갱신: 모험단 {len(adventures)}개 중 {len(pending)}개 남음"
+          f"{' (체크포인트 ' + checkpoint['started_at'] + ' 에서 이어서)' if done else ''}", flush=True)
+
+    # 캐시를 못 쓰는 모험단이 하나라도 있으면 브라우저 워커를 한 번만 띄워 함께 쓴다
+    conn = sqlite3.connect(db_path)
+    with conn:
+        ensure_character_key_schema(conn)
+    misses = [a for a in pending if force or cached_tuples(conn, a) is None]
+    worker_proc = start_discovery_worker() if misses else None
+
+    limiter = HostRateLimiter(rate)
+    breaker = CircuitBreaker()
+    response_cache = default_response_cache()
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for n, adventure in enumerate(pending, 1):
+                print(f"[{n}/{len(pending)}] {adventure}", flush=True)
+                scraped = set()
+                failures = []
+                stream = stream_discovered([adventure], force=force, db_path=db_path, scraped=scraped)
+                ok, failed = fetch_and_update(stream, workers=workers, base_url=base_url, db_path=db_path,
+                                              cache_keys=scraped, limiter=limiter, executor=pool,
+                                              response_cache=response_cache, breaker=breaker,
+                                              failures=failures)
+                if not ok and not failed:
+                    print(f"-- {adventure}: 유효한 서버/키 튜플이 없습니다.", flush=True)
+                record_last_execute(conn, adventure, ok, failed)
+                results[adventure] = {'ok': ok, 'failed': failed}
+                if failures:
+                    failed_by_adventure[adventure] = failures
+                else:
+                    failed_by_adventure.pop(adventure, None)
+                if failed and not ok:
+                    # 서버 장애 등으로 모두 실패한 모험단은 끝난 것으로 기록하지 않는다
+                    print(f"-- {adventure}: 모두 갱신 실패, --resume 때 다시 시도합니다.", flush=True)
+                else:
+                    done[adventure] = {'ok': ok, 'failed': failed}
+                save_checkpoint(checkpoint_path, checkpoint)
+    finally:
+        conn.close()
+        if worker_proc is not None:
+            worker_proc.terminate()
+            worker_proc.wait()
+
+    failures = [f for fs in failed_by_adventure.values() for f in fs]
+    if failures or failed_out:
+        failed_out = failed_out or FAILED_PATH
+        write_failed_summary(failed_out, failures, sum(r['ok'] for r in results.values()))
+        print(f"실패 목록 {len(failures)}건: {failed_out}", flush=True)
+    elif os.path.exists(FAILED_PATH):
+        # 모두 성공했으면 이전 실행의 실패 목록은 지운다
+        os.remove(FAILED_PATH)
+
+    # 모두 실패한 모험단이 남았으면 체크포인트를 두고, 끝까지 마쳤으면 지운다
+    retry = [a for a in pending if a not in done]
+    if retry:
+        save_checkpoint(checkpoint_path, checkpoint)
+        print(f"모험단 {len(retry)}개 갱신 실패: --resume 으로 다시 시도할 수 있습니다.", flush=True)
+    elif os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Refresh scores of every adventure in user_adventure')
+    parser.add_argument('--resume', action='store_true', help='체크포인트에서 끝나지 않은 모험단만 이어서 갱신')
+    parser.add_argument('--checkpoint', default=CHECKPOINT_PATH, help='체크포인트 파일 경로')
+    parser.add_argument('--workers', type=int, default=FETCH_WORKERS, help='동시 API 요청 수')
+    parser.add_argument('--rate', type=float, default=REFRESH_RATE,
+                        help='전체 작업의 초당 요청 수 상한 (0 이면 제한 없음)')
+    parser.add_argument('--base-url', default=BASE_URL, help='API 서버 주소 (로컬 스텁 서버 시험용)')
+    parser.add_argument('--force-discovery', action='store_true',
+                        help='character_key 캐시를 무시하고 브라우저로 다시 조회')
+    parser.add_argument('--failed-out', metavar='PATH',
+                        help='실패한 캐릭터 목록 JSON 경로 (기본: 실패가 있으면 database/refresh_all.failed.json, '
+                             'update_score.py --retry-failed 로 재시도)')
+    args = parser.parse_args()
+
+    adventures = load_adventures()
+    if not adventures:
+        print("등록된 모험단이 없습니다.")
+        sys.exit(1)
+    try:
+        results = refresh_all(adventures, args.checkpoint, args.resume, args.workers, args.rate,
+                              args.base_url.rstrip('/'), args.force_discovery, failed_out=args.failed_out)
+    except KeyboardInterrupt:
+        print("\n중단됨. --resume 으로 남은 모험단을 이어서 갱신할 수 있습니다.")
+        sys.exit(130)
+
+    ok = sum(r['ok'] for r in results.values())
+    failed = sum(r['failed'] for r in results.values())
+    print(f"일괄 갱신 완료: 모험단 {len(results)}개, 성공 {ok}명, 실패 {failed}명")
@@ -3,41 +3,110 @@
 import sys
 import os
 import re
+from html.parser import HTMLParser
 from urllib.parse import quote
 from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
 
-# 설정
-BASE_URL        = 'https://dundam.xyz/search'
+# 설정 (DUNDAM_BASE_URL 로 로컬 스텁 서버의 기록된 검색 페이지를 쓸 수 있다)
+SITE_URL        = os.environ.get('DUNDAM_BASE_URL', 'https://dundam.xyz').rstrip('/')
+BASE_URL        = SITE_URL + '/search'
 FIXED_SERVER    = 'adven'
 USER_AGENT      = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
 GOTO_TIMEOUT    = 60000
 SELECTOR_TIMEOUT= 60000
 
+# 불필요한 리소스 차단 (이미지, CSS 등) - discovery_worker.py 도 같은 패턴을 쓴다
+BLOCKED_RESOURCES = "**/*.{png,jpg,jpeg,svg,gif,css,woff,woff2,ttf}"
+
+# 캐릭터 카드와 그 안의 캐릭터 이미지
+SCON_SELECTOR = 'div.scon'
+AVATAR_SELECTOR = 'div.seh_abata div.imgt img'
+
+# 설정하면 검색 페이지 HTML 을 search_<이름>.html 로 저장한다 (benchmarks.stub_server / replay 에서 재생)
+RECORD_DIR = os.environ.get('DUNDAM_RECORD_DIR')
+
+
+def search_url(user_name):
+    return f"{BASE_URL}?server={FIXED_SERVER}&name={quote(user_name)}"
+
+
+def parse_avatar_src(src):
+    """캐릭터 이미지 주소에서 (server, char_id) 튜플을 뽑는다. 형식이 다르면 None."""
+    if not src:
+        return None
+    # 절대 URL 보정
+    if src.startswith('/'):
+        src = 'https://dundam.xyz' + src
+    m = re.search(r'/servers/([^/]+)/characters/([^?]+)', src)
+    if m:
+        return m.group(1), m.group(2)
+    return None
+
+
+def search_fixture_name(user_name):
+    return f"search_{quote(user_name, safe='')}.html"
+
+
+def record_search_html(user_name, html, record_dir=None):
+    record_dir = record_dir or RECORD_DIR
+    os.makedirs(record_dir, exist_ok=True)
+    with open(os.path.join(record_dir, search_fixture_name(user_name)), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+
+class _AvatarParser(HTMLParser):
+    """div.scon 안의 div.seh_abata div.imgt img 의 src 를 모은다 (SCON/AVATAR_SELECTOR 와 같은 규칙)."""
+
+    def __init__(self):
+        super().__init__()
+        self.stack = []     # 열린 div 마다 class 집합
+        self.srcs = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'div':
+            self.stack.append(set((attrs.get('class') or '').split()))
+        elif tag == 'img':
+            # scon → seh_abata → imgt 순서로 감싸져 있는지
+            want = ['scon', 'seh_abata', 'imgt']
+            for classes in self.stack:
+                if want and want[0] in classes:
+                    want.pop(0)
+            if not want:
+                self.srcs.append(attrs.get('src'))
+
+    def handle_endtag(self, tag):
+        if tag == 'div' and self.stack:
+            self.stack.pop()
+
+
+def parse_search_html(html):
+    """기록된 검색 페이지 HTML 에서 (server, char_id) 튜플 목록을 뽑는다 (브라우저 없이 재생할 때)."""
+    parser = _AvatarParser()
+    parser.feed(html)
+    return [t for t in map(parse_avatar_src, parser.srcs) if t]
+
+
 def scrape_detail_urls(page, user_name: str):
     """
     주어진 user_name 으로 검색 페이지에 접속해
     각 캐릭터의 (server, char_id) 튜플을 출력한다.
     """
-    url = f"{BASE_URL}?server={FIXED_SERVER}&name={quote(user_name)}"
     try:
-        page.goto(url, wait_until='domcontentloaded', timeout=GOTO_TIMEOUT)
-        page.wait_for_selector('div.scon', timeout=SELECTOR_TIMEOUT)
+        page.goto(search_url(user_name), wait_until='domcontentloaded', timeout=GOTO_TIMEOUT)
+        page.wait_for_selector(SCON_SELECTOR, timeout=SELECTOR_TIMEOUT)
     except PlaywrightTimeoutError:
         return
 
-    for scon in page.query_selector_all('div.scon'):
-        img_el = scon.query_selector('div.seh_abata div.imgt img')
-        src = img_el.get_attribute('src') if img_el else None
-        if not src:
-            continue
-        # 절대 URL 보정
-        if src.startswith('/'):
-            src = 'https://dundam.xyz' + src
-        m = re.search(r'/servers/([^/]+)/characters/([^?]+)', src)
-        if m:
-            server, char_id = m.group(1), m.group(2)
+    if RECORD_DIR:
+        record_search_html(user_name, page.content())
+
+    for scon in page.query_selector_all(SCON_SELECTOR):
+        img_el = scon.query_selector(AVATAR_SELECTOR)
+        tup = parse_avatar_src(img_el.get_attribute('src') if img_el else None)
+        if tup:
             # 표준출력에 튜플 문자열로 찍음
-            print((server, char_id))
+            print(tup, flush=True)
 
 def main(user_names):
     # Playwright 브라우저 세팅
@@ -45,8 +114,7 @@ def main(user_names):
     browser    = playwright.chromium.launch(headless=True)
     ctx        = browser.new_context(user_agent=USER_AGENT)
     page       = ctx.new_page()
-    # 불필요한 리소스 차단 (이미지, CSS 등)
-    page.route("**/*.{png,jpg,jpeg,svg,gif,css,woff,woff2,ttf}", lambda r: r.abort())
+    page.route(BLOCKED_RESOURCES, lambda r: r.abort())
 
     # 각 유저 이름에 대해 튜플 출력
     for name in user_names:
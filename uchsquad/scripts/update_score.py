@@ -2,52 +2,217 @@
 #!/usr/bin/env python3
 import sys
 import subprocess
+import tempfile
+import gzip
+import hashlib
+import json
+import re
+import random
 import ast
+import argparse
+import threading
+import time
 import requests
 import sqlite3
 import os
 import datetime
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+try:
+    from discovery_worker import iter_lookup as discovery_stream
+except ImportError:  # uchsquad 디렉터리에서 scripts.update_score 로 불러올 때
+    from scripts.discovery_worker import iter_lookup as discovery_stream
 
 # 스크립트 디렉터리 기준으로 scrap_char.py 절대경로
 BASE_DIR        = os.path.dirname(os.path.abspath(__file__))
 SCRAPE_SCRIPT   = os.path.join(BASE_DIR, 'scrap_char.py')
 PYTHON_EXEC     = 'python'
 
+# API 서버 주소 (로컬 스텁 서버로 시험할 때는 DUNDAM_BASE_URL 또는 --base-url 로 바꾼다)
+BASE_URL = os.environ.get('DUNDAM_BASE_URL', 'https://dundam.xyz').rstrip('/')
+
 # API 요청 URL 템플릿
-REQUEST_TEMPLATE = "https://dundam.xyz/dat/viewData.jsp?image={key}&server={server}&"
+REQUEST_TEMPLATE = "{base}/dat/viewData.jsp?image={key}&server={server}&"
+
+# 동시 요청 수, 호스트별 초당 요청 수 상한 (0 이면 제한 없음)
+FETCH_WORKERS   = int(os.environ.get('UPDATE_FETCH_WORKERS', '6'))
+HOST_RATE_LIMIT = float(os.environ.get('UPDATE_HOST_RATE', '5'))
+# (연결, 응답) 제한 시간(초). 연결은 짧게 잡아 서버가 죽었을 때 빨리 실패하게 한다
+CONNECT_TIMEOUT = float(os.environ.get('UPDATE_CONNECT_TIMEOUT', '3'))
+READ_TIMEOUT    = float(os.environ.get('UPDATE_READ_TIMEOUT', '15'))
+REQUEST_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+# 일시적 실패(연결 오류, 시간 초과, 5xx/429) 재시도 횟수와 지수 백오프(초, 0~상한 사이 무작위)
+FETCH_RETRIES   = int(os.environ.get('UPDATE_RETRIES', '2'))
+RETRY_BASE      = 0.5
+RETRY_CAP       = 8.0
+# 호스트별 연속 실패가 이 횟수에 이르면 BREAKER_COOLDOWN 초 동안 요청 없이 바로 실패 처리
+BREAKER_FAILURES = int(os.environ.get('UPDATE_BREAKER_FAILURES', '10'))
+BREAKER_COOLDOWN = float(os.environ.get('UPDATE_BREAKER_COOLDOWN', '30'))
+USER_AGENT      = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
 
 # DB 파일 경로 (스크립트 위치 기준)
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, '..', 'database', 'DB.sqlite')
 
+# character_key 캐시 유효 시간(초). 이 안에 조회한 모험단은 브라우저 스크랩을 건너뛴다
+CHARACTER_KEY_TTL = float(os.environ.get('CHARACTER_KEY_TTL_HOURS', '72')) * 3600
 
+# viewData 응답 캐시 디렉터리와 유효 시간(초). 유효 시간이 지나면 조건부 요청(ETag/Last-Modified)으로
+# 재검증하고, 0 이면 캐시를 쓰지 않는다
+RESPONSE_CACHE_DIR = os.environ.get('UPDATE_CACHE_DIR', os.path.join(BASE_DIR, '..', 'database', 'response_cache'))
+RESPONSE_CACHE_TTL = float(os.environ.get('UPDATE_CACHE_TTL_MINUTES', '10')) * 60
 
-def load_tuples_from_subprocess(keys):
-    """scrap_char.py 를 호출해 (server, key) 튜플 리스트를 받아온다."""
+# 설정하면 viewData 응답 원문을 <server>_<key>.json 으로 저장한다 (benchmarks.stub_server / replay 에서 재생)
+# scrap_char.py·discovery_worker.py 도 같은 환경 변수로 검색 페이지 HTML 을 저장한다
+RECORD_DIR = os.environ.get('DUNDAM_RECORD_DIR')
+
+
+
+def parse_tuple_line(line):
+    """scrap_char.py 출력 한 줄 "('server', 'key')" 를 튜플로. 형식이 다르면 None."""
+    line = line.strip()
+    if not line:
+        return None
+    try:
+        tup = ast.literal_eval(line)
+    except Exception:
+        return None
+    if isinstance(tup, tuple) and len(tup) == 2:
+        return tup
+    return None
+
+
+def iter_discovered(keys):
+    """
+    (server, key) 튜플을 찾는 대로 하나씩 내준다. 상주 discovery_worker.py 가 떠 있으면
+    그 워커에 묻고(모험단 단위로 도착), 없거나 실패하면 scrap_char.py 를 직접 실행해
+    캐릭터 카드를 읽을 때마다 찍는 줄을 바로 넘긴다 (프로세스 종료를 기다리지 않는다).
+    워커가 중간에 끊기면 scrap_char.py 로 다시 조회하고, 이미 내준 튜플은 건너뛴다.
+    """
     if not keys:
-        return []
-
-    cmd = [PYTHON_EXEC, SCRAPE_SCRIPT] + keys
-    result = subprocess.run(cmd, capture_output=True, text=True, check=False, encoding='utf-8')
-    if result.returncode != 0:
-        print(f"스크랩 스크립트 오류 (exit code {result.returncode}):", file=sys.stderr)
-        print(result.stderr.strip(), file=sys.stderr)
-        return []
-
-    tuples = []
-    for line in result.stdout.splitlines():
-        line = line.strip()
-        if not line:
-            continue
+        return
+
+    seen = set()
+    try:
+        for tup in discovery_stream(keys):
+            if tup not in seen:
+                seen.add(tup)
+                yield tup
+        return
+    except (OSError, ValueError) as e:
+        print(f"discovery worker 사용 불가 ({e}), scrap_char.py 로 조회합니다.", file=sys.stderr)
+
+    cmd = [PYTHON_EXEC, '-u', SCRAPE_SCRIPT] + keys
+    # stderr 는 파일로 받는다 (파이프가 차서 stdout 읽기와 서로 막히지 않도록)
+    with tempfile.TemporaryFile(mode='w+', encoding='utf-8') as err:
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=err, text=True, encoding='utf-8')
+        finished = False
         try:
-            tup = ast.literal_eval(line)
-            if isinstance(tup, tuple) and len(tup) == 2:
-                tuples.append(tup)
-        except Exception:
-            continue
+            for line in proc.stdout:
+                tup = parse_tuple_line(line)
+                if tup and tup not in seen:
+                    seen.add(tup)
+                    yield tup
+            finished = True
+        finally:
+            # 소비하는 쪽이 중간에 그만두면 스크랩도 멈춘다
+            if not finished:
+                proc.kill()
+            proc.stdout.close()
+            proc.wait()
+        if proc.returncode != 0:
+            err.seek(0)
+            print(f"스크랩 스크립트 오류 (exit code {proc.returncode}):", file=sys.stderr)
+            print(err.read().strip(), file=sys.stderr)
+
+
+def load_tuples_from_subprocess(keys):
+    """(server, key) 튜플 리스트를 한 번에 받아온다 (iter_discovered 를 끝까지 읽음)."""
+    return list(iter_discovered(keys))
+
+
+# character_key 테이블에 캐시용 컬럼(adventure, updated_at)이 없으면 추가
+def ensure_character_key_schema(conn):
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(character_key)")}
+    if 'adventure' not in cols:
+        conn.execute("ALTER TABLE character_key ADD COLUMN adventure TEXT")
+    if 'updated_at' not in cols:
+        conn.execute("ALTER TABLE character_key ADD COLUMN updated_at TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_character_key_adventure ON character_key (adventure)")
+
+
+def cached_tuples(conn, adventure, ttl=CHARACTER_KEY_TTL, now=None):
+    """모험단의 캐시된 (server, key) 목록. 없거나 하나라도 ttl 이 지났으면 None."""
+    now = now or datetime.datetime.now()
+    cutoff = (now - datetime.timedelta(seconds=ttl)).strftime("%Y-%m-%d %H:%M:%S")
+    rows = conn.execute(
+        "SELECT server, key, updated_at FROM character_key WHERE adventure = ? ORDER BY rowid",
+        (adventure,)
+    ).fetchall()
+    if not rows or any(r[2] is None or r[2] < cutoff for r in rows):
+        return None
+    return [(r[0], r[1]) for r in rows]
+
+
+def store_character_keys(conn, rows, now=None):
+    """갱신에 성공한 캐릭터 행으로 모험단별 캐시를 통째로 바꾼다."""
+    now_str = (now or datetime.datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
+    adventures = {r['adventure'] for r in rows}
+    conn.executemany("DELETE FROM character_key WHERE adventure = ?", [(a,) for a in adventures])
+    conn.executemany(
+        "INSERT INTO character_key (adventure, chara_name, server, key, updated_at) VALUES (?, ?, ?, ?, ?)",
+        [(r['adventure'], r['chara_name'], r['server'], r['key'], now_str) for r in rows]
+    )
+
+
+def stream_discovered(adventures, force=False, ttl=CHARACTER_KEY_TTL, db_path=DB_PATH, scraped=None,
+                      source=iter_discovered):
+    """
+    모험단별로 character_key 캐시를 먼저 보고, 캐시가 없거나 만료됐거나 force 면
+    그 모험단들만 모아 브라우저(source)로 조회한다. 캐시된 튜플을 먼저, 그다음 조회된 튜플을
+    찾는 대로 내주므로 fetch_and_update 에 바로 넘기면 스크랩과 API 요청이 겹쳐 진행된다.
+    scraped(set)를 주면 브라우저로 새로 조회한 튜플을 거기에 모은다.
+    """
+    conn = sqlite3.connect(db_path)
+    with conn:
+        ensure_character_key_schema(conn)
+    cached_all, misses = [], []
+    for adventure in adventures:
+        cached = None if force else cached_tuples(conn, adventure, ttl)
+        if cached:
+            cached_all.extend(cached)
+        else:
+            misses.append(adventure)
+    conn.close()
+    print(f"character_key 캐시: 적중 {len(adventures) - len(misses)}, 미스 {len(misses)}"
+          f"{' (강제 조회)' if force else ''}", flush=True)
+
+    seen = set()
+    for t in cached_all:
+        if t not in seen:
+            seen.add(t)
+            yield t
+    if not misses:
+        return
+    for t in source(misses):
+        if scraped is not None:
+            scraped.add(t)
+        if t not in seen:
+            seen.add(t)
+            yield t
+
+
+def discover_tuples(adventures, force=False, ttl=CHARACTER_KEY_TTL, db_path=DB_PATH):
+    """
+    stream_discovered 를 끝까지 읽어 한 번에 돌려준다.
+    반환값: (전체 (server, key) 목록, 브라우저로 새로 조회한 튜플 집합)
+    """
+    scraped = set()
+    tuples = list(stream_discovered(adventures, force, ttl, db_path, scraped))
+    return tuples, scraped
+
 
-    return tuples
-    
 #버프력, 딜 score 추출
 def extract_score_info(data):
     """
@@ -78,141 +243,520 @@ def extract_score_info(data):
     return int(clean), isbuf
 
 
-def upsert_character(conn, data, server, key):
-    # score와 isbuffer 추출
+# API 응답을 user_character / character_history 에 쓸 행(dict)으로 변환
+def parse_character(data, server, key):
     score_n, isbuf_i = extract_score_info(data)
+    return {
+        'adventure':  data['adventure'],
+        'server':     server,
+        'key':        key,
+        'chara_name': data['name'],
+        'job':        data['job'],
+        'fame':       int(data['fame']),
+        'score':      score_n,
+        'isbuffer':   isbuf_i,
+    }
+
+
+# INSERT ... ON CONFLICT ... DO UPDATE (파라미터 바인딩)
+UPSERT_CHARACTER_SQL = """
+    INSERT INTO user_character
+        (adventure, server, key, chara_name, job, fame, score, last_score, isbuffer)
+    VALUES
+        (:adventure, :server, :key, :chara_name, :job, :fame, :score, NULL, :isbuffer)
+    ON CONFLICT(adventure, server, chara_name) DO UPDATE SET
+        last_score = user_character.score,  -- 기존 score 를 last_score 에 복사
+        score      = excluded.score,        -- 새로 계산된 점수를 score 에 덮어씀
+        job        = excluded.job,
+        fame       = excluded.fame,
+        isbuffer   = excluded.isbuffer,
+        key        = excluded.key
+"""
+
+
+def upsert_characters(conn, rows):
+    conn.executemany(UPSERT_CHARACTER_SQL, rows)
+
+
+def upsert_character_history(conn, rows, now=None):
+    """
+    캐릭터 히스토리 테이블에 rows 를 한 번에 반영한다. 캐릭터마다
+    - 가장 최근 이력의 '다음 날 오전 6시'가 지나지 않았으면 그 이력을 UPDATE,
+    - 경계 시간을 넘었거나 이력이 없으면 INSERT (새 이력 생성)
+    updated_at은 항상 현재 시간(now)으로 기록.
+    UPDATE/INSERT 판단은 임시 테이블에 모은 배치 전체에 대해 SQL 로 한 번에 한다.
+    """
+    now_str = (now or datetime.datetime.now()).strftime("%Y-%m-%d %H:%M:%S")
 
-    # 필드 이스케이프 및 형 변환
-    adventure = data['adventure'].replace("'", "''")
-    server_s  = server.replace("'", "''")
-    chara     = data['name'].replace("'", "''")
-    job       = data['job'].replace("'", "''")
-    fame_i    = int(data['fame'])
-
-    # INSERT ... ON CONFLICT ... DO UPDATE
-    sql = (
-        "INSERT INTO user_character"
-        " (adventure, server, key, chara_name, job, fame, score, last_score, isbuffer)"
-        " VALUES"
-        f" ('{adventure}', '{server_s}', '{key}', '{chara}', '{job}', {fame_i}, {score_n}, NULL, {isbuf_i})"
-        " ON CONFLICT(adventure, server, chara_name) DO UPDATE SET"
-        # 기존 score 를 last_score 에 복사
-        " last_score = user_character.score,"
-        # 새로 계산된 점수를 score 에 덮어씀
-        " score      = excluded.score,"
-        # 나머지 컬럼도 갱신
-        " job        = excluded.job,"
-        " fame       = excluded.fame,"
-        " isbuffer   = excluded.isbuffer,"
-        " key        = excluded.key;"
-    )
-
-    conn.execute(sql)
-    
+    # 같은 캐릭터가 배치에 여러 번 있으면 마지막 값만 (한 명씩 반영할 때와 같은 결과)
+    latest = {}
+    for r in rows:
+        latest[(r['server'], r['chara_name'])] = (r['server'], r['chara_name'], r['fame'], r['score'])
 
+    # 최근 이력 조회용 인덱스 (없으면 캐릭터마다 이력 전체를 훑는다)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_character_history_latest"
+        " ON character_history (server, chara_name, updated_at)"
+    )
+    conn.execute(
+        "CREATE TEMP TABLE IF NOT EXISTS history_batch"
+        " (server TEXT, chara_name TEXT, fame INTEGER, score NUMERIC, hist_idx INTEGER)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS temp.idx_history_batch_hist ON history_batch (hist_idx)")
+    conn.execute("DELETE FROM history_batch")
+    conn.executemany(
+        "INSERT INTO history_batch (server, chara_name, fame, score) VALUES (?, ?, ?, ?)",
+        latest.values()
+    )
 
-import datetime
+    # 1) 캐릭터별 최근 이력을 찾고, 경계 시각이 지난 것은 다시 비운다
+    #    경계 시각: (최근 이력 날짜 + 1일) 의 오전 6시
+    conn.execute(
+        """
+        UPDATE history_batch
+           SET hist_idx = (
+                 SELECT h.idx
+                   FROM character_history h
+                  WHERE h.server = history_batch.server
+                    AND h.chara_name = history_batch.chara_name
+                  ORDER BY h.updated_at DESC
+                  LIMIT 1
+               )
+        """
+    )
+    conn.execute(
+        """
+        UPDATE history_batch
+           SET hist_idx = NULL
+         WHERE hist_idx IS NOT NULL
+           AND ? >= (SELECT datetime(date(h.updated_at), '+1 day', '+6 hours')
+                       FROM character_history h
+                      WHERE h.idx = history_batch.hist_idx)
+        """,
+        (now_str,)
+    )
 
-def upsert_character_history(conn, data, server):
-    """
-    캐릭터 히스토리 테이블에
-    - '다음 날 오전 6시'가 지나지 않았으면 UPDATE,
-    - 경계 시간을 넘었으면 INSERT (새 이력 생성)
-    updated_at은 항상 현재 시간(now)으로 기록
-    """
-    chara_name = data['name']
-    fame_i     = int(data['fame'])
-    server_s   = server
-    score_n, _ = extract_score_info(data)
-
-    # 1) 가장 최근 이력 조회
-    row = conn.execute(
-        '''
-        SELECT idx, updated_at
-          FROM character_history
-         WHERE server=? AND chara_name=?
-         ORDER BY updated_at DESC
-         LIMIT 1
-        ''',
-        (server_s, chara_name)
-    ).fetchone()
-
-    now = datetime.datetime.now()
-    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
-
-    if row:
-        # 2) 최근 이력의 경계 시각 계산: (row_date + 1일) 의 오전 6시
-        last_dt = datetime.datetime.strptime(row['updated_at'], '%Y-%m-%d %H:%M:%S')
-        next_day = last_dt.date() + datetime.timedelta(days=1)
-        boundary_dt = datetime.datetime.combine(
-            next_day,
-            datetime.time(hour=6, minute=0, second=0)
-        )
-
-        if now < boundary_dt:
-            # 경계 전: 같은 기간으로 간주 → UPDATE (updated_at도 갱신)
-            conn.execute(
-                '''
-                UPDATE character_history
-                   SET fame=?, score=?, updated_at=?
-                 WHERE idx=?
-                ''',
-                (fame_i, score_n, now_str, row['idx'])
-            )
-            return
+    # 2) 경계 전: 같은 기간으로 간주 → UPDATE (updated_at도 갱신)
+    #    UPDATE ... FROM 은 SQLite 3.33 이상에서만 되므로 상관 서브쿼리로 쓴다
+    conn.execute(
+        """
+        UPDATE character_history
+           SET fame       = (SELECT b.fame  FROM history_batch b WHERE b.hist_idx = character_history.idx),
+               score      = (SELECT b.score FROM history_batch b WHERE b.hist_idx = character_history.idx),
+               updated_at = ?
+         WHERE idx IN (SELECT hist_idx FROM history_batch WHERE hist_idx IS NOT NULL)
+        """,
+        (now_str,)
+    )
 
-    # 3) 새 이력 INSERT (항상 now)
+    # 3) 나머지는 새 이력 INSERT (항상 now)
     conn.execute(
-        '''
+        """
         INSERT INTO character_history
             (server, chara_name, fame, score, updated_at)
-        VALUES (?, ?, ?, ?, ?)
-        ''',
-        (server_s, chara_name, fame_i, score_n, now_str)
+        SELECT server, chara_name, fame, score, ?
+          FROM history_batch
+         WHERE hist_idx IS NULL
+        """,
+        (now_str,)
     )
+    conn.execute("DELETE FROM history_batch")
+
+
+# 파싱한 결과를 트랜잭션 하나로 기록 (네트워크 요청이 모두 끝난 뒤 잠깐만 쓰기 잠금을 잡는다)
+# key_rows 를 주면 character_key 캐시도 같은 트랜잭션에서 바꾼다
+# unchanged 의 (adventure, server, chara_name) 는 user_character 를 그대로 두고(last_score 유지)
+# 이력의 updated_at 만 갱신한다 (update_score_from_db 가 마지막 갱신 시각으로 쓴다)
+def write_results(conn, rows, now=None, key_rows=None, unchanged=()):
+    if not rows and not key_rows:
+        return
+    with conn:
+        upsert_characters(conn, [r for r in rows if (r['adventure'], r['server'], r['chara_name']) not in unchanged])
+        upsert_character_history(conn, rows, now)
+        if key_rows:
+            ensure_character_key_schema(conn)
+            store_character_keys(conn, key_rows, now)
 
 
-def fetch_and_update(tuples):
+class ResponseCache:
     """
-    server–key 튜플 리스트를 받아, API 호출 후
-    DB에 INSERT/UPDATE 를 수행한다.
+    (server, key) 별 viewData 응답을 gzip 으로 압축한 파일 하나씩에 저장한다.
+    파일 내용: {"fetched_at": epoch 초, "etag": ..., "last_modified": ..., "data": 응답 JSON}
     """
-    session = requests.Session()
-    session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
 
-    # DB 연결
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  
+    def __init__(self, path=RESPONSE_CACHE_DIR, ttl=RESPONSE_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+
+    def _file(self, server, key):
+        # 파일 이름에 쓸 수 없는 값이면 해시로 바꾼다
+        parts = [p if re.fullmatch(r'[\w-]+', p) else hashlib.sha1(p.encode('utf-8')).hexdigest()
+                 for p in (server, key)]
+        return os.path.join(self.path, parts[0], parts[1] + '.json.gz')
+
+    def get(self, server, key):
+        try:
+            with gzip.open(self._file(server, key), 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def fresh(self, entry):
+        return time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def put(self, server, key, data, etag=None, last_modified=None):
+        path = self._file(server, key)
+        entry = {'fetched_at': time.time(), 'etag': etag, 'last_modified': last_modified, 'data': data}
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 여러 스레드가 동시에 써도 읽는 쪽이 반쯤 쓴 파일을 보지 않도록 임시 파일에 쓰고 바꾼다
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"응답 캐시 저장 실패 ({server} : {key}): {e}", file=sys.stderr)
+
+
+def default_response_cache(ttl=RESPONSE_CACHE_TTL):
+    return ResponseCache(RESPONSE_CACHE_DIR, ttl) if ttl > 0 else None
+
+
+class HostRateLimiter:
+    """호스트별로 요청 시작 간격을 1/rate 초 이상 벌린다 (여러 스레드가 함께 쓴다)."""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def wait(self, host):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next.get(host, now))
+            self._next[host] = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """회로가 열려 요청을 보내지 않고 실패 처리했을 때."""
+
 
-    for server, key in tuples:
-        url = REQUEST_TEMPLATE.format(server=server, key=key)
+class CircuitBreaker:
+    """
+    호스트별 회로 차단기 (여러 스레드가 함께 쓴다).
+    연속 실패가 failures 회에 이르면 열리고(open), cooldown 초 동안은 요청을 막는다.
+    cooldown 이 지나면 요청 하나만 시험으로 보내(half-open) 성공하면 닫고, 실패하면 다시 연다.
+    """
+
+    def __init__(self, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._state = {}     # host -> [연속 실패 수, 열린 시각(monotonic) 또는 None, 시험 요청 중 여부]
+        self._lock = threading.Lock()
+
+    def allow(self, host):
+        if self.failures <= 0:
+            return True
+        with self._lock:
+            st = self._state.setdefault(host, [0, None, False])
+            if st[1] is None:
+                return True
+            if st[2] or time.monotonic() - st[1] < self.cooldown:
+                return False
+            st[2] = True
+            return True
+
+    def success(self, host):
+        with self._lock:
+            self._state[host] = [0, None, False]
+
+    def failure(self, host):
+        with self._lock:
+            st = self._state.setdefault(host, [0, None, False])
+            st[0] += 1
+            if st[2] or st[0] >= self.failures > 0:
+                if st[1] is None or st[2]:
+                    print(f"-- {host} 연속 실패 {st[0]}회: {self.cooldown:g}초 동안 요청 중단", flush=True)
+                st[1], st[2] = time.monotonic(), False
+
+
+def retryable(err):
+    """다시 시도할 만한 실패인지 (연결 오류·시간 초과·5xx·429)."""
+    if isinstance(err, CircuitOpenError):
+        return False
+    if isinstance(err, (requests.ConnectionError, requests.Timeout)):
+        return True
+    if isinstance(err, requests.HTTPError) and err.response is not None:
+        return err.response.status_code >= 500 or err.response.status_code == 429
+    return False
+
+
+def error_kind(err):
+    """실패 요약에 남길 짧은 분류."""
+    if isinstance(err, CircuitOpenError):
+        return 'circuit_open'
+    if isinstance(err, requests.Timeout):
+        return 'timeout'
+    if isinstance(err, requests.ConnectionError):
+        return 'connection'
+    if isinstance(err, requests.HTTPError) and err.response is not None:
+        return f'http_{err.response.status_code}'
+    return 'bad_response'
+
+
+# requests.Session 은 스레드 간 공유가 안전하지 않으므로 스레드마다 하나씩 둔다
+_local = threading.local()
+
+
+def _session():
+    session = getattr(_local, 'session', None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT})
+        _local.session = session
+    return session
+
+
+def fetch_character(server, key, base_url=BASE_URL, limiter=None, cache=None, breaker=None,
+                    retries=FETCH_RETRIES):
+    """
+    viewData API 응답을 받아 (data, error, cached) 로 반환한다. 실패하면 data 가 None.
+    cache 를 주면 유효 시간 안의 응답은 요청 없이 쓰고, 지났으면 조건부 요청을 보내
+    304 면 저장된 응답을 쓴다. 이 두 경우 cached 가 True.
+    일시적 실패는 retries 번까지 지터를 준 지수 백오프로 다시 시도하고,
+    breaker(CircuitBreaker)가 호스트를 막고 있으면 요청 없이 CircuitOpenError 로 실패한다.
+    """
+    entry = cache.get(server, key) if cache is not None else None
+    if entry is not None and cache.fresh(entry):
+        return entry['data'], None, True
+
+    url = REQUEST_TEMPLATE.format(base=base_url, server=server, key=key)
+    host = urlsplit(url).netloc
+    headers = {}
+    if entry is not None:
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+
+    last_err = None
+    for attempt in range(retries + 1):
+        if breaker is not None and not breaker.allow(host):
+            # 재시도 중에 회로가 열렸으면 실제로 난 마지막 오류를 알린다
+            return None, last_err or CircuitOpenError(f'{host} circuit open'), False
+        if limiter is not None:
+            limiter.wait(host)
         try:
-            resp = session.get(url, timeout=30)
+            resp = _session().get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+            if resp.status_code == 304 and entry is not None:
+                if breaker is not None:
+                    breaker.success(host)
+                cache.put(server, key, entry['data'], resp.headers.get('ETag', entry.get('etag')),
+                          resp.headers.get('Last-Modified', entry.get('last_modified')))
+                return entry['data'], None, True
             resp.raise_for_status()
             data = resp.json()
-
-            if 'adventure' in data and 'name' in data:
-                upsert_character(conn, data, server, key)
-                upsert_character_history(conn, data, server)
-                print(f"-- {server} : {data['name']} 갱신 완료", flush=True)
-            else:
-                print(f"-- {server} : {key} 갱신 실패 (응답 형식 오류)", flush=True)
         except requests.RequestException as e:
-            print(f"-- {server} : {key} 갱신 실패 (에러: {e})", flush=True)
+            if not retryable(e):
+                # 4xx·형식 오류는 서버가 응답은 한 것이므로 회로에는 성공으로 친다
+                if breaker is not None and not isinstance(e, CircuitOpenError):
+                    breaker.success(host)
+                return None, e, False
+            last_err = e
+            if breaker is not None:
+                breaker.failure(host)
+            if attempt == retries:
+                return None, e, False
+            time.sleep(random.uniform(0, min(RETRY_CAP, RETRY_BASE * 2 ** attempt)))
+            continue
+        if breaker is not None:
+            breaker.success(host)
+        break
+
+    if RECORD_DIR:
+        record_view_data(server, key, resp.content)
+
+    # 형식이 맞는 응답만 캐시한다
+    if cache is not None and isinstance(data, dict) and 'adventure' in data and 'name' in data:
+        cache.put(server, key, data, resp.headers.get('ETag'), resp.headers.get('Last-Modified'))
+    return data, None, False
+
 
-    conn.commit()
+def write_failed_summary(path, failures, ok=0):
+    """
+    실패한 캐릭터 목록을 JSON 으로 저장한다 (update_score.py --retry-failed 로 다시 갱신).
+    {"generated_at": ..., "ok": n, "failed": [{"server", "key", "error", "detail"}, ...]}
+    """
+    summary = {
+        'generated_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'ok': ok,
+        'failed': failures,
+    }
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+def load_failed_tuples(path):
+    with open(path, encoding='utf-8') as f:
+        summary = json.load(f)
+    return [(r['server'], r['key']) for r in summary.get('failed', [])]
+
+
+def record_view_data(server, key, body, record_dir=None):
+    record_dir = record_dir or RECORD_DIR
+    try:
+        os.makedirs(record_dir, exist_ok=True)
+        with open(os.path.join(record_dir, f'{server}_{key}.json'), 'wb') as f:
+            f.write(body)
+    except OSError as e:
+        print(f"응답 기록 실패 ({server} : {key}): {e}", file=sys.stderr)
+
+
+def unchanged_characters(conn, rows):
+    """rows 중 user_character 의 score/fame 이 이미 같은 캐릭터의 (adventure, server, chara_name) 집합."""
+    unchanged = set()
+    for r in rows:
+        cur = conn.execute(
+            "SELECT score, fame FROM user_character WHERE adventure = ? AND server = ? AND chara_name = ?",
+            (r['adventure'], r['server'], r['chara_name'])
+        ).fetchone()
+        if cur is not None and cur[0] == r['score'] and cur[1] == r['fame']:
+            unchanged.add((r['adventure'], r['server'], r['chara_name']))
+    return unchanged
+
+
+def fetch_and_update(tuples, workers=FETCH_WORKERS, rate=HOST_RATE_LIMIT, base_url=BASE_URL,
+                     db_path=DB_PATH, cache_keys=None, limiter=None, executor=None, response_cache=None,
+                     breaker=None, failures=None, retries=FETCH_RETRIES):
+    """
+    server–key 튜플 리스트(또는 stream_discovered 같은 이터레이터)를 받아, API 호출 후
+    DB에 INSERT/UPDATE 를 수행한다. 이터레이터면 튜플이 나오는 대로 요청을 시작한다.
+
+    API 요청은 workers 개 스레드로 동시에 보내되 호스트별로 초당 rate 회를 넘지 않게 하고,
+    응답은 튜플 순서대로 모아 두었다가 이 함수를 부른 스레드에서 트랜잭션 하나로 DB 에 쓴다
+    (SQLite 쓰기는 한 곳에서만, 잠금은 요청이 모두 끝난 뒤 짧게).
+    workers=1 이면 예전처럼 한 명씩 차례로 갱신한다.
+    cache_keys(브라우저로 새로 조회한 (server, key) 집합)를 주면, 그 캐릭터가 모두 갱신에
+    성공했을 때만 character_key 캐시에 기록한다 (일부가 빠진 목록이 캐시되지 않도록).
+    여러 번 부를 때 limiter/executor 를 넘기면 요청 간격 제한과 스레드(스레드별 세션)를 함께 쓴다.
+    response_cache(ResponseCache)를 주면 캐시된 응답을 쓰고, 캐시 응답인데 score/fame 이
+    DB 와 같은 캐릭터는 DB 에 다시 쓰지 않는다.
+    breaker(CircuitBreaker)는 여러 번 부를 때 함께 쓰도록 넘길 수 있다 (없으면 이번 호출용으로 만든다).
+    failures(list)를 주면 실패한 캐릭터를 {"server", "key", "error", "detail"} 로 덧붙인다.
+    retries 는 캐릭터마다 일시적 실패를 다시 시도할 횟수.
+    반환값: (갱신 성공 수, 실패 수)
+    """
+    limiter = limiter or HostRateLimiter(rate)
+    breaker = breaker or CircuitBreaker()
+    pool = executor or ThreadPoolExecutor(max_workers=max(1, workers))
+
+    # DB 연결
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+
+    rows = []
+    failed = []
+    cached = set()
+
+    def fail(server, key, kind, detail):
+        failed.append((server, key))
+        if failures is not None:
+            failures.append({'server': server, 'key': key, 'error': kind, 'detail': detail})
+
+    def collect(server, key, data, err, from_cache):
+        if err is not None:
+            print(f"-- {server} : {key} 갱신 실패 (에러: {err})", flush=True)
+            fail(server, key, error_kind(err), str(err))
+        elif 'adventure' in data and 'name' in data:
+            rows.append(parse_character(data, server, key))
+            if from_cache:
+                cached.add((server, key))
+            print(f"-- {server} : {data['name']} 조회 완료{' (캐시)' if from_cache else ''}", flush=True)
+        else:
+            print(f"-- {server} : {key} 갱신 실패 (응답 형식 오류)", flush=True)
+            fail(server, key, 'bad_response', '응답 형식 오류')
+
+    # 튜플이 도착하는 대로 요청을 넣고, 앞에서부터 끝난 응답은 바로 정리한다 (출력·DB 반영 순서는 튜플 순서)
+    pending = deque()
+    try:
+        for server, key in tuples:
+            pending.append((server, key, pool.submit(fetch_character, server, key, base_url, limiter,
+                                                      response_cache, breaker, retries)))
+            while pending and pending[0][2].done():
+                server, key, fut = pending.popleft()
+                collect(server, key, *fut.result())
+        while pending:
+            server, key, fut = pending.popleft()
+            collect(server, key, *fut.result())
+    finally:
+        if executor is None:
+            pool.shutdown()
+
+    key_rows = None
+    if cache_keys and not any(t in cache_keys for t in failed):
+        key_rows = [r for r in rows if (r['server'], r['key']) in cache_keys]
+    # 캐시 응답이고 점수/명성이 그대로인 캐릭터는 user_character 쓰기를 건너뛴다 (이력 시각은 갱신)
+    skip = set()
+    if cached:
+        skip = unchanged_characters(conn, [r for r in rows if (r['server'], r['key']) in cached])
+    write_results(conn, rows, key_rows=key_rows, unchanged=skip)
     conn.close()
+    print(f"-- {len(rows)}명 갱신 완료{f' (변경 없음 {len(skip)}명)' if skip else ''}", flush=True)
+    return len(rows), len(failed)
 
 if __name__ == '__main__':
-    # 1) 커맨드라인 인자로 넘어온 key 리스트
-    keys = sys.argv[1:]  # ex: ['ABC123', 'DEF456', ...]
-
-    # 2) scrap_char.py 호출해 (server, key) 튜플 리스트 획득
-    server_char_tuples = load_tuples_from_subprocess(keys)
-    if not server_char_tuples:
+    parser = argparse.ArgumentParser(description='Discover characters of adventures and update their scores')
+    # 1) 커맨드라인 인자로 넘어온 모험단 이름 리스트
+    parser.add_argument('keys', nargs='*', help='모험단 이름')
+    parser.add_argument('--workers', type=int, default=FETCH_WORKERS, help='동시 API 요청 수 (1 이면 순차)')
+    parser.add_argument('--rate', type=float, default=HOST_RATE_LIMIT,
+                        help='호스트별 초당 요청 수 상한 (0 이면 제한 없음)')
+    parser.add_argument('--base-url', default=BASE_URL, help='API 서버 주소 (로컬 스텁 서버 시험용)')
+    parser.add_argument('--force-discovery', action='store_true',
+                        help='character_key 캐시를 무시하고 브라우저로 다시 조회')
+    parser.add_argument('--cache-ttl', type=float, default=RESPONSE_CACHE_TTL / 60,
+                        help='응답 캐시 유효 시간(분). 지나면 조건부 요청으로 재검증 (0 이면 캐시 안 씀)')
+    parser.add_argument('--record', metavar='DIR',
+                        help='viewData 응답과 검색 페이지 HTML 을 DIR 에 기록 (캐시를 쓰지 않고 모두 새로 조회). '
+                             '상주 discovery_worker.py 는 DUNDAM_RECORD_DIR 로 띄워야 검색 페이지가 기록된다')
+    parser.add_argument('--failed-out', metavar='PATH', help='실패한 캐릭터 목록을 JSON 으로 저장')
+    parser.add_argument('--retry-failed', metavar='PATH',
+                        help='--failed-out 으로 저장한 캐릭터만 다시 갱신 (모험단 조회 생략)')
+    args = parser.parse_args()
+    if not args.keys and not args.retry_failed:
+        parser.error('모험단 이름 또는 --retry-failed 가 필요합니다.')
+    if args.record:
+        # scrap_char.py 하위 프로세스도 같은 디렉터리에 기록하도록 환경 변수로 넘긴다
+        os.environ['DUNDAM_RECORD_DIR'] = RECORD_DIR = args.record
+        args.cache_ttl = 0
+        args.force_discovery = True
+
+    # 2) character_key 캐시 또는 scrap_char.py 로 (server, key) 튜플을 찾는 대로
+    #    (--retry-failed 면 저장된 실패 목록)
+    # 3) API 호출 및 DB 반영 (새로 조회한 key 는 캐시에 기록)
+    scraped = set()
+    if args.retry_failed:
+        stream = load_failed_tuples(args.retry_failed)
+    else:
+        stream = stream_discovered(args.keys, force=args.force_discovery, scraped=scraped)
+    failures = []
+    ok, failed = fetch_and_update(stream, workers=args.workers, rate=args.rate,
+                                  base_url=args.base_url.rstrip('/'), cache_keys=scraped,
+                                  response_cache=default_response_cache(args.cache_ttl * 60),
+                                  failures=failures)
+    if args.failed_out:
+        write_failed_summary(args.failed_out, failures, ok)
+        print(f"실패 목록 {len(failures)}건: {args.failed_out}")
+    if not ok and not failed:
         print("유효한 서버/키 튜플이 없습니다. 스크랩 스크립트 확인 필요.")
         sys.exit(1)
-
-    # 3) API 호출 및 DB 반영
-    fetch_and_update(server_char_tuples)
+    if not ok:
+        print("모든 캐릭터 갱신에 실패했습니다.")
+        sys.exit(1)
     print("DB 업데이트 완료")
@@ -2,157 +2,122 @@
 import sys
 import sqlite3
 import os
-import requests
+import argparse
 import datetime
 
 # DB 파일 경로
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH  = os.path.join(BASE_DIR, '..', 'database', 'DB.sqlite')
 
-# API 요청 URL 템플릿
-REQUEST_TEMPLATE = "https://dundam.xyz/dat/viewData.jsp?image={key}&server={server}&"
-
-def extract_score_info(data):
-    buff_list = data.get('buffCal', [])
-    buff_score = None
-    if buff_list:
-        last = buff_list[-1]
-        buff_score = last.get('buffScoreNon') \
-                     or last.get('4PBuffScore') \
-                     or last.get('buffScore')
-
-    if buff_score:
-        raw = buff_score
-        isbuf = 1
-    else:
-        ranking     = data.get('damageList', {}).get('vsRanking', [])
-        total_entry = next((i for i in ranking if i.get('name') == '총 합'), {})
-        raw         = total_entry.get('dam', data.get('score', '0'))
-        isbuf       = 0
-
-    clean = str(raw).replace(',', '')
-    return int(clean), isbuf
-
-def upsert_character(conn, data, server, key):
-    score_n, isbuf_i = extract_score_info(data)
-    adventure = data['adventure'].replace("'", "''")
-    server_s  = server.replace("'", "''")
-    chara     = data['name'].replace("'", "''")
-    job       = data['job'].replace("'", "''")
-    fame_i    = int(data['fame'])
-
-    sql = (
-        "INSERT INTO user_character"
-        " (adventure, server, key, chara_name, job, fame, score, last_score, isbuffer)"
-        " VALUES"
-        f" ('{adventure}', '{server_s}', '{key}', '{chara}', '{job}', {fame_i}, {score_n}, NULL, {isbuf_i})"
-        " ON CONFLICT(adventure, server, chara_name) DO UPDATE SET"
-        " last_score = user_character.score,"
-        " score      = excluded.score,"
-        " job        = excluded.job,"
-        " fame       = excluded.fame,"
-        " isbuffer   = excluded.isbuffer,"
-        " key        = excluded.key;"
-    )
-
-    conn.execute(sql)
-
-def upsert_character_history(conn, data, server):
-    print(f"Updating score from API: {data['name']}")
-    chara_name = data['name']
-    fame_i     = int(data['fame'])
-    server_s   = server
-    score_n, _ = extract_score_info(data)
-
-    row = conn.execute(
-        '''
-        SELECT idx, updated_at
-          FROM character_history
-         WHERE server=? AND chara_name=?
-         ORDER BY updated_at DESC
-         LIMIT 1
-        ''',
-        (server_s, chara_name)
-    ).fetchone()
-
-    now = datetime.datetime.now()
-    now_str = now.strftime("%Y-%m-%d %H:%M:%S")
-
-    if row:
-        last_dt = datetime.datetime.strptime(row['updated_at'], '%Y-%m-%d %H:%M:%S')
-        next_day = last_dt.date() + datetime.timedelta(days=1)
-        boundary_dt = datetime.datetime.combine(
-            next_day,
-            datetime.time(hour=6, minute=0, second=0)
-        )
-        if now < boundary_dt:
-            conn.execute(
-                '''
-                UPDATE character_history
-                   SET fame=?, score=?, updated_at=?
-                 WHERE idx=?
-                ''',
-                (fame_i, score_n, now_str, row['idx'])
-            )
-            return
-
-    conn.execute(
-        '''
-        INSERT INTO character_history
-            (server, chara_name, fame, score, updated_at)
-        VALUES (?, ?, ?, ?, ?)
-        ''',
-        (server_s, chara_name, fame_i, score_n, now_str)
-    )
-
-def fetch_and_update(tuples):
-    session = requests.Session()
-    session.headers.update({'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'})
-
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row  
-
-    for server, key in tuples:
-        url = REQUEST_TEMPLATE.format(server=server, key=key)
-        try:
-            resp = session.get(url, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-            if 'adventure' in data and 'name' in data:
-                upsert_character(conn, data, server, key)
-                upsert_character_history(conn, data, server)
-            else:
-                print(f"-- {server} : {key} 갱신 실패 (응답 형식 오류)")
-        except requests.RequestException as e:
-            print(f"-- {server} : {key} 갱신 실패 (에러: {e})")
-
-    conn.commit()
-    conn.close()
+# API 요청·DB 반영은 update_score.py 와 같은 경로를 쓴다 (동시 요청, 일괄 upsert)
+try:
+    from update_score import default_response_cache, fetch_and_update
+except ImportError:  # uchsquad 디렉터리에서 scripts.update_score_from_db 로 불러올 때
+    from scripts.update_score import default_response_cache, fetch_and_update
+
+# 이 시간(분) 안에 갱신된 캐릭터는 다시 요청하지 않는다
+REFRESH_SKIP_MINUTES = float(os.environ.get('REFRESH_SKIP_MINUTES', '30'))
+
+# 이번 주 던전 참여 여부 컬럼 (하나라도 1이면 우선 갱신)
+DUNGEON_FLAGS = ('temple', 'azure', 'venus', 'tmp')
+
+
+# 주간 초기화 시각: 가장 최근 목요일 06:00 (목요일 06:00 이전이면 지난주 목요일)
+def weekly_reset(now=None):
+    now = now or datetime.datetime.now()
+    days_since_thu = (now.weekday() - 3) % 7
+    reset = (now - datetime.timedelta(days=days_since_thu)).replace(hour=6, minute=0, second=0, microsecond=0)
+    if reset > now:
+        reset -= datetime.timedelta(days=7)
+    return reset
+
 
-def get_tuples_from_db(adventure):
-    conn = sqlite3.connect(DB_PATH)
+def plan_refresh(adventure=None, max_requests=None, skip_minutes=REFRESH_SKIP_MINUTES,
+                 include_unused=False, now=None, db_path=DB_PATH):
+    """
+    갱신할 캐릭터를 오래된 순으로 고른다 (adventure 가 None 이면 전체 모험단).
+
+    - use_yn=0 캐릭터는 include_unused 가 아니면 건너뛴다.
+    - 최근 이력(character_history.updated_at)이 skip_minutes 안이면 건너뛴다.
+    - 순서: 이번 주 던전 참여 캐릭터 → 나머지, 각각 주간 초기화 이후 갱신 안 된 캐릭터 →
+            최근 이력이 오래된 순 (이력이 없으면 가장 먼저).
+    - max_requests 가 있으면 앞에서부터 그 수만큼만 고른다.
+
+    반환값: (고른 캐릭터 dict 목록, {'candidates', 'recent', 'unused', 'over_budget', 'stale'})
+    """
+    now = now or datetime.datetime.now()
+    reset_str = weekly_reset(now).strftime('%Y-%m-%d %H:%M:%S')
+    recent_str = (now - datetime.timedelta(minutes=skip_minutes)).strftime('%Y-%m-%d %H:%M:%S')
+
+    conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
-    rows = conn.execute(
-        '''
-        SELECT server, key
-          FROM user_character
-         WHERE adventure = ?
-        ''',
-        (adventure,)
-    ).fetchall()
+    query = f'''
+        SELECT c.adventure, c.server, c.key, c.chara_name, c.use_yn,
+               {' + '.join(f'COALESCE(c.{f}, 0)' for f in DUNGEON_FLAGS)} AS flagged,
+               (SELECT MAX(h.updated_at)
+                  FROM character_history h
+                 WHERE h.server = c.server AND h.chara_name = c.chara_name) AS last_refresh
+          FROM user_character c
+    '''
+    params = ()
+    if adventure is not None:
+        query += ' WHERE c.adventure = ?'
+        params = (adventure,)
+    rows = [dict(r) for r in conn.execute(query, params).fetchall()]
     conn.close()
-    return [(r['server'], r['key']) for r in rows]
 
-if __name__ == '__main__':
-    if len(sys.argv) < 2:
-        print("사용법: python update_score_from_db.py <모험단명>")
-        sys.exit(1)
+    stats = {'candidates': len(rows), 'recent': 0, 'unused': 0, 'over_budget': 0, 'stale': 0}
+    plan = []
+    for r in rows:
+        if not include_unused and not r['use_yn']:
+            stats['unused'] += 1
+        elif r['last_refresh'] is not None and str(r['last_refresh']) >= recent_str:
+            stats['recent'] += 1
+        else:
+            plan.append(r)
+
+    def priority(r):
+        last = r['last_refresh']
+        stale = last is None or str(last) < reset_str
+        return (not r['flagged'], not stale, '' if last is None else str(last))
+
+    plan.sort(key=priority)
+    if max_requests is not None and len(plan) > max_requests:
+        stats['over_budget'] = len(plan) - max_requests
+        plan = plan[:max_requests]
+    stats['stale'] = sum(1 for r in plan if r['last_refresh'] is None or str(r['last_refresh']) < reset_str)
+    return plan, stats
+
+
+def get_tuples_from_db(adventure, max_requests=None, skip_minutes=REFRESH_SKIP_MINUTES, include_unused=False):
+    plan, _ = plan_refresh(adventure, max_requests, skip_minutes, include_unused)
+    return [(r['server'], r['key']) for r in plan]
 
-    adventure = sys.argv[1]
-    tuples = get_tuples_from_db(adventure)
-    if not tuples:
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Refresh stored characters, stalest first')
+    parser.add_argument('adventure', nargs='?', help='모험단명 (생략하면 전체 모험단)')
+    parser.add_argument('--max-requests', type=int, default=None, help='이번 실행에서 보낼 API 요청 수 상한')
+    parser.add_argument('--skip-minutes', type=float, default=REFRESH_SKIP_MINUTES,
+                        help='이 시간(분) 안에 갱신된 캐릭터는 건너뜀')
+    parser.add_argument('--all', dest='include_unused', action='store_true',
+                        help='use_yn=0 캐릭터도 갱신')
+    parser.add_argument('--dry-run', action='store_true', help='갱신 순서만 출력')
+    args = parser.parse_args()
+
+    plan, stats = plan_refresh(args.adventure, args.max_requests, args.skip_minutes, args.include_unused)
+    print(f"갱신 대상 {len(plan)}명 (이번 주 미갱신 {stats['stale']}명) / 전체 {stats['candidates']}명: "
+          f"최근 갱신 {stats['recent']}명, 미사용 {stats['unused']}명, 요청 상한 초과 {stats['over_budget']}명 제외")
+    if args.dry_run:
+        for r in plan:
+            print(f"  {r['adventure']} {r['chara_name']} ({r['server']}) "
+                  f"마지막 갱신 {r['last_refresh'] or '-'}{' *' if r['flagged'] else ''}")
+        sys.exit(0)
+    if not plan:
+        if stats['candidates']:
+            print("갱신할 캐릭터가 없습니다.")
+            sys.exit(0)
         print("해당 모험단에 등록된 캐릭터가 없습니다.")
         sys.exit(1)
 
-    fetch_and_update(tuples)
+    fetch_and_update([(r['server'], r['key']) for r in plan], response_cache=default_response_cache())
     print("DB 업데이트 완료 ✔")
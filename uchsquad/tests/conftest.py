@@ -0,0 +1,6 @@
+# tests/conftest.py
+# uchsquad 디렉터리에서 python -m pytest 로 실행한다. scripts/benchmarks 를 패키지로 불러올 수 있게 경로를 추가한다.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+# 파티 배정 엔진 동작 확인
+import concurrent.futures
+from statistics import stdev
+
+from benchmarks.roster import make_roster
+from scripts import party_maker_print
+from scripts.party_maker_print import Roster, _party_score, assign_parties, reassign_parties, solve_exact
+
+
+def _greedy_parties(size=60, seed=0):
+    # 스왑 없이(max_rounds=0) greedy 배치만 한 파티 목록
+    parties, _, _, _, _ = assign_parties(Roster.from_records(make_roster(size, seed=seed)), max_rounds=0)
+    return [{'members': list(ms), 'adventures': {m.adventure for m in ms}} for ms in parties]
+
+
+def test_parallel_returns_start_layout_when_target_already_met(monkeypatch):
+    from scripts.party_maker_print import _reduce_stdev_parallel
+
+    def no_pool(*args, **kwargs):
+        raise AssertionError('시작 배치가 목표를 만족하면 프로세스 풀을 띄우지 않아야 한다')
+
+    monkeypatch.setattr(concurrent.futures, 'ProcessPoolExecutor', no_pool)
+    parties = _greedy_parties()
+    before = [[m.idx for m in p['members']] for p in parties]
+    start_std = stdev([_party_score(p['members']) for p in parties])
+    _reduce_stdev_parallel(parties, target_std=start_std, workers=2, starts=4)
+    assert [[m.idx for m in p['members']] for p in parties] == before
+
+
+def _records(buffer_scores, dealer_scores):
+    records = [{'adventure': f'버퍼{i}', 'chara_name': f'버퍼{i}', 'job': '', 'fame': 0, 'score': s, 'isbuffer': 1}
+               for i, s in enumerate(buffer_scores)]
+    records += [{'adventure': f'딜러{i}', 'chara_name': f'딜러{i}', 'job': '', 'fame': 0, 'score': s, 'isbuffer': 0}
+                for i, s in enumerate(dealer_scores)]
+    return records
+
+
+def test_exact_aborted_run_reports_useful_gap(monkeypatch):
+    # 버퍼 세기가 크게 달라 어떤 배치든 파티 점수가 벌어지는 로스터: 중단돼도 0 보다 큰 하한이 나와야 한다
+    records = _records([6_000_000, 5_000_000, 600_000], [k * 1_000_000_000 for k in range(9, 0, -1)])
+    full = solve_exact(Roster.from_records(records))
+    assert full['optimal'] and full['gap'] == 0
+
+    monkeypatch.setattr(party_maker_print, 'EXACT_CHECK_EVERY', 1)
+    aborted = solve_exact(Roster.from_records(records), node_limit=20)
+    assert not aborted['optimal']
+    assert 0 < aborted['lower_bound'] <= full['std_dev']
+    assert aborted['gap'] < aborted['std_dev']
+
+
+def _layout(roster, parties):
+    # reassign_parties 가 받는 기존 배치 (DB party 행과 같은 모양)
+    return [[{'adventure': roster.adventure_names[m.adventure], 'chara_name': roster.names[m.idx],
+              'score': m.score} for m in ms] for ms in parties]
+
+
+def _party_keys(roster, parties):
+    return {frozenset((roster.adventure_names[m.adventure], roster.names[m.idx]) for m in ms) for ms in parties}
+
+
+def test_reassign_single_rescore_changes_few_parties():
+    records = make_roster(100, seed=0)
+    roster = Roster.from_records(records)
+    parties = assign_parties(roster)[0]
+    assert len(parties) == 25
+    layout = _layout(roster, parties)
+
+    # 변경분이 없으면 배치를 그대로 둔다
+    same = reassign_parties(Roster.from_records(records), layout)[0]
+    assert _party_keys(roster, same) == _party_keys(roster, parties)
+
+    # 딜러 한 명의 점수를 두 배로: 그 파티와 스왑 상대 INCREMENTAL_SWAP_PARTNERS 개까지만 바뀐다
+    rescored = [dict(r) for r in records]
+    dealer = next(r for r in rescored if not r['isbuffer'])
+    dealer['score'] *= 2
+    new_roster = Roster.from_records(rescored)
+    stats = {}
+    after = reassign_parties(new_roster, layout, stats=stats)[0]
+    assert stats['touched'] == 1
+    changed = _party_keys(new_roster, after) - _party_keys(roster, parties)
+    assert 0 < len(changed) <= 1 + party_maker_print.INCREMENTAL_SWAP_PARTNERS
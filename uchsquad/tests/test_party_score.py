@@ -0,0 +1,38 @@
+# 파티 점수 계산 구현들이 기존 compute_party_score 공식과 같은 값을 내는지 (무작위 구성 비교)
+import random
+
+import pytest
+
+from benchmarks.score_check import random_party, reference_party_score, to_arrays
+from scripts.party_maker_print import (
+    Member, _party_score, compute_party_score, party_score, score_parties,
+)
+
+SEEDS = range(5)
+CASES = 5_000
+
+
+def _cases(seed):
+    rng = random.Random(seed)
+    pool = []
+    parties = [random_party(rng, k, pool) for k in range(CASES)]
+    pairs = [[(m['score'], m['is_buffer']) for m in p] for p in parties]
+    return parties, pairs, [reference_party_score(p) for p in parties]
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_scalar_paths_match_reference(seed):
+    parties, pairs, expected = _cases(seed)
+    assert [compute_party_score(p) for p in parties] == expected
+    assert [party_score(p) for p in pairs] == expected
+    assert score_parties(pairs) == expected
+    members = [[Member(i, i, m['is_buffer'], m['score']) for i, m in enumerate(p)] for p in parties]
+    assert [_party_score(ms) for ms in members] == expected
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+@pytest.mark.parametrize('dtype', ['int64', 'float64'])
+def test_array_path_matches_reference(seed, dtype):
+    pytest.importorskip('numpy')
+    _, pairs, expected = _cases(seed)
+    assert to_arrays(pairs, dtype) == expected